@@ -0,0 +1,276 @@
+"""Response cache shared by the read-only product endpoints.
+
+Two backends are available:
+- ``memory``: in-process LRU, one copy per worker.
+- ``sqlite``: a local SQLite file that every worker on the host reads and writes.
+
+Keys are namespaced by the catalog version, so a migration that bumps the version
+invalidates every worker's view of the cache at once. Entries of older versions are
+never read again and leave through expiry and the entry limit, not an eager clear that
+every worker of the shared SQLite cache would repeat. Each negotiated encoding
+(JSON, gzip, brotli, MessagePack) is cached separately so it is only produced once.
+"""
+import abc
+import functools
+import inspect
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from .catalog import current_catalog_version
+from .encoding import IDENTITY_JSON, encode_variant, negotiate, serialize_json, variant_headers, variant_key
+from .metrics import record_cache_hit, record_cache_miss
+from .singleflight import SingleFlight
+
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")  # memory, sqlite or none
+CACHE_PATH = os.getenv("CACHE_PATH", "./.cache/response-cache.db")
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+
+CACHE_NAME = "response"
+SINGLEFLIGHT_NAME = "singleflight"
+
+
+class CacheBackend(abc.ABC):
+    """Byte-oriented key/value cache with per-entry expiry."""
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """The value stored under `key`, or None if it is missing or expired."""
+
+    @abc.abstractmethod
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Store `value` under `key` for `ttl` seconds."""
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        """Drop every entry."""
+
+
+class LRUCache(CacheBackend):
+    """In-process LRU cache bounded by entry count."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache(CacheBackend):
+    """Cache stored in a local SQLite file shared by all workers on the host."""
+
+    PRUNE_EVERY = 500  # writes between expiry/size pruning passes
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL, created_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_response_cache_created_at ON response_cache (created_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit; every statement is its own short transaction
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+        if row is None or row[1] < time.time():
+            return None
+        return row[0]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at, created_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now)
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune(conn, now)
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM response_cache WHERE expires_at < ?", (now,))
+        conn.execute(
+            "DELETE FROM response_cache WHERE key IN ("
+            "SELECT key FROM response_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def clear(self) -> None:
+        try:
+            self._connection().execute("DELETE FROM response_cache")
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache clear failed: {e}")
+
+
+def create_cache_backend(backend: str = CACHE_BACKEND) -> Optional[CacheBackend]:
+    """Create the configured cache backend (None disables caching)."""
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return LRUCache(CACHE_MAX_ENTRIES)
+    if backend == "sqlite":
+        return SQLiteCache(CACHE_PATH, CACHE_MAX_ENTRIES)
+    raise ValueError(f"Unknown CACHE_BACKEND: {backend}")
+
+
+response_cache = create_cache_backend()
+response_flights = SingleFlight()
+
+
+def response_cache_key(request: Request, catalog_version: int) -> str:
+    """Cache key from catalog version, route path and normalized query params."""
+    params = sorted((name, value) for name, value in request.query_params.multi_items() if value != "")
+    query = "&".join(f"{name}={value}" for name, value in params)
+    return f"v{catalog_version}:{request.url.path}?{query}"
+
+
+def serialize_response(result: Any) -> bytes:
+    """Serialize an endpoint result to JSON the same way FastAPI would."""
+    return serialize_json(jsonable_encoder(result))
+
+
+def cached_response(request: Request, session, build: Callable[[], Any]) -> Response:
+    """Serve a negotiated response from the cache, building and storing it on a miss.
+
+    The identity JSON payload is the source for every other encoding. Concurrent misses
+    for the same key are coalesced so only one of them hits the database.
+    """
+    catalog_version = current_catalog_version(session)
+    key = response_cache_key(request, catalog_version)
+    variant = negotiate(request)
+    encoded_key = key if variant == IDENTITY_JSON else f"{key}|{variant_key(variant)}"
+
+    if response_cache is not None:
+        body = response_cache.get(encoded_key)
+        if body is not None:
+            record_cache_hit(CACHE_NAME)
+            # Stored bodies carry a one-byte encoding marker: small JSON is never compressed
+            content_encoding, body = _unpack_body(body)
+            return _response(body, variant, content_encoding, "HIT")
+        record_cache_miss(CACHE_NAME)
+
+    def build_and_store() -> Tuple[bytes, str]:
+        json_payload = None
+        if response_cache is not None and encoded_key != key:
+            stored = response_cache.get(key)
+            if stored is not None:
+                json_payload = _unpack_body(stored)[1]
+        data = None
+        if json_payload is None:
+            data = jsonable_encoder(build())
+            json_payload = serialize_json(data)
+            if response_cache is not None:
+                response_cache.set(key, _pack_body(json_payload, "identity"), CACHE_TTL_SECONDS)
+        if encoded_key == key:
+            return json_payload, "identity"
+
+        body, content_encoding = encode_variant(variant, data=data, json_payload=json_payload)
+        if response_cache is not None:
+            response_cache.set(encoded_key, _pack_body(body, content_encoding), CACHE_TTL_SECONDS)
+        return body, content_encoding
+
+    (body, content_encoding), shared = response_flights.do(encoded_key, build_and_store)
+    if shared:
+        record_cache_hit(SINGLEFLIGHT_NAME)
+    else:
+        record_cache_miss(SINGLEFLIGHT_NAME)
+    return _response(body, variant, content_encoding, "COALESCED" if shared else "MISS")
+
+
+_ENCODING_MARKERS = {"identity": b"i", "gzip": b"g", "br": b"b"}
+_MARKER_ENCODINGS = {marker: coding for coding, marker in _ENCODING_MARKERS.items()}
+
+
+def _pack_body(body: bytes, content_encoding: str) -> bytes:
+    return _ENCODING_MARKERS[content_encoding] + body
+
+
+def _unpack_body(stored: bytes) -> Tuple[str, bytes]:
+    return _MARKER_ENCODINGS[stored[:1]], stored[1:]
+
+
+def _response(body: bytes, variant, content_encoding: str, cache_status: str) -> Response:
+    headers = variant_headers(variant, content_encoding)
+    headers["X-Cache"] = cache_status
+    return Response(content=body, media_type=variant[0], headers=headers)
+
+
+def cached_endpoint(func: Callable) -> Callable:
+    """Cache a read-only endpoint's JSON response and coalesce concurrent identical requests.
+
+    The endpoint must take a ``session`` parameter; a ``request`` parameter is added
+    to its signature for FastAPI if it does not declare one.
+    """
+    signature = inspect.signature(func)
+    wants_request = "request" in signature.parameters
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        request = kwargs["request"] if wants_request else kwargs.pop("request")
+        return cached_response(request, kwargs["session"], lambda: func(*args, **kwargs))
+
+    if not wants_request:
+        request_param = inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+        wrapper.__signature__ = signature.replace(
+            parameters=list(signature.parameters.values()) + [request_param]
+        )
+    return wrapper
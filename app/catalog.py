@@ -0,0 +1,215 @@
+"""Catalog versioning and the precomputed category tree."""
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from sqlalchemy import union
+from sqlmodel import Session, select, func, or_
+
+from .encoding import IDENTITY_JSON, Variant, encode_variant, variant_key
+from .models import (
+    CatalogVersion, SuperCategory, Category, Product, ProductCategoryLink,
+    CategoryTreeResponse, CategoryTreeSuperCategory, CategoryTreeCategory,
+    SubCategoryL3Node, SubCategoryL4Node
+)
+
+
+# Configuration
+CATALOG_VERSION_ID = 1
+CATALOG_VERSION_CHECK_SECONDS = float(os.getenv("CATALOG_VERSION_CHECK_SECONDS", "1"))
+
+# Last catalog version seen by this process: (version, monotonic time of the check)
+_observed_version: Optional[Tuple[int, float]] = None
+
+
+def get_catalog_version(session: Session) -> int:
+    """Get the current catalog version (0 if the catalog was never versioned)."""
+    row = session.get(CatalogVersion, CATALOG_VERSION_ID)
+    return row.version if row else 0
+
+
+def bump_catalog_version(session: Session) -> int:
+    """Increment the catalog version so API workers rebuild derived data."""
+    row = session.get(CatalogVersion, CATALOG_VERSION_ID)
+    if not row:
+        row = CatalogVersion(id=CATALOG_VERSION_ID, version=0)
+    row.version += 1
+    row.updated_at = datetime.utcnow()
+    session.add(row)
+    session.commit()
+    session.refresh(row)
+    return row.version
+
+
+def current_catalog_version(session: Session) -> int:
+    """Catalog version as seen by this worker, re-read at most every CATALOG_VERSION_CHECK_SECONDS."""
+    global _observed_version
+    now = time.monotonic()
+    if _observed_version is None or now - _observed_version[1] >= CATALOG_VERSION_CHECK_SECONDS:
+        _observed_version = (get_catalog_version(session), now)
+    return _observed_version[0]
+
+
+# Category membership: a product is listed in its primary category and in every
+# category it is linked to through ProductCategoryLink.
+
+def in_category(category_id: int):
+    """WHERE clause for products listed in a category."""
+    linked = select(ProductCategoryLink.product_id).where(ProductCategoryLink.category_id == category_id)
+    return or_(Product.category_id == category_id, Product.id.in_(linked))
+
+
+def in_super_category(super_category_id: int):
+    """WHERE clause for products listed in any category of a super category."""
+    linked = (
+        select(ProductCategoryLink.product_id)
+        .join(Category, Category.id == ProductCategoryLink.category_id)
+        .where(Category.super_category_id == super_category_id)
+    )
+    return or_(Product.super_category_id == super_category_id, Product.id.in_(linked))
+
+
+def category_product_counts(session: Session, super_category_id: Optional[int] = None) -> Dict[int, int]:
+    """Distinct products listed in each category, optionally only the categories of one super category."""
+    memberships = union(
+        select(Product.id.label("product_id"), Product.category_id.label("category_id")),
+        select(ProductCategoryLink.product_id, ProductCategoryLink.category_id),
+    ).subquery()
+    statement = (
+        select(memberships.c.category_id, func.count(memberships.c.product_id))
+        .group_by(memberships.c.category_id)
+    )
+    if super_category_id is not None:
+        statement = (
+            statement.join(Category, Category.id == memberships.c.category_id)
+            .where(Category.super_category_id == super_category_id)
+        )
+    return dict(session.exec(statement).all())
+
+
+def super_category_product_counts(session: Session) -> Dict[int, int]:
+    """Distinct products listed in each super category."""
+    memberships = union(
+        select(Product.id.label("product_id"), Product.super_category_id.label("super_category_id")),
+        select(ProductCategoryLink.product_id, Category.super_category_id)
+        .join(Category, Category.id == ProductCategoryLink.category_id),
+    ).subquery()
+    statement = (
+        select(memberships.c.super_category_id, func.count(memberships.c.product_id))
+        .group_by(memberships.c.super_category_id)
+    )
+    return dict(session.exec(statement).all())
+
+
+def build_category_tree(session: Session, catalog_version: int) -> CategoryTreeResponse:
+    """Build the full category hierarchy with product counts in five queries.
+
+    Category and super category counts include products linked through
+    ProductCategoryLink; L3/L4 counts follow each product's primary category.
+    """
+    super_categories = session.exec(select(SuperCategory).order_by(SuperCategory.name)).all()
+    categories = session.exec(select(Category).order_by(Category.name)).all()
+
+    counts_statement = (
+        select(
+            Product.category_id,
+            Product.sub_category_l3,
+            Product.sub_category_l4,
+            func.count(Product.id)
+        )
+        .where(Product.sub_category_l3.is_not(None))
+        .group_by(
+            Product.category_id,
+            Product.sub_category_l3,
+            Product.sub_category_l4
+        )
+    )
+
+    super_category_counts = super_category_product_counts(session)
+    category_counts = category_product_counts(session)
+    l3_counts: Dict[Tuple[int, str], int] = {}
+    l4_counts: Dict[Tuple[int, str], Dict[str, int]] = {}
+    for category_id, l3, l4, count in session.exec(counts_statement).all():
+        l3_counts[(category_id, l3)] = l3_counts.get((category_id, l3), 0) + count
+        if l4 is not None:
+            children = l4_counts.setdefault((category_id, l3), {})
+            children[l4] = children.get(l4, 0) + count
+
+    sub_categories_by_category: Dict[int, list] = {}
+    for (category_id, l3), count in sorted(l3_counts.items(), key=lambda item: item[0][1]):
+        sub_categories_by_category.setdefault(category_id, []).append(SubCategoryL3Node(
+            name=l3,
+            product_count=count,
+            sub_categories=[
+                SubCategoryL4Node(name=l4, product_count=l4_count)
+                for l4, l4_count in sorted(l4_counts.get((category_id, l3), {}).items())
+            ]
+        ))
+
+    categories_by_super_category: Dict[int, list] = {}
+    for category in categories:
+        categories_by_super_category.setdefault(category.super_category_id, []).append(CategoryTreeCategory(
+            id=category.id,
+            name=category.name,
+            image_filename=category.image_filename,
+            product_count=category_counts.get(category.id, 0),
+            age_consent_required=category.age_consent_required,
+            sub_categories=sub_categories_by_category.get(category.id, [])
+        ))
+
+    return CategoryTreeResponse(
+        catalog_version=catalog_version,
+        super_categories=[
+            CategoryTreeSuperCategory(
+                id=super_category.id,
+                name=super_category.name,
+                image_filename=super_category.image_filename,
+                taxonomy_type=super_category.taxonomy_type,
+                product_count=super_category_counts.get(super_category.id, 0),
+                categories=categories_by_super_category.get(super_category.id, [])
+            )
+            for super_category in super_categories
+        ]
+    )
+
+
+class CategoryTreeCache:
+    """In-memory, pre-serialized category tree rebuilt when the catalog version changes."""
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self.payload: bytes = b""
+        self.etag: str = ""
+        self._variants: Dict[Variant, Tuple[bytes, str]] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self, session: Session) -> None:
+        """Rebuild the tree for the current catalog version."""
+        version = get_catalog_version(session)
+        tree = build_category_tree(session, version)
+        with self._lock:
+            self.payload = tree.model_dump_json().encode()
+            self.etag = f'"category-tree-{version}-{len(self.payload)}"'
+            self._variants = {}
+            self.version = version
+
+    def get(self, session: Session) -> Tuple[bytes, str]:
+        """Return (payload, etag), rebuilding if the catalog version moved on."""
+        if self.version is None or current_catalog_version(session) != self.version:
+            self.refresh(session)
+        return self.payload, self.etag
+
+    def get_variant(self, session: Session, variant: Variant) -> Tuple[bytes, str, str]:
+        """Return (body, content_encoding, etag) for a negotiated encoding, encoding it once per version."""
+        payload, etag = self.get(session)
+        if variant == IDENTITY_JSON:
+            return payload, "identity", etag
+        encoded = self._variants.get(variant)
+        if encoded is None:
+            encoded = self._variants[variant] = encode_variant(variant, json_payload=payload)
+        body, content_encoding = encoded
+        return body, content_encoding, f'{etag[:-1]}-{variant_key(variant)}"'
+
+
+category_tree_cache = CategoryTreeCache()
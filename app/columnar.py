@@ -0,0 +1,247 @@
+"""In-memory columnar copy of the catalog for evaluating product search without SQL.
+
+Enabled with SEARCH_BACKEND=columnar. Filters and sorts of `/products/search` run as NumPy
+array operations; only the final page of products is fetched from the database.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy.dtypes import StringDType
+from sqlmodel import Session, select
+
+from .catalog import current_catalog_version
+from .models import Brand, Category, Product, ProductCategoryLink, ProductSearchFilter
+
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "sql")  # sql or columnar
+
+
+def _encode(values: List[Optional[str]]) -> Tuple[np.ndarray, List[str]]:
+    """Dictionary-encode strings: (int32 codes with -1 for NULL, dictionary)."""
+    dictionary: Dict[str, int] = {}
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        if value is None:
+            codes[i] = -1
+        else:
+            codes[i] = dictionary.setdefault(value, len(dictionary))
+    return codes, list(dictionary)
+
+
+def _float_column(values: List[Optional[float]]) -> np.ndarray:
+    return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+
+def _enum_value(value) -> Optional[str]:
+    return value.value if hasattr(value, "value") else value
+
+
+def _matching_codes(dictionary: List[str], needle: str) -> np.ndarray:
+    """Codes of dictionary entries containing `needle` (case-insensitive)."""
+    needle = needle.lower()
+    return np.array([code for code, value in enumerate(dictionary) if needle in value.lower()], dtype=np.int32)
+
+
+class ColumnarCatalog:
+    """Product columns as NumPy arrays; categoricals are dictionary-encoded."""
+
+    def __init__(self, session: Session, catalog_version: int):
+        self.catalog_version = catalog_version
+        statement = (
+            select(
+                Product.id, Product.name, Product.display_name, Product.barcode, Brand.name,
+                Product.super_category_id, Product.category_id,
+                Product.sub_category_l3, Product.sub_category_l4, Product.sub_category_l5,
+                Product.veg_status, Product.processing_level, Product.health_rating,
+                Product.offer_price, Product.store_price, Product.mrp, Product.created_at
+            )
+            .join(Brand, Product.brand_id == Brand.id)
+            .order_by(Product.id)
+        )
+        rows = session.exec(statement).all()
+        columns = list(zip(*rows)) if rows else [()] * 17
+        (ids, names, display_names, barcodes, brand_names, super_category_ids, category_ids,
+         l3, l4, l5, veg_statuses, processing_levels, health_ratings,
+         offer_prices, store_prices, mrps, created_ats) = columns
+
+        self.ids = np.array(ids, dtype=np.int64)
+        self.super_category_id = np.array(super_category_ids, dtype=np.int64)
+        self.category_id = np.array(category_ids, dtype=np.int64)
+        self.health_rating = _float_column(health_ratings)
+        # COALESCE(offer_price, store_price, mrp)
+        offer, store, mrp = _float_column(offer_prices), _float_column(store_prices), _float_column(mrps)
+        self.price = np.where(np.isnan(offer), np.where(np.isnan(store), mrp, store), offer)
+        self.created_at = np.array(
+            [value.timestamp() if value is not None else np.nan for value in created_ats], dtype=np.float64
+        )
+
+        self.brand, self.brand_dictionary = _encode(list(brand_names))
+        self.l3, self.l3_dictionary = _encode(list(l3))
+        self.l4, self.l4_dictionary = _encode(list(l4))
+        self.l5, self.l5_dictionary = _encode(list(l5))
+        self.veg_status, self.veg_status_dictionary = _encode([_enum_value(v) for v in veg_statuses])
+        self.processing_level, self.processing_level_dictionary = _encode(
+            [_enum_value(v) for v in processing_levels]
+        )
+
+        # Lower-cased text for substring search, and a binary-collation rank for sorting by name.
+        # Variable-width StringDType: np.str_ would pad every name to the longest one in UTF-32
+        name_array = np.array(names, dtype=StringDType())
+        self.name_lower = np.strings.lower(name_array)
+        self.display_name_lower = np.strings.lower(np.array(display_names, dtype=StringDType()))
+        # Equal names share a rank, so ties fall through to the id in both sort orders
+        self.name_rank = np.unique(name_array, return_inverse=True)[1].astype(np.int64)
+
+        self.barcode_index: Dict[str, List[int]] = {}
+        for i, barcode in enumerate(barcodes):
+            if barcode is not None:
+                self.barcode_index.setdefault(barcode, []).append(i)
+
+        # Rows of products linked to each category / super category through ProductCategoryLink
+        link_statement = (
+            select(ProductCategoryLink.product_id, ProductCategoryLink.category_id, Category.super_category_id)
+            .join(Category, ProductCategoryLink.category_id == Category.id)
+        )
+        linked_rows_by_category: Dict[int, List[int]] = {}
+        linked_rows_by_super_category: Dict[int, List[int]] = {}
+        for product_id, category_id, super_category_id in session.exec(link_statement).all():
+            row = int(np.searchsorted(self.ids, product_id))
+            if row == len(self.ids) or self.ids[row] != product_id:
+                continue
+            linked_rows_by_category.setdefault(category_id, []).append(row)
+            linked_rows_by_super_category.setdefault(super_category_id, []).append(row)
+        self.linked_category_rows = {
+            key: np.array(rows, dtype=np.int64) for key, rows in linked_rows_by_category.items()
+        }
+        self.linked_super_category_rows = {
+            key: np.array(rows, dtype=np.int64) for key, rows in linked_rows_by_super_category.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _category_mask(self, primary: np.ndarray, linked_rows: Dict[int, np.ndarray], value: int) -> np.ndarray:
+        """Products whose primary (super) category is `value` or that are linked to it."""
+        mask = primary == value
+        if value in linked_rows:
+            mask[linked_rows[value]] = True
+        return mask
+
+    def _categorical_mask(self, codes: np.ndarray, dictionary: List[str], value: str, substring: bool) -> np.ndarray:
+        if substring:
+            return np.isin(codes, _matching_codes(dictionary, value))
+        if value not in dictionary:
+            return np.zeros(len(codes), dtype=bool)
+        return codes == dictionary.index(value)
+
+    def filter_mask(self, filters: ProductSearchFilter) -> np.ndarray:
+        """Boolean mask of products matching every predicate of the search filter."""
+        mask = np.ones(len(self), dtype=bool)
+
+        # Text search - product name, display name or brand name
+        if filters.query:
+            needle = filters.query.lower()
+            mask &= (
+                (np.strings.find(self.name_lower, needle) >= 0)
+                | (np.strings.find(self.display_name_lower, needle) >= 0)
+                | np.isin(self.brand, _matching_codes(self.brand_dictionary, needle))
+            )
+        if filters.brand_name:
+            mask &= self._categorical_mask(self.brand, self.brand_dictionary, filters.brand_name, substring=True)
+        if filters.barcode:
+            barcode_mask = np.zeros(len(self), dtype=bool)
+            barcode_mask[self.barcode_index.get(filters.barcode, [])] = True
+            mask &= barcode_mask
+
+        # Category filters
+        if filters.super_category_id:
+            mask &= self._category_mask(
+                self.super_category_id, self.linked_super_category_rows, filters.super_category_id
+            )
+        if filters.category_id:
+            mask &= self._category_mask(self.category_id, self.linked_category_rows, filters.category_id)
+        if filters.sub_category_l3:
+            mask &= self._categorical_mask(self.l3, self.l3_dictionary, filters.sub_category_l3, substring=True)
+        if filters.sub_category_l4:
+            mask &= self._categorical_mask(self.l4, self.l4_dictionary, filters.sub_category_l4, substring=True)
+        if filters.sub_category_l5:
+            mask &= self._categorical_mask(self.l5, self.l5_dictionary, filters.sub_category_l5, substring=True)
+
+        # Health filters (comparisons with NaN are False, like NULL in SQL)
+        if filters.veg_status:
+            mask &= self._categorical_mask(
+                self.veg_status, self.veg_status_dictionary, _enum_value(filters.veg_status), substring=False
+            )
+        if filters.min_health_rating is not None:
+            mask &= self.health_rating >= filters.min_health_rating
+        if filters.max_health_rating is not None:
+            mask &= self.health_rating <= filters.max_health_rating
+        if filters.processing_level:
+            mask &= self._categorical_mask(
+                self.processing_level, self.processing_level_dictionary,
+                _enum_value(filters.processing_level), substring=False
+            )
+
+        # Price filters
+        if filters.min_price is not None:
+            mask &= self.price >= filters.min_price
+        if filters.max_price is not None:
+            mask &= self.price <= filters.max_price
+        return mask
+
+    def search(self, filters: ProductSearchFilter) -> Tuple[List[int], int]:
+        """Return (product ids of the requested page in order, total matches)."""
+        matches = np.flatnonzero(self.filter_mask(filters))
+        total = len(matches)
+        if total == 0 or filters.offset >= total:
+            return [], total
+
+        sort_columns = {
+            "name": self.name_rank,
+            "price": self.price,
+            "health_rating": self.health_rating,
+            "created_at": self.created_at,
+        }
+        key = sort_columns.get(filters.sort_by, self.name_rank)[matches].astype(np.float64)
+        # SQL sorts NULLs first ascending and last descending
+        key = np.where(np.isnan(key), -np.inf, key)
+        if filters.sort_order == "desc":
+            key = -key
+        # Ties are broken by ascending id, like the SQL backend; lexsort uses the last key as primary
+        order = np.lexsort((self.ids[matches], key))
+        page = matches[order[filters.offset:filters.offset + filters.limit]]
+        return self.ids[page].tolist(), total
+
+
+class ColumnarCatalogCache:
+    """Holds the columnar catalog and reloads it when the catalog version changes."""
+
+    def __init__(self):
+        self.catalog: Optional[ColumnarCatalog] = None
+        self._lock = threading.Lock()
+
+    def get(self, session: Session) -> ColumnarCatalog:
+        """Current columnar catalog; a reload blocks only the request that triggers it."""
+        catalog_version = current_catalog_version(session)
+        catalog = self.catalog
+        if catalog is not None and catalog.catalog_version == catalog_version:
+            return catalog
+        with self._lock:
+            if self.catalog is None or self.catalog.catalog_version != catalog_version:
+                start = time.perf_counter()
+                self.catalog = ColumnarCatalog(session, catalog_version)
+                logger.info(
+                    f"Loaded columnar catalog v{catalog_version} with {len(self.catalog)} products "
+                    f"in {time.perf_counter() - start:.2f}s"
+                )
+            return self.catalog
+
+
+columnar_catalog = ColumnarCatalogCache() if SEARCH_BACKEND == "columnar" else None
@@ -1,22 +1,84 @@
 """Database configuration and session management."""
 import os
-from typing import Annotated
+import time
+from typing import Annotated, Dict
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlmodel import SQLModel, create_engine, Session
-from fastapi import Depends
+from fastapi import Depends, Request, Response
+
+from .metrics import instrument_engine_pool
+from .query_stats import install_query_hooks
+from .snapshot import snapshot_manager
 
 
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", "")  # replica for catalog reads; empty uses DATABASE_URL
+
+# After a write, the same client reads from the primary for this long to see its own writes
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+READ_YOUR_WRITES_COOKIE = "ohara_primary_until"
+
+# Connection pool configuration
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# SQLite performance profile, applied to every new connection
+SQLITE_PRAGMAS: Dict[str, str] = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),  # readers don't block behind the writer
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+    "cache_size": str(-int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))),  # negative = KiB
+    "temp_store": "MEMORY",
+    "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+}
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: Dict[str, str]) -> None:
+    """Run the given PRAGMAs on every connection the engine opens."""
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    event.listen(engine, "connect", set_pragmas)
+
+
+def build_engine(url: str, name: str) -> Engine:
+    """Create an instrumented engine with the pool and SQLite settings above."""
+    is_sqlite = url.startswith("sqlite")
+    # SQLite specific configuration
+    connect_args = {"check_same_thread": False} if is_sqlite else {}
+    # In-memory SQLite uses a single-connection pool that takes no sizing arguments
+    pool_args = {} if ":memory:" in url else {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+
+    new_engine = create_engine(
+        url,
+        connect_args=connect_args,
+        echo=False,  # Set to True for SQL debugging
+        **pool_args
+    )
+    if is_sqlite:
+        apply_sqlite_pragmas(new_engine, SQLITE_PRAGMAS)
+
+    # Per-request query counting and optional slow-query log (SLOW_QUERY_MS)
+    install_query_hooks(new_engine)
+    instrument_engine_pool(new_engine, name)
+    return new_engine
+
 
-# SQLite specific configuration
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+# Primary engine: all writes, auth and anything needing the latest data
+engine = build_engine(DATABASE_URL, "primary")
 
-# Create engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args=connect_args,
-    echo=False  # Set to True for SQL debugging
-)
+# Optional replica engine for catalog reads
+read_engine = build_engine(DATABASE_READ_URL, "replica") if DATABASE_READ_URL else None
 
 
 def create_db_and_tables():
@@ -24,11 +86,55 @@ def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
 
 
+def get_read_engine():
+    """Engine for catalog reads: the current snapshot, else the replica, else the primary."""
+    if snapshot_manager is not None:
+        snapshot_engine = snapshot_manager.get_engine()
+        if snapshot_engine is not None:
+            return snapshot_engine
+    if read_engine is not None:
+        return read_engine
+    return engine
+
+
+def _reads_pinned_to_primary(request: Request) -> bool:
+    if getattr(request.state, "wrote_to_primary", False):
+        return True
+    try:
+        return float(request.cookies.get(READ_YOUR_WRITES_COOKIE, "0")) > time.time()
+    except ValueError:
+        return False
+
+
 def get_session():
     """Get database session dependency."""
     with Session(engine) as session:
         yield session
 
 
-# Session dependency
+def get_write_session(request: Request, response: Response):
+    """Get primary session dependency that pins the client's reads to the primary after a commit."""
+    def mark_write(session):
+        request.state.wrote_to_primary = True
+        primary_until = time.time() + READ_YOUR_WRITES_SECONDS
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE, f"{primary_until:.3f}",
+            max_age=int(READ_YOUR_WRITES_SECONDS) + 1, httponly=True, samesite="lax"
+        )
+
+    with Session(engine) as session:
+        event.listen(session, "after_commit", mark_write)
+        yield session
+
+
+def get_read_session(request: Request):
+    """Get read-only catalog session dependency (primary right after this client wrote)."""
+    read_from = engine if _reads_pinned_to_primary(request) else get_read_engine()
+    with Session(read_from) as session:
+        yield session
+
+
+# Session dependencies
 SessionDep = Annotated[Session, Depends(get_session)]
+WriteSessionDep = Annotated[Session, Depends(get_write_session)]
+ReadSessionDep = Annotated[Session, Depends(get_read_session)]
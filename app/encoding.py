@@ -0,0 +1,110 @@
+"""Response content negotiation: JSON or MessagePack, optionally gzip/brotli compressed."""
+import gzip
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+from fastapi import Request
+
+import brotli
+import msgpack
+
+
+# Configuration
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_ACCEPT_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+VARY = "Accept, Accept-Encoding"
+
+# (media type, content encoding or "identity")
+Variant = Tuple[str, str]
+IDENTITY_JSON: Variant = (JSON_MEDIA_TYPE, "identity")
+
+
+def _quality_values(header: str) -> Dict[str, float]:
+    """Quality value of each entry of an Accept or Accept-Encoding header, keyed by lower-cased name.
+
+    Entries without a q parameter have quality 1; entries with an unparsable one are ignored.
+    """
+    qualities: Dict[str, float] = {}
+    for part in header.split(","):
+        name, *params = (item.strip() for item in part.split(";"))
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = None
+        if quality is not None:
+            name = name.lower()
+            qualities[name] = max(quality, qualities.get(name, 0.0))
+    return qualities
+
+
+def negotiate(request: Request) -> Variant:
+    """Pick the response media type and content encoding from the request headers.
+
+    MessagePack is only sent when the client names it with a non-zero quality at least as high as
+    the one JSON gets (directly or through application/* or */*); JSON is the default.
+    """
+    accept = _quality_values(request.headers.get("accept", ""))
+    msgpack_quality = max(accept.get(media_type, 0.0) for media_type in MSGPACK_ACCEPT_TYPES)
+    json_quality = next(
+        (accept[media_type] for media_type in (JSON_MEDIA_TYPE, "application/*", "*/*") if media_type in accept),
+        0.0
+    )
+    if msgpack_quality > 0 and msgpack_quality >= json_quality:
+        # MessagePack is already compact; compression is only applied to JSON
+        return MSGPACK_MEDIA_TYPE, "identity"
+
+    codings = _quality_values(request.headers.get("accept-encoding", ""))
+    # Highest quality wins; brotli on a tie
+    coding = max(("br", "gzip"), key=lambda name: codings.get(name, 0.0))
+    if codings.get(coding, 0.0) > 0:
+        return JSON_MEDIA_TYPE, coding
+    return IDENTITY_JSON
+
+
+def variant_key(variant: Variant) -> str:
+    """Short suffix identifying a variant in cache keys and ETags."""
+    media_type, coding = variant
+    return f"{'msgpack' if media_type == MSGPACK_MEDIA_TYPE else 'json'}-{coding}"
+
+
+def serialize_json(data: Any) -> bytes:
+    """Serialize JSON-compatible data the same way FastAPI's JSONResponse does."""
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_variant(variant: Variant, data: Any = None, json_payload: Optional[bytes] = None) -> Tuple[bytes, str]:
+    """Encode JSON-compatible data (or an existing JSON payload) into a variant.
+
+    Returns (body, content_encoding); small JSON bodies are left uncompressed.
+    """
+    media_type, coding = variant
+    if media_type == MSGPACK_MEDIA_TYPE:
+        if data is None:
+            data = json.loads(json_payload)
+        return msgpack.packb(data, use_bin_type=True), "identity"
+
+    payload = json_payload if json_payload is not None else serialize_json(data)
+    if coding == "identity" or len(payload) < COMPRESS_MIN_BYTES:
+        return payload, "identity"
+    if coding == "br":
+        return brotli.compress(payload, quality=BROTLI_QUALITY), "br"
+    return gzip.compress(payload, compresslevel=GZIP_LEVEL, mtime=0), "gzip"
+
+
+def variant_headers(variant: Variant, content_encoding: str) -> dict:
+    """Content-Encoding and Vary headers for an encoded body."""
+    headers = {"Vary": VARY}
+    if content_encoding != "identity":
+        headers["Content-Encoding"] = content_encoding
+    return headers
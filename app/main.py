@@ -1,8 +1,14 @@
 """Main FastAPI application."""
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from sqlmodel import Session
 
-from .database import create_db_and_tables
+from .catalog import category_tree_cache
+from .columnar import columnar_catalog
+from .database import create_db_and_tables, get_read_engine
+from .metrics import MetricsMiddleware, render_metrics
+from .query_stats import QUERY_STATS_ENABLED, start_query_stats, stop_query_stats
 from .routers import auth, images, products
 
 
@@ -20,8 +26,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-DB-Queries"],
 )
 
+# Per-route latency, response size and in-flight metrics (see /metrics)
+app.add_middleware(MetricsMiddleware)
+
+
+if QUERY_STATS_ENABLED:
+    @app.middleware("http")
+    async def add_query_stats_headers(request: Request, call_next):
+        """Report the number of SQL queries and DB time spent on each request."""
+        stats, token = start_query_stats()
+        try:
+            response = await call_next(request)
+        finally:
+            stop_query_stats(token)
+        response.headers["X-DB-Queries"] = str(stats.count)
+        response.headers["Server-Timing"] = f'db;dur={stats.duration_ms:.2f};desc="{stats.count} queries"'
+        return response
+
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(products.router)
@@ -30,8 +55,12 @@ app.include_router(images.router)
 
 @app.on_event("startup")
 def on_startup():
-    """Create database tables on startup."""
+    """Create database tables and warm the category tree (and columnar catalog) on startup."""
     create_db_and_tables()
+    with Session(get_read_engine()) as session:
+        category_tree_cache.refresh(session)
+        if columnar_catalog is not None:
+            columnar_catalog.get(session)
 
 
 @app.get("/")
@@ -48,3 +77,9 @@ def read_root():
 def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Prometheus metrics endpoint."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,222 @@
+"""Lightweight Prometheus metrics: request latency, sizes, DB pool and cache stats."""
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy.engine import Engine
+
+from .query_stats import get_query_stats
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with labels."""
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        with self._lock:
+            for labelvalues, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+    metric_type = "gauge"
+
+    def dec(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, *labelvalues: str, value: float) -> None:
+        with self._lock:
+            self._values[labelvalues] = value
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets and labels."""
+
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...],
+                 labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = labelnames
+        # labelvalues -> [bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labelvalues)
+            if series is None:
+                series = self._values[labelvalues] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        bucket_labels = self.labelnames + ("le",)
+        with self._lock:
+            for labelvalues, series in sorted(self._values.items()):
+                cumulative = 0.0
+                for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{self.name}_bucket{_format_labels(bucket_labels, labelvalues + (le,))} {cumulative}")
+                labels = _format_labels(self.labelnames, labelvalues)
+                lines.append(f"{self.name}_sum{labels} {series[-1]}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+# Metric definitions
+http_requests_total = Counter(
+    "ohara_http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")
+)
+http_request_duration_seconds = Histogram(
+    "ohara_http_request_duration_seconds", "HTTP request latency by route.", LATENCY_BUCKETS, ("method", "route")
+)
+http_response_size_bytes = Histogram(
+    "ohara_http_response_size_bytes", "HTTP response body size by route.", SIZE_BUCKETS, ("method", "route")
+)
+http_requests_in_flight = Gauge(
+    "ohara_http_requests_in_flight", "HTTP requests currently being served."
+)
+db_queries_per_request = Histogram(
+    "ohara_db_queries_per_request", "SQL statements issued per request.", QUERY_COUNT_BUCKETS, ("method", "route")
+)
+db_pool_checkout_seconds = Histogram(
+    "ohara_db_pool_checkout_seconds", "Time spent waiting for a pooled DB connection.", POOL_WAIT_BUCKETS, ("engine",)
+)
+db_pool_connections = Gauge(
+    "ohara_db_pool_connections", "Pooled DB connections by state.", ("engine", "state")
+)
+cache_requests_total = Counter(
+    "ohara_cache_requests_total", "Cache lookups by cache and result (hit/miss).", ("cache", "result")
+)
+
+REGISTRY = [
+    http_requests_total,
+    http_request_duration_seconds,
+    http_response_size_bytes,
+    http_requests_in_flight,
+    db_queries_per_request,
+    db_pool_checkout_seconds,
+    db_pool_connections,
+    cache_requests_total,
+]
+
+_instrumented_engines: Dict[str, Engine] = {}
+
+
+def record_cache_hit(cache: str) -> None:
+    """Count a cache hit."""
+    cache_requests_total.inc(cache, "hit")
+
+
+def record_cache_miss(cache: str) -> None:
+    """Count a cache miss."""
+    cache_requests_total.inc(cache, "miss")
+
+
+def instrument_engine_pool(engine: Engine, name: str = "primary") -> None:
+    """Time how long connection checkouts from the engine's pool take."""
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection():
+        start = time.perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            db_pool_checkout_seconds.observe(time.perf_counter() - start, name)
+
+    engine.raw_connection = timed_raw_connection
+    _instrumented_engines[name] = engine
+
+
+def _sample_pool_gauges() -> None:
+    for name, engine in _instrumented_engines.items():
+        pool = engine.pool
+        if hasattr(pool, "checkedout"):
+            db_pool_connections.set(name, "checked_out", value=pool.checkedout())
+            db_pool_connections.set(name, "idle", value=pool.checkedin())
+            db_pool_connections.set(name, "overflow", value=max(pool.overflow(), 0))
+
+
+def render_metrics() -> str:
+    """Render all metrics in the Prometheus text exposition format."""
+    _sample_pool_gauges()
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, response size and in-flight requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = {"code": 500}
+        size = {"bytes": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            elif message["type"] == "http.response.body":
+                size["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            # Label by route template (e.g. /products/{product_id}) to keep cardinality bounded
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+
+            http_request_duration_seconds.observe(time.perf_counter() - start, method, route_path)
+            http_response_size_bytes.observe(size["bytes"], method, route_path)
+            http_requests_total.inc(method, route_path, str(status["code"]))
+
+            stats = get_query_stats()
+            if stats is not None:
+                db_queries_per_request.observe(stats.count, method, route_path)
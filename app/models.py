@@ -125,6 +125,43 @@ class SuperCategoryDetail(SuperCategoryResponse):
     categories: List[CategoryResponse] = []
 
 
+class SubCategoryL4Node(SQLModel):
+    """Leaf of the category tree (sub_category_l4)."""
+    name: str
+    product_count: int
+
+
+class SubCategoryL3Node(SQLModel):
+    """Sub category (sub_category_l3) with its l4 children."""
+    name: str
+    product_count: int
+    sub_categories: List[SubCategoryL4Node] = []
+
+
+class CategoryTreeCategory(CategoryResponse):
+    """Category with its sub category hierarchy."""
+    sub_categories: List[SubCategoryL3Node] = []
+
+
+class CategoryTreeSuperCategory(SuperCategoryResponse):
+    """Super category with its full category hierarchy."""
+    categories: List[CategoryTreeCategory] = []
+
+
+class CategoryTreeResponse(SQLModel):
+    """Full super category -> category -> sub category tree with product counts."""
+    catalog_version: int
+    super_categories: List[CategoryTreeSuperCategory] = []
+
+
+# Catalog version - bumped whenever the catalog data changes (e.g. after migration)
+class CatalogVersion(SQLModel, table=True):
+    """Single-row table holding the current catalog version."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    version: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 # Brand models
 class Brand(TimestampMixin, table=True):
     """Brand table model."""
@@ -244,6 +281,15 @@ class ProductImage(SQLModel, table=True):
     product: "Product" = Relationship(back_populates="images")
 
 
+class ProductCategoryLink(SQLModel, table=True):
+    """Category a product is listed in; besides its primary category, a product can appear in several."""
+    __table_args__ = (UniqueConstraint("product_id", "category_id"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    product_id: int = Field(foreign_key="product.id", index=True)
+    category_id: int = Field(foreign_key="category.id", index=True)
+
+
 # Source mapping table
 class ProductSourceMapping(TimestampMixin, table=True):
     """Track external source mappings for products across platforms."""
@@ -263,6 +309,35 @@ class ProductSourceMapping(TimestampMixin, table=True):
     product: Product = Relationship(back_populates="source_mappings")
 
 
+# Migration manifest - which scraped variation directories have been imported, and in what state
+class MigrationManifest(SQLModel, table=True):
+    """One row per imported variation directory (path relative to swiggy/listings, or v3 products)."""
+    path: str = Field(primary_key=True)
+    layout: str = Field(default="listings", index=True)  # listings (v1) or products (scraper-v3)
+    mtime: float  # newest mtime of data.json / parsed_ai.json
+    size: int  # combined size of data.json / parsed_ai.json
+    content_hash: str  # sha256 of the file contents
+    product_id: Optional[int] = Field(default=None, foreign_key="product.id", index=True)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class MigrationRun(SQLModel, table=True):
+    """One migration run; a resumed run keeps its id and counts another attempt."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    status: str = Field(default="running", index=True)  # running, completed or failed
+    started_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    attempts: int = Field(default=1)
+    stats: Optional[str] = None  # JSON object
+
+
+class MigrationCheckpoint(SQLModel, table=True):
+    """A brand directory whose products a run has committed."""
+    run_id: int = Field(foreign_key="migrationrun.id", primary_key=True)
+    brand_dir: str = Field(primary_key=True)
+    completed_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 # Nutrition models - simple, no timestamps needed
 class NutritionFact(SQLModel, table=True):
     """Nutrition fact table model - from parsed_ai.json -> nutrition_info_table."""
@@ -356,6 +431,8 @@ class ProductDetail(ProductListItem):
     primary_external_variation_id: Optional[str] = None
     super_category: SuperCategoryResponse
     category: CategoryResponse
+    # Every category the product is listed in: the primary one first, then its linked categories
+    categories: List[CategoryResponse] = []
     
     # Extended pricing
     unit_level_price: Optional[str] = None
@@ -441,6 +518,69 @@ class ProductSearchResponse(SQLModel):
     filters_applied: Optional[ProductSearchFilter] = None
 
 
+# Batch lookup models
+class ProductBatchRequest(SQLModel):
+    """Batch product lookup request by ids and/or barcodes."""
+    ids: List[int] = []
+    barcodes: List[str] = []
+
+
+class ProductBatchItem(SQLModel):
+    """Result for one requested id or barcode."""
+    id: Optional[int] = None
+    barcode: Optional[str] = None
+    found: bool
+    product: Optional[ProductDetail] = None
+
+
+class ProductBatchResponse(SQLModel):
+    """Batch product lookup response, in request order (ids first, then barcodes)."""
+    results: List[ProductBatchItem]
+    found: int
+    not_found: int
+
+
+# Cart nutrition models
+class CartItem(SQLModel):
+    """A product in a basket, identified by barcode."""
+    barcode: str
+    quantity: float = Field(default=1, gt=0)
+
+
+class CartNutritionRequest(SQLModel):
+    """Basket to aggregate nutrition for."""
+    items: List[CartItem]
+
+
+class CartNutrientTotal(SQLModel):
+    """Total and per-100g amount of one nutrient in a basket."""
+    nutrient: str
+    unit: str
+    total: Optional[float] = None
+    per_100g: Optional[float] = None
+
+
+class CartItemResult(SQLModel):
+    """How one basket item contributed to the aggregate."""
+    barcode: str
+    quantity: float
+    found: bool
+    product_id: Optional[int] = None
+    display_name: Optional[str] = None
+    pack_weight_grams: Optional[float] = None
+    has_nutrition: bool = False
+
+
+class CartNutritionResponse(SQLModel):
+    """Aggregated nutrition for a basket."""
+    total_weight_grams: float
+    nutrients: List[CartNutrientTotal]
+    allergens: List[str] = []
+    worst_processing_level: Optional[ProcessingLevel] = None
+    health_rating: Optional[float] = None
+    items: List[CartItemResult]
+
+
 class ImageInfo(SQLModel):
     """Image information model."""
     url: str
@@ -0,0 +1,215 @@
+"""Vectorized nutrition aggregation for a basket of products."""
+import json
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .models import ProcessingLevel
+
+
+# Nutrient vocabulary (matches ai_processor's standardized names) and the unit totals are reported in
+NUTRIENT_UNITS: Dict[str, str] = {
+    "energy": "kcal",
+    "protein": "g",
+    "total_carbohydrates": "g",
+    "total_sugars": "g",
+    "added_sugars": "g",
+    "total_fat": "g",
+    "saturated_fat": "g",
+    "trans_fat": "g",
+    "dietary_fiber": "g",
+    "sodium": "mg",
+    "cholesterol": "mg",
+}
+NUTRIENTS = list(NUTRIENT_UNITS)
+NUTRIENT_INDEX = {nutrient: i for i, nutrient in enumerate(NUTRIENTS)}
+
+# Other names found in scraped nutrition tables (lower-cased and snake_cased) -> standardized name
+NUTRIENT_ALIASES: Dict[str, str] = {
+    "calories": "energy",
+    "energy_kcal": "energy",
+    "proteins": "protein",
+    "carbohydrate": "total_carbohydrates",
+    "carbohydrates": "total_carbohydrates",
+    "total_carbohydrate": "total_carbohydrates",
+    "carbs": "total_carbohydrates",
+    "sugar": "total_sugars",
+    "sugars": "total_sugars",
+    "total_sugar": "total_sugars",
+    "added_sugar": "added_sugars",
+    "fat": "total_fat",
+    "fats": "total_fat",
+    "total_fats": "total_fat",
+    "saturated_fats": "saturated_fat",
+    "saturated_fatty_acids": "saturated_fat",
+    "trans_fats": "trans_fat",
+    "trans_fatty_acids": "trans_fat",
+    "fiber": "dietary_fiber",
+    "fibre": "dietary_fiber",
+    "dietary_fibre": "dietary_fiber",
+    "total_dietary_fiber": "dietary_fiber",
+    "total_dietary_fibre": "dietary_fiber",
+}
+
+# Conversion of nutrient value units to grams (mass) or kcal (energy)
+MASS_IN_GRAMS = {"g": 1.0, "mg": 1e-3, "mcg": 1e-6, "µg": 1e-6, "ug": 1e-6}
+ENERGY_IN_KCAL = {"kcal": 1.0, "cal": 1.0, "kj": 1 / 4.184}
+
+# Pack and serving quantities in grams; liquids are approximated at 1 g/ml
+QUANTITY_IN_GRAMS = {"g": 1.0, "gm": 1.0, "gms": 1.0, "kg": 1000.0, "mg": 1e-3, "ml": 1.0, "l": 1000.0, "ltr": 1000.0}
+
+# Processing levels from least to most processed
+PROCESSING_ORDER = list(ProcessingLevel)
+
+
+@dataclass
+class CartProduct:
+    """The product columns the aggregation needs, plus the requested quantity."""
+    product_id: int
+    quantity: float
+    net_quantity_value: Optional[float]
+    net_quantity_unit: Optional[str]
+    nutrition_serving_value: Optional[float]
+    nutrition_serving_unit: Optional[str]
+    health_rating: Optional[int]
+    processing_level: Optional[ProcessingLevel]
+    allergens: Optional[str]
+
+
+@dataclass
+class CartNutrition:
+    """Aggregated nutrition for a basket."""
+    total_weight_grams: float
+    totals: Dict[str, Optional[float]]
+    per_100g: Dict[str, Optional[float]]
+    allergens: List[str]
+    worst_processing_level: Optional[ProcessingLevel]
+    health_rating: Optional[float]
+    pack_grams: Dict[int, Optional[float]]
+    has_nutrition: Dict[int, bool]
+
+
+def to_grams(value: Optional[float], unit: Optional[str]) -> Optional[float]:
+    """Convert a quantity like (1.5, 'kg') to grams; None if unknown."""
+    if not value or not unit:
+        return None
+    factor = QUANTITY_IN_GRAMS.get(unit.strip().lower())
+    return value * factor if factor is not None else None
+
+
+def canonical_nutrient(name: Optional[str]) -> Optional[str]:
+    """Standardized name of a nutrient as stored in nutrition facts; None if it isn't aggregated."""
+    key = re.sub(r"[\s\-]+", "_", (name or "").strip().lower())
+    key = NUTRIENT_ALIASES.get(key, key)
+    return key if key in NUTRIENT_INDEX else None
+
+
+def nutrient_scale(nutrient: str, unit: str) -> Optional[float]:
+    """Factor converting a value in `unit` to the nutrient's reporting unit; None if incompatible."""
+    target = NUTRIENT_UNITS[nutrient]
+    unit = (unit or "").strip().lower()
+    if target == "kcal":
+        return ENERGY_IN_KCAL.get(unit)
+    if unit not in MASS_IN_GRAMS:
+        return None
+    return MASS_IN_GRAMS[unit] / MASS_IN_GRAMS[target]
+
+
+def nutrition_matrix(
+    product_ids: Sequence[int],
+    nutrition_rows: Iterable[Tuple[int, str, float, str]]
+) -> np.ndarray:
+    """Products x nutrients matrix in reporting units per nutrition serving (NaN where missing)."""
+    row_index = {product_id: i for i, product_id in enumerate(product_ids)}
+    matrix = np.full((len(product_ids), len(NUTRIENTS)), np.nan)
+    for product_id, name, value, unit in nutrition_rows:
+        nutrient = canonical_nutrient(name)
+        row = row_index.get(product_id)
+        if nutrient is None or row is None or value is None:
+            continue
+        column = NUTRIENT_INDEX[nutrient]
+        scale = nutrient_scale(nutrient, unit)
+        # A nutrient listed under two names keeps its first value, like parse_nutrition_facts
+        if scale is not None and np.isnan(matrix[row, column]):
+            matrix[row, column] = value * scale
+    return matrix
+
+
+def aggregate_cart(
+    products: List[CartProduct],
+    nutrition_rows: Iterable[Tuple[int, str, float, str]],
+    default_pack_grams: float = 100.0
+) -> CartNutrition:
+    """Aggregate nutrition over the basket.
+
+    Each product's per-serving values are scaled by (pack grams / serving grams) x quantity.
+    Products without a known pack size or nutrition table are left out of the nutrient totals;
+    for the weighted health rating they count as `default_pack_grams` per unit.
+    """
+    product_ids = [product.product_id for product in products]
+    matrix = nutrition_matrix(product_ids, nutrition_rows)
+
+    quantities = np.array([product.quantity for product in products], dtype=float)
+    pack_grams = np.array(
+        [to_grams(p.net_quantity_value, p.net_quantity_unit) or np.nan for p in products], dtype=float
+    )
+    serving_grams = np.array(
+        [to_grams(p.nutrition_serving_value, p.nutrition_serving_unit) or np.nan for p in products], dtype=float
+    )
+
+    has_nutrition = ~np.all(np.isnan(matrix), axis=1)
+    # Grams of each product in the cart whose nutrition can be accounted for
+    grams_in_cart = quantities * pack_grams
+    counted = has_nutrition & ~np.isnan(grams_in_cart) & ~np.isnan(serving_grams)
+    scale = np.where(counted, grams_in_cart / np.where(np.isnan(serving_grams), 1.0, serving_grams), 0.0)
+
+    totals = np.nansum(matrix * scale[:, None], axis=0) if len(products) else np.zeros(len(NUTRIENTS))
+    # Nutrients no counted product reports are unknown rather than zero
+    reported = np.any(~np.isnan(matrix[counted]), axis=0)
+    counted_grams = float(np.sum(grams_in_cart[counted]))
+    per_100g = totals / counted_grams * 100 if counted_grams else None
+
+    # Health rating weighted by grams in the cart
+    ratings = np.array(
+        [p.health_rating if p.health_rating is not None else np.nan for p in products], dtype=float
+    )
+    weights = quantities * np.where(np.isnan(pack_grams), default_pack_grams, pack_grams)
+    rated = ~np.isnan(ratings)
+    health_rating = (
+        round(float(np.average(ratings[rated], weights=weights[rated])), 1)
+        if rated.any() and weights[rated].sum() > 0 else None
+    )
+
+    levels = [p.processing_level for p in products if p.processing_level is not None]
+    worst_processing_level = max(levels, key=PROCESSING_ORDER.index) if levels else None
+
+    allergens = set()
+    for product in products:
+        try:
+            parsed = json.loads(product.allergens) if product.allergens else []
+        except (json.JSONDecodeError, TypeError):
+            parsed = []
+        if isinstance(parsed, list):
+            allergens.update(str(allergen).strip() for allergen in parsed if str(allergen).strip())
+
+    return CartNutrition(
+        total_weight_grams=round(float(np.nansum(grams_in_cart)), 2),
+        totals={
+            nutrient: (round(float(totals[i]), 3) if reported[i] else None)
+            for i, nutrient in enumerate(NUTRIENTS)
+        },
+        per_100g={
+            nutrient: (round(float(per_100g[i]), 3) if per_100g is not None and reported[i] else None)
+            for i, nutrient in enumerate(NUTRIENTS)
+        },
+        allergens=sorted(allergens, key=str.lower),
+        worst_processing_level=worst_processing_level,
+        health_rating=health_rating,
+        pack_grams={
+            product.product_id: (None if np.isnan(pack_grams[i]) else float(pack_grams[i]))
+            for i, product in enumerate(products)
+        },
+        has_nutrition={product.product_id: bool(has_nutrition[i]) for i, product in enumerate(products)},
+    )
@@ -0,0 +1,77 @@
+"""Per-request SQL query accounting and slow-query logging."""
+import logging
+import os
+import time
+from contextvars import ContextVar, Token
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger("app.slow_query")
+
+# Configuration
+QUERY_STATS_ENABLED = os.getenv("QUERY_STATS", "1") == "1"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))  # 0 disables the slow-query log
+SLOW_QUERY_MAX_PARAMS_CHARS = 500
+
+
+class QueryStats:
+    """Query count and accumulated DB time for one request."""
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def start_query_stats() -> tuple[QueryStats, Token]:
+    """Start collecting query stats for the current request context."""
+    stats = QueryStats()
+    return stats, _current_stats.set(stats)
+
+
+def stop_query_stats(token: Token) -> None:
+    """Stop collecting query stats for the current request context."""
+    _current_stats.reset(token)
+
+
+def get_query_stats() -> Optional[QueryStats]:
+    """Get the query stats of the current request, if any."""
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start_time = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_start_time
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        params = repr(parameters)
+        if len(params) > SLOW_QUERY_MAX_PARAMS_CHARS:
+            params = params[:SLOW_QUERY_MAX_PARAMS_CHARS] + "..."
+        logger.warning(
+            f"Slow query ({elapsed * 1000:.1f} ms): {' '.join(statement.split())} | params: {params}"
+        )
+
+
+def install_query_hooks(engine: Engine) -> None:
+    """Attach query accounting hooks to an engine; no-op when both features are off."""
+    if not QUERY_STATS_ENABLED and not SLOW_QUERY_MS:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -4,7 +4,7 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 
-from ..database import SessionDep
+from ..database import SessionDep, WriteSessionDep
 from ..models import Token, UserCreate, UserResponse
 from ..auth import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
@@ -20,7 +20,7 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
 
 
 @router.post("/register", response_model=UserResponse)
-def register_user(user: UserCreate, session: SessionDep):
+def register_user(user: UserCreate, session: WriteSessionDep):
     """Register a new user."""
     db_user = create_user(
         session=session,
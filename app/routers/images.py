@@ -6,13 +6,20 @@ from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Response, Depends
 from fastapi.responses import FileResponse
 
-from ..database import SessionDep
+from ..database import ReadSessionDep
 from ..models import Product, ProductImagesResponse, ImageInfo, ProductImage
 from ..auth import get_current_active_user
 from sqlmodel import select
 
 router = APIRouter(prefix="/images", tags=["images"])
 
+BLOB_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def is_blob_path(image_path: str) -> bool:
+    """Check whether an image path points into a content-addressed blob store."""
+    return "blobs" in Path(image_path).parts
+
 
 @router.get("/{image_path:path}")
 def serve_image(image_path: str):
@@ -47,10 +54,14 @@ def serve_image(image_path: str):
         
         content_type = content_type_map.get(file_extension, 'application/octet-stream')
         
+        # Blobs are named by their content hash, so they never change
+        headers = {"Cache-Control": BLOB_CACHE_CONTROL} if is_blob_path(image_path) else None
+        
         return FileResponse(
             path=resolved_path,
             media_type=content_type,
-            filename=resolved_path.name
+            filename=resolved_path.name,
+            headers=headers
         )
         
     except Exception as e:
@@ -60,7 +71,7 @@ def serve_image(image_path: str):
 @router.get("/product/{product_id}/images", response_model=ProductImagesResponse)
 def get_product_images(
     product_id: int,
-    session: SessionDep,
+    session: ReadSessionDep,
     _: Optional[str] = Depends(get_current_active_user)
 ) -> ProductImagesResponse:
     """Get detailed image information for a product."""
@@ -1,56 +1,409 @@
 """Product routes."""
 import json
-from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Dict, Optional, List, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlmodel import select, and_, or_, func
 from sqlalchemy import desc, asc
 
-from ..database import SessionDep
+from ..database import ReadSessionDep
 from ..models import (
     Product, ProductDetail, ProductListItem, ProductSearchResponse, 
     ProductSearchFilter, Brand, SuperCategory, Category, 
     BrandResponse, SuperCategoryResponse, CategoryResponse, SuperCategoryDetail,
     VegStatus, ProcessingLevel, DataSource, ProductImage,
-    NutritionFact, Ingredient, NutritionFactResponse, IngredientResponse
+    NutritionFact, Ingredient, NutritionFactResponse, IngredientResponse, ProductCategoryLink,
+    CategoryTreeResponse, ProductBatchRequest, ProductBatchItem, ProductBatchResponse,
+    CartNutritionRequest, CartNutritionResponse, CartNutrientTotal, CartItemResult
 )
 from ..auth import get_current_active_user
+from ..catalog import (
+    category_tree_cache, in_category, in_super_category,
+    category_product_counts, super_category_product_counts
+)
+from ..columnar import columnar_catalog
+from ..cache import cached_endpoint
+from ..encoding import negotiate, variant_headers
+from ..nutrition import NUTRIENTS, NUTRIENT_UNITS, CartProduct, aggregate_cart
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+# Maximum ids plus barcodes per batch lookup
+BATCH_MAX_ITEMS = 100
+
+# Maximum distinct barcodes per cart nutrition request
+CART_MAX_ITEMS = 200
+
+# Fields a product list item can be trimmed to with `fields=`
+LIST_ITEM_FIELDS = list(ProductListItem.model_fields)
+
+
+def parse_list_fields(fields: Optional[str]) -> List[str]:
+    """Validate a `fields=` parameter; `id` is always included and all fields are the default."""
+    if not fields:
+        return LIST_ITEM_FIELDS
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(LIST_ITEM_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [field for field in LIST_ITEM_FIELDS if field in requested or field == "id"]
+
+
+def get_primary_images(session, product_ids: List[int]) -> Dict[int, str]:
+    """Primary image per product (falling back to the first image) in a single query."""
+    if not product_ids:
+        return {}
+    statement = (
+        select(ProductImage.product_id, ProductImage.filename)
+        .where(ProductImage.product_id.in_(product_ids))
+        .order_by(ProductImage.product_id, desc(ProductImage.is_primary), ProductImage.order_index)
+    )
+    primary_images: Dict[int, str] = {}
+    for product_id, filename in session.exec(statement).all():
+        primary_images.setdefault(product_id, filename)
+    return primary_images
+
+
+def list_products(
+    session,
+    where_conditions: list,
+    sort_by: str,
+    sort_order: str,
+    limit: int,
+    offset: int,
+    list_fields: List[str]
+) -> Tuple[list, int]:
+    """Count and fetch one page of products, selecting only the columns `list_fields` needs."""
+    # The join is necessary because the where_conditions might reference Brand.name
+    count_query = (
+        select(func.count(Product.id))
+        .select_from(Product)
+        .join(Brand, Product.brand_id == Brand.id)
+    )
+    if where_conditions:
+        count_query = count_query.where(and_(*where_conditions))
+    total = session.exec(count_query).one()
+
+    statement = list_item_statement(list_fields)
+    if where_conditions:
+        statement = statement.where(and_(*where_conditions))
+
+    # Apply sorting
+    sort_field_map = {
+        "name": Product.name,
+        "price": func.coalesce(Product.offer_price, Product.store_price, Product.mrp),
+        "health_rating": Product.health_rating,
+        "created_at": Product.created_at
+    }
+    sort_field = sort_field_map.get(sort_by, Product.name)
+    # NULLs first ascending and last descending on every database, ties by id so pages are stable;
+    # the columnar backend sorts the same way
+    if sort_order == "desc":
+        order = desc(sort_field).nulls_last()
+    else:
+        order = asc(sort_field).nulls_first()
+    statement = statement.order_by(order, Product.id).offset(offset).limit(limit)
+
+    # execute, not exec: exec returns bare values instead of rows when only `id` is selected
+    rows = session.execute(statement).all()
+    return rows_to_list_items(session, rows, list_fields), total
+
+
+def list_item_statement(list_fields: List[str]):
+    """SELECT of only the columns needed for `list_fields`."""
+    columns = [getattr(Product, field) for field in list_fields if field not in ("brand", "primary_image")]
+    if "brand" in list_fields:
+        columns += [Brand.id.label("brand_id"), Brand.name.label("brand_name")]
+    return select(*columns).select_from(Product).join(Brand, Product.brand_id == Brand.id)
+
+
+def rows_to_list_items(session, rows: list, list_fields: List[str]) -> list:
+    """Turn projected rows into ProductListItem models (or dicts for sparse fieldsets)."""
+    primary_images = (
+        get_primary_images(session, [row.id for row in rows]) if "primary_image" in list_fields else {}
+    )
+
+    products = []
+    for row in rows:
+        values = row._mapping
+        item = {}
+        for field in list_fields:
+            if field == "brand":
+                item["brand"] = BrandResponse(id=values["brand_id"], name=values["brand_name"])
+            elif field == "primary_image":
+                item["primary_image"] = primary_images.get(row.id)
+            else:
+                item[field] = values[field]
+        products.append(ProductListItem(**item) if list_fields is LIST_ITEM_FIELDS else item)
+    return products
+
+
+def load_list_items(session, product_ids: List[int], list_fields: List[str]) -> list:
+    """Fetch list items for the given product ids, preserving their order."""
+    if not product_ids:
+        return []
+    rows = session.execute(list_item_statement(list_fields).where(Product.id.in_(product_ids))).all()
+    rows_by_id = {row.id: row for row in rows}
+    return rows_to_list_items(session, [rows_by_id[pid] for pid in product_ids if pid in rows_by_id], list_fields)
+
+
+def safe_json_parse(json_str: Optional[str]) -> List[str]:
+    """Parse a JSON list column, returning [] for empty or malformed values."""
+    if not json_str:
+        return []
+    try:
+        result = json.loads(json_str)
+        return result if isinstance(result, list) else []
+    except (json.JSONDecodeError, TypeError):
+        return []
+
+
+def load_product_details(session, where_clause, limit: Optional[int] = None) -> List[ProductDetail]:
+    """Build ProductDetail for all products matching `where_clause` with one query per table."""
+    # Query products with all relationships
+    statement = (
+        select(Product, Brand, SuperCategory, Category)
+        .join(Brand, Product.brand_id == Brand.id)
+        .join(SuperCategory, Product.super_category_id == SuperCategory.id)
+        .join(Category, Product.category_id == Category.id)
+        .where(where_clause)
+        .order_by(Product.id)
+    )
+    if limit is not None:
+        statement = statement.limit(limit)
+    results = session.exec(statement).all()
+    if not results:
+        return []
+    product_ids = [product.id for product, _, _, _ in results]
+
+    # Get images, nutrition facts and ingredients for all products at once
+    images_by_product: Dict[int, List[ProductImage]] = {}
+    image_statement = (
+        select(ProductImage)
+        .where(ProductImage.product_id.in_(product_ids))
+        .order_by(ProductImage.product_id, ProductImage.order_index)
+    )
+    for image in session.exec(image_statement).all():
+        images_by_product.setdefault(image.product_id, []).append(image)
+
+    nutrition_by_product: Dict[int, List[NutritionFact]] = {}
+    nutrition_statement = (
+        select(NutritionFact)
+        .where(NutritionFact.product_id.in_(product_ids))
+        .order_by(NutritionFact.product_id, NutritionFact.id)
+    )
+    for nutrition_fact in session.exec(nutrition_statement).all():
+        nutrition_by_product.setdefault(nutrition_fact.product_id, []).append(nutrition_fact)
+
+    ingredients_by_product: Dict[int, List[Ingredient]] = {}
+    ingredient_statement = (
+        select(Ingredient)
+        .where(Ingredient.product_id.in_(product_ids))
+        .order_by(Ingredient.product_id, Ingredient.order_index)
+    )
+    for ingredient in session.exec(ingredient_statement).all():
+        ingredients_by_product.setdefault(ingredient.product_id, []).append(ingredient)
+
+    linked_categories_by_product: Dict[int, List[Category]] = {}
+    linked_category_statement = (
+        select(ProductCategoryLink.product_id, Category)
+        .join(Category, ProductCategoryLink.category_id == Category.id)
+        .where(ProductCategoryLink.product_id.in_(product_ids))
+        .order_by(ProductCategoryLink.product_id, Category.name)
+    )
+    for product_id, linked_category in session.exec(linked_category_statement).all():
+        linked_categories_by_product.setdefault(product_id, []).append(linked_category)
+
+    return [
+        build_product_detail(
+            product, brand, super_category, category,
+            images_by_product.get(product.id, []),
+            nutrition_by_product.get(product.id, []),
+            ingredients_by_product.get(product.id, []),
+            linked_categories_by_product.get(product.id, [])
+        )
+        for product, brand, super_category, category in results
+    ]
+
+
+def build_product_detail(
+    product: Product,
+    brand: Brand,
+    super_category: SuperCategory,
+    category: Category,
+    images: List[ProductImage],
+    nutrition_facts: List[NutritionFact],
+    ingredients: List[Ingredient],
+    linked_categories: List[Category] = ()
+) -> ProductDetail:
+    """Convert a product and its related rows to the ProductDetail response model."""
+    image_filenames = [img.filename for img in images]
+    primary_image = None
+    for img in images:
+        if img.is_primary:
+            primary_image = img.filename
+            break
+    if not primary_image and image_filenames:
+        primary_image = image_filenames[0]
+    
+    # Convert to response models
+    brand_response = BrandResponse(id=brand.id, name=brand.name)
+    super_category_response = SuperCategoryResponse(
+        id=super_category.id, 
+        name=super_category.name,
+        image_filename=super_category.image_filename,
+        taxonomy_type=super_category.taxonomy_type
+    )
+    category_responses = [
+        CategoryResponse(
+            id=listed_category.id,
+            name=listed_category.name,
+            image_filename=listed_category.image_filename,
+            product_count=listed_category.product_count,
+            age_consent_required=listed_category.age_consent_required
+        )
+        for listed_category in [category, *(c for c in linked_categories if c.id != category.id)]
+    ]
+    
+    nutrition_responses = [
+        NutritionFactResponse(
+            id=nf.id,
+            nutrient=nf.nutrient,
+            value=nf.value,
+            unit=nf.unit,
+            rda_percentage=nf.rda_percentage
+        )
+        for nf in nutrition_facts
+    ]
+    
+    ingredient_responses = [
+        IngredientResponse(
+            id=ing.id,
+            name=ing.name,
+            percentage=ing.percentage,
+            ins_numbers=safe_json_parse(ing.ins_numbers),
+            additives=safe_json_parse(ing.additives),
+            is_alarming=ing.is_alarming,
+            alarming_reason=ing.alarming_reason
+        )
+        for ing in ingredients
+    ]
+    
+    return ProductDetail(
+        id=product.id,
+        name=product.name,
+        display_name=product.display_name,
+        brand=brand_response,
+        primary_source=product.primary_source,
+        primary_external_id=product.primary_external_id,
+        primary_external_variation_id=product.primary_external_variation_id,
+        super_category=super_category_response,
+        category=category_responses[0],
+        categories=category_responses,
+        sub_category_l3=product.sub_category_l3,
+        sub_category_l4=product.sub_category_l4,
+        sub_category_l5=product.sub_category_l5,
+        veg_status=product.veg_status,
+        health_rating=product.health_rating,
+        processing_level=product.processing_level,
+        mrp=product.mrp,
+        store_price=product.store_price,
+        offer_price=product.offer_price,
+        discount_value=product.discount_value,
+        unit_level_price=product.unit_level_price,
+        quantity=product.quantity,
+        weight_in_grams=product.weight_in_grams,
+        unit_of_measure=product.unit_of_measure,
+        volumetric_weight=product.volumetric_weight,
+        sku_quantity_with_combo=product.sku_quantity_with_combo,
+        primary_image=primary_image,
+        images=image_filenames,
+        barcode=product.barcode,
+        country_of_origin=product.country_of_origin,
+        net_quantity_value=product.net_quantity_value,
+        net_quantity_unit=product.net_quantity_unit,
+        nutrition_serving_value=product.nutrition_serving_value,
+        nutrition_serving_unit=product.nutrition_serving_unit,
+        approx_serves_per_pack=product.approx_serves_per_pack,
+        ingredients_string=product.ingredients_string,
+        storage_instructions=product.storage_instructions,
+        cooking_instructions=product.cooking_instructions,
+        ingredients=ingredient_responses,
+        nutrition_facts=nutrition_responses,
+        allergens=safe_json_parse(product.allergens),
+        certifications=safe_json_parse(product.certifications),
+        positive_health_aspects=safe_json_parse(product.positive_health_aspects),
+        negative_health_aspects=safe_json_parse(product.negative_health_aspects),
+        tags=[],  # You can add tags logic here if needed
+        created_at=product.created_at,
+        updated_at=product.updated_at
+    )
+
+
+def product_search_response(
+    products: list,
+    total: int,
+    limit: int,
+    offset: int,
+    filters_applied: ProductSearchFilter
+) -> ProductSearchResponse:
+    """Wrap a page of products; sparse (dict) items are passed through without ProductListItem validation."""
+    response = ProductSearchResponse(
+        products=[], total=total, limit=limit, offset=offset, filters_applied=filters_applied
+    )
+    if products and isinstance(products[0], dict):
+        return {**response.model_dump(), "products": products}
+    response.products = products
+    return response
+
+
+@router.get("/category-tree", response_model=CategoryTreeResponse)
+def get_category_tree(
+    request: Request,
+    session: ReadSessionDep,
+    _: str = Depends(get_current_active_user)
+) -> Response:
+    """Get the full super category -> category -> sub category tree with product counts.
+    
+    Served from a pre-serialized in-memory copy that is rebuilt when the catalog version changes.
+    """
+    variant = negotiate(request)
+    body, content_encoding, etag = category_tree_cache.get_variant(session, variant)
+    headers = variant_headers(variant, content_encoding)
+    headers["ETag"] = etag
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=variant[0], headers=headers)
+
 
 @router.get("/super-categories", response_model=List[SuperCategoryResponse])
+@cached_endpoint
 def get_super_categories(
-    session: SessionDep,
+    session: ReadSessionDep,
     _: str = Depends(get_current_active_user)
 ) -> List[SuperCategoryResponse]:
     """Get all super categories with product counts for homepage display."""
-    # Query super categories with product counts
-    statement = (
-        select(SuperCategory, func.count(Product.id).label("product_count"))
-        .outerjoin(Product, SuperCategory.id == Product.super_category_id)
-        .group_by(SuperCategory.id)
-        .order_by(SuperCategory.name)
-    )
-    
-    results = session.exec(statement).all()
+    # Product counts include products linked to the super category's categories
+    product_counts = super_category_product_counts(session)
+    results = session.exec(select(SuperCategory).order_by(SuperCategory.name)).all()
     
     super_categories = []
-    for super_category, product_count in results:
+    for super_category in results:
         super_categories.append(SuperCategoryResponse(
             id=super_category.id,
             name=super_category.name,
             image_filename=super_category.image_filename,
             taxonomy_type=super_category.taxonomy_type,
-            product_count=product_count
+            product_count=product_counts.get(super_category.id, 0)
         ))
     
     return super_categories
 
 
 @router.get("/super-categories/{super_category_id}", response_model=SuperCategoryDetail)
+@cached_endpoint
 def get_super_category_with_categories(
     super_category_id: int,
-    session: SessionDep,
+    session: ReadSessionDep,
     _: str = Depends(get_current_active_user)
 ) -> SuperCategoryDetail:
     """Get super category details with all its categories for sidebar display."""
@@ -62,28 +415,27 @@ def get_super_category_with_categories(
     # Get super category product count
     super_category_count_statement = (
         select(func.count(Product.id))
-        .where(Product.super_category_id == super_category_id)
+        .where(in_super_category(super_category_id))
     )
     super_category_product_count = session.exec(super_category_count_statement).one()
     
-    # Get categories with product counts
+    # Get categories with product counts, including linked products
     categories_statement = (
-        select(Category, func.count(Product.id).label("product_count"))
-        .outerjoin(Product, Category.id == Product.category_id)
+        select(Category)
         .where(Category.super_category_id == super_category_id)
-        .group_by(Category.id)
         .order_by(Category.name)
     )
     
     category_results = session.exec(categories_statement).all()
+    product_counts = category_product_counts(session, super_category_id)
     
     categories = []
-    for category, product_count in category_results:
+    for category in category_results:
         categories.append(CategoryResponse(
             id=category.id,
             name=category.name,
             image_filename=category.image_filename,
-            product_count=product_count,
+            product_count=product_counts.get(category.id, 0),
             age_consent_required=category.age_consent_required
         ))
     
@@ -98,9 +450,10 @@ def get_super_category_with_categories(
 
 
 @router.get("/super-categories/{super_category_id}/products", response_model=ProductSearchResponse)
+@cached_endpoint
 def get_super_category_products(
     super_category_id: int,
-    session: SessionDep,
+    session: ReadSessionDep,
     _: str = Depends(get_current_active_user),
     # Optional category filter
     category_id: Optional[int] = Query(None, description="Filter by specific category within super category"),
@@ -117,9 +470,14 @@ def get_super_category_products(
     sort_by: str = Query("name", description="Sort by field", regex="^(name|price|health_rating|created_at)$"),
     sort_order: str = Query("asc", description="Sort order", regex="^(asc|desc)$"),
     limit: int = Query(20, description="Number of products to return", le=100, ge=1),
-    offset: int = Query(0, description="Number of products to skip", ge=0)
+    offset: int = Query(0, description="Number of products to skip", ge=0),
+    # Sparse fieldset
+    fields: Optional[str] = Query(
+        None, description="Comma-separated product fields to return, e.g. id,display_name,offer_price,primary_image"
+    )
 ) -> ProductSearchResponse:
     """Get products from a specific super category with optional category filtering."""
+    list_fields = parse_list_fields(fields)
     
     # Verify super category exists
     super_category = session.get(SuperCategory, super_category_id)
@@ -132,36 +490,27 @@ def get_super_category_products(
         if not category or category.super_category_id != super_category_id:
             raise HTTPException(status_code=404, detail="Category not found in this super category")
     
-    # Build the base query with joins
-    base_query = (
-        select(Product, Brand, SuperCategory, Category)
-        .join(Brand, Product.brand_id == Brand.id)
-        .join(SuperCategory, Product.super_category_id == SuperCategory.id)
-        .join(Category, Product.category_id == Category.id)
-        .where(Product.super_category_id == super_category_id)
-    )
-    
     # Build WHERE conditions
-    where_conditions = [Product.super_category_id == super_category_id]
+    where_conditions = [in_super_category(super_category_id)]
     
     # Category filter
     if category_id:
-        where_conditions.append(Product.category_id == category_id)
+        where_conditions.append(in_category(category_id))
     
     # Text search - search in product name, display name, and brand name
     if query:
-        search_term = f"%{query}%"
+        # autoescape: % and _ in the query match literally, like the columnar backend
         where_conditions.append(
             or_(
-                Product.name.ilike(search_term),
-                Product.display_name.ilike(search_term),
-                Brand.name.ilike(search_term)
+                Product.name.icontains(query, autoescape=True),
+                Product.display_name.icontains(query, autoescape=True),
+                Brand.name.icontains(query, autoescape=True)
             )
         )
     
     # Brand filter
     if brand_name:
-        where_conditions.append(Brand.name.ilike(f"%{brand_name}%"))
+        where_conditions.append(Brand.name.icontains(brand_name, autoescape=True))
     
     # Health filters
     if veg_status:
@@ -184,82 +533,7 @@ def get_super_category_products(
         if max_price is not None:
             where_conditions.append(price_field <= max_price)
     
-    # Apply WHERE conditions
-    if where_conditions:
-        base_query = base_query.where(and_(*where_conditions))
-    
-    # Get total count
-    count_query = select(func.count(Product.id))
-    if where_conditions:
-        # The join is necessary because the where_conditions might reference Brand.name
-        count_query = (
-            select(func.count(Product.id))
-            .select_from(Product)
-            .join(Brand, Product.brand_id == Brand.id)
-            .where(and_(*where_conditions))
-        )
-    
-    total = session.exec(count_query).one()
-    
-    # Apply sorting
-    sort_field_map = {
-        "name": Product.name,
-        "price": func.coalesce(Product.offer_price, Product.store_price, Product.mrp),
-        "health_rating": Product.health_rating,
-        "created_at": Product.created_at
-    }
-    
-    sort_field = sort_field_map.get(sort_by, Product.name)
-    order_func = desc if sort_order == "desc" else asc
-    base_query = base_query.order_by(order_func(sort_field))
-    
-    # Apply pagination
-    base_query = base_query.offset(offset).limit(limit)
-    
-    # Execute query
-    results = session.exec(base_query).all()
-    
-    # Convert to response models
-    products = []
-    for product, brand, super_category, category in results:
-        # Get primary image
-        image_statement = select(ProductImage).where(
-            and_(ProductImage.product_id == product.id, ProductImage.is_primary == True)
-        )
-        primary_image_result = session.exec(image_statement).first()
-        primary_image = primary_image_result.filename if primary_image_result else None
-        
-        # If no primary image, get the first image
-        if not primary_image:
-            first_image_statement = select(ProductImage).where(
-                ProductImage.product_id == product.id
-            ).order_by(ProductImage.order_index).limit(1)
-            first_image_result = session.exec(first_image_statement).first()
-            primary_image = first_image_result.filename if first_image_result else None
-        
-        brand_response = BrandResponse(id=brand.id, name=brand.name)
-        
-        product_item = ProductListItem(
-            id=product.id,
-            name=product.name,
-            display_name=product.display_name,
-            brand=brand_response,
-            veg_status=product.veg_status,
-            health_rating=product.health_rating,
-            processing_level=product.processing_level,
-            mrp=product.mrp,
-            store_price=product.store_price,
-            offer_price=product.offer_price,
-            discount_value=product.discount_value,
-            quantity=product.quantity,
-            weight_in_grams=product.weight_in_grams,
-            unit_of_measure=product.unit_of_measure,
-            sub_category_l3=product.sub_category_l3,
-            sub_category_l4=product.sub_category_l4,
-            sub_category_l5=product.sub_category_l5,
-            primary_image=primary_image
-        )
-        products.append(product_item)
+    products, total = list_products(session, where_conditions, sort_by, sort_order, limit, offset, list_fields)
     
     # Create filter object for response
     filters_applied = ProductSearchFilter(
@@ -279,160 +553,27 @@ def get_super_category_products(
         offset=offset
     )
     
-    return ProductSearchResponse(
-        products=products,
-        total=total,
-        limit=limit,
-        offset=offset,
-        filters_applied=filters_applied
-    )
+    return product_search_response(products, total, limit, offset, filters_applied)
 
 
 @router.get("/barcode/{barcode}", response_model=ProductDetail)
+@cached_endpoint
 def get_product_by_barcode(
     barcode: str,
-    session: SessionDep,
+    session: ReadSessionDep,
     _: str = Depends(get_current_active_user)
 ) -> ProductDetail:
     """Get product by barcode scan."""
-    # Query product with all relationships
-    statement = (
-        select(Product, Brand, SuperCategory, Category)
-        .join(Brand, Product.brand_id == Brand.id)
-        .join(SuperCategory, Product.super_category_id == SuperCategory.id)
-        .join(Category, Product.category_id == Category.id)
-        .where(Product.barcode == barcode)
-    )
-    
-    result = session.exec(statement).first()
-    if not result:
+    products = load_product_details(session, Product.barcode == barcode, limit=1)
+    if not products:
         raise HTTPException(status_code=404, detail="Product not found")
-    
-    product, brand, super_category, category = result
-    
-    # Get images
-    image_statement = select(ProductImage).where(ProductImage.product_id == product.id).order_by(ProductImage.order_index)
-    images = session.exec(image_statement).all()
-    image_filenames = [img.filename for img in images]
-    primary_image = None
-    for img in images:
-        if img.is_primary:
-            primary_image = img.filename
-            break
-    if not primary_image and image_filenames:
-        primary_image = image_filenames[0]
-    
-    # Get nutrition facts
-    nutrition_statement = select(NutritionFact).where(NutritionFact.product_id == product.id)
-    nutrition_facts = session.exec(nutrition_statement).all()
-    
-    # Get ingredients
-    ingredient_statement = select(Ingredient).where(Ingredient.product_id == product.id).order_by(Ingredient.order_index)
-    ingredients = session.exec(ingredient_statement).all()
-    
-    # Parse JSON fields safely
-    def safe_json_parse(json_str: Optional[str]) -> List[str]:
-        if not json_str:
-            return []
-        try:
-            result = json.loads(json_str)
-            return result if isinstance(result, list) else []
-        except (json.JSONDecodeError, TypeError):
-            return []
-    
-    # Convert to response models
-    brand_response = BrandResponse(id=brand.id, name=brand.name)
-    super_category_response = SuperCategoryResponse(
-        id=super_category.id, 
-        name=super_category.name,
-        image_filename=super_category.image_filename,
-        taxonomy_type=super_category.taxonomy_type
-    )
-    category_response = CategoryResponse(
-        id=category.id,
-        name=category.name,
-        image_filename=category.image_filename,
-        product_count=category.product_count,
-        age_consent_required=category.age_consent_required
-    )
-    
-    nutrition_responses = [
-        NutritionFactResponse(
-            id=nf.id,
-            nutrient=nf.nutrient,
-            value=nf.value,
-            unit=nf.unit,
-            rda_percentage=nf.rda_percentage
-        )
-        for nf in nutrition_facts
-    ]
-    
-    ingredient_responses = [
-        IngredientResponse(
-            id=ing.id,
-            name=ing.name,
-            percentage=ing.percentage,
-            ins_numbers=safe_json_parse(ing.ins_numbers),
-            additives=safe_json_parse(ing.additives),
-            is_alarming=ing.is_alarming,
-            alarming_reason=ing.alarming_reason
-        )
-        for ing in ingredients
-    ]
-    
-    return ProductDetail(
-        id=product.id,
-        name=product.name,
-        display_name=product.display_name,
-        brand=brand_response,
-        primary_source=product.primary_source,
-        primary_external_id=product.primary_external_id,
-        primary_external_variation_id=product.primary_external_variation_id,
-        super_category=super_category_response,
-        category=category_response,
-        sub_category_l3=product.sub_category_l3,
-        sub_category_l4=product.sub_category_l4,
-        sub_category_l5=product.sub_category_l5,
-        veg_status=product.veg_status,
-        health_rating=product.health_rating,
-        processing_level=product.processing_level,
-        mrp=product.mrp,
-        store_price=product.store_price,
-        offer_price=product.offer_price,
-        discount_value=product.discount_value,
-        unit_level_price=product.unit_level_price,
-        quantity=product.quantity,
-        weight_in_grams=product.weight_in_grams,
-        unit_of_measure=product.unit_of_measure,
-        volumetric_weight=product.volumetric_weight,
-        sku_quantity_with_combo=product.sku_quantity_with_combo,
-        primary_image=primary_image,
-        images=image_filenames,
-        barcode=product.barcode,
-        country_of_origin=product.country_of_origin,
-        net_quantity_value=product.net_quantity_value,
-        net_quantity_unit=product.net_quantity_unit,
-        nutrition_serving_value=product.nutrition_serving_value,
-        nutrition_serving_unit=product.nutrition_serving_unit,
-        approx_serves_per_pack=product.approx_serves_per_pack,
-        ingredients_string=product.ingredients_string,
-        storage_instructions=product.storage_instructions,
-        cooking_instructions=product.cooking_instructions,
-        ingredients=ingredient_responses,
-        nutrition_facts=nutrition_responses,
-        allergens=safe_json_parse(product.allergens),
-        certifications=safe_json_parse(product.certifications),
-        positive_health_aspects=safe_json_parse(product.positive_health_aspects),
-        negative_health_aspects=safe_json_parse(product.negative_health_aspects),
-        tags=[],  # You can add tags logic here if needed
-        created_at=product.created_at,
-        updated_at=product.updated_at
-    )
+    return products[0]
 
 
 @router.get("/search", response_model=ProductSearchResponse)
+@cached_endpoint
 def search_products(
-    session: SessionDep,
+    session: ReadSessionDep,
     _: str = Depends(get_current_active_user),
     # Search parameters
     query: Optional[str] = Query(None, description="Search query for product name"),
@@ -453,35 +594,60 @@ def search_products(
     sort_by: str = Query("name", description="Sort by field", regex="^(name|price|health_rating|created_at)$"),
     sort_order: str = Query("asc", description="Sort order", regex="^(asc|desc)$"),
     limit: int = Query(20, description="Number of products to return", le=100, ge=1),
-    offset: int = Query(0, description="Number of products to skip", ge=0)
+    offset: int = Query(0, description="Number of products to skip", ge=0),
+    # Sparse fieldset
+    fields: Optional[str] = Query(
+        None, description="Comma-separated product fields to return, e.g. id,display_name,offer_price,primary_image"
+    )
 ) -> ProductSearchResponse:
     """Search products with filters, sorting, and pagination."""
+    list_fields = parse_list_fields(fields)
     
-    # Build the base query with joins
-    base_query = (
-        select(Product, Brand, SuperCategory, Category)
-        .join(Brand, Product.brand_id == Brand.id)
-        .join(SuperCategory, Product.super_category_id == SuperCategory.id)
-        .join(Category, Product.category_id == Category.id)
+    # Create filter object for response
+    filters_applied = ProductSearchFilter(
+        query=query,
+        brand_name=brand_name,
+        barcode=barcode,
+        super_category_id=super_category_id,
+        category_id=category_id,
+        sub_category_l3=sub_category_l3,
+        sub_category_l4=sub_category_l4,
+        sub_category_l5=sub_category_l5,
+        veg_status=veg_status,
+        min_health_rating=min_health_rating,
+        max_health_rating=max_health_rating,
+        processing_level=processing_level,
+        min_price=min_price,
+        max_price=max_price,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        limit=limit,
+        offset=offset
     )
     
+    # Columnar backend: evaluate filters and sorting in memory, load only the page from the DB
+    if columnar_catalog is not None:
+        product_ids, total = columnar_catalog.get(session).search(filters_applied)
+        products = load_list_items(session, product_ids, list_fields)
+        return product_search_response(products, total, limit, offset, filters_applied)
+    
     # Build WHERE conditions
     where_conditions = []
     
     # Text search - search in product name, display name, and brand name
     if query:
-        search_term = f"%{query}%"
+        # autoescape: % and _ in the query match literally, like the columnar backend
         where_conditions.append(
             or_(
-                Product.name.ilike(search_term),
-                Product.display_name.ilike(search_term),
-                Brand.name.ilike(search_term)
+                Product.name.icontains(query, autoescape=True),
+                Product.display_name.icontains(query, autoescape=True),
+                Brand.name.icontains(query, autoescape=True)
             )
         )
     
     # Brand filter
     if brand_name:
-        where_conditions.append(Brand.name.ilike(f"%{brand_name}%"))
+        where_conditions.append(Brand.name.icontains(brand_name, autoescape=True))
     
     # Barcode search
     if barcode:
@@ -489,19 +655,19 @@ def search_products(
     
     # Category filters
     if super_category_id:
-        where_conditions.append(Product.super_category_id == super_category_id)
+        where_conditions.append(in_super_category(super_category_id))
     
     if category_id:
-        where_conditions.append(Product.category_id == category_id)
+        where_conditions.append(in_category(category_id))
     
     if sub_category_l3:
-        where_conditions.append(Product.sub_category_l3.ilike(f"%{sub_category_l3}%"))
+        where_conditions.append(Product.sub_category_l3.icontains(sub_category_l3, autoescape=True))
     
     if sub_category_l4:
-        where_conditions.append(Product.sub_category_l4.ilike(f"%{sub_category_l4}%"))
+        where_conditions.append(Product.sub_category_l4.icontains(sub_category_l4, autoescape=True))
     
     if sub_category_l5:
-        where_conditions.append(Product.sub_category_l5.ilike(f"%{sub_category_l5}%"))
+        where_conditions.append(Product.sub_category_l5.icontains(sub_category_l5, autoescape=True))
     
     # Health filters
     if veg_status:
@@ -524,251 +690,142 @@ def search_products(
         if max_price is not None:
             where_conditions.append(price_field <= max_price)
     
-    # Apply WHERE conditions
-    if where_conditions:
-        base_query = base_query.where(and_(*where_conditions))
-    
-    # Get total count
-    count_query = select(func.count(Product.id))
-    if where_conditions:
-        # The join is necessary because the where_conditions might reference Brand.name
-        count_query = (
-            select(func.count(Product.id))
-            .select_from(Product)
-            .join(Brand, Product.brand_id == Brand.id)
-            .where(and_(*where_conditions))
-        )
-    
-    total = session.exec(count_query).one()
+    products, total = list_products(session, where_conditions, sort_by, sort_order, limit, offset, list_fields)
     
-    # Apply sorting
-    sort_field_map = {
-        "name": Product.name,
-        "price": func.coalesce(Product.offer_price, Product.store_price, Product.mrp),
-        "health_rating": Product.health_rating,
-        "created_at": Product.created_at
-    }
-    
-    sort_field = sort_field_map.get(sort_by, Product.name)
-    order_func = desc if sort_order == "desc" else asc
-    base_query = base_query.order_by(order_func(sort_field))
-    
-    # Apply pagination
-    base_query = base_query.offset(offset).limit(limit)
-    
-    # Execute query
-    results = session.exec(base_query).all()
-    
-    # Convert to response models
-    products = []
-    for product, brand, super_category, category in results:
-        # Get primary image
-        image_statement = select(ProductImage).where(
-            and_(ProductImage.product_id == product.id, ProductImage.is_primary == True)
-        )
-        primary_image_result = session.exec(image_statement).first()
-        primary_image = primary_image_result.filename if primary_image_result else None
-        
-        # If no primary image, get the first image
-        if not primary_image:
-            first_image_statement = select(ProductImage).where(
-                ProductImage.product_id == product.id
-            ).order_by(ProductImage.order_index).limit(1)
-            first_image_result = session.exec(first_image_statement).first()
-            primary_image = first_image_result.filename if first_image_result else None
-        
-        brand_response = BrandResponse(id=brand.id, name=brand.name)
-        
-        product_item = ProductListItem(
-            id=product.id,
-            name=product.name,
-            display_name=product.display_name,
-            brand=brand_response,
-            veg_status=product.veg_status,
-            health_rating=product.health_rating,
-            processing_level=product.processing_level,
-            mrp=product.mrp,
-            store_price=product.store_price,
-            offer_price=product.offer_price,
-            discount_value=product.discount_value,
-            quantity=product.quantity,
-            weight_in_grams=product.weight_in_grams,
-            unit_of_measure=product.unit_of_measure,
-            sub_category_l3=product.sub_category_l3,
-            sub_category_l4=product.sub_category_l4,
-            sub_category_l5=product.sub_category_l5,
-            primary_image=primary_image
+    return product_search_response(products, total, limit, offset, filters_applied)
+
+
+@router.post("/batch", response_model=ProductBatchResponse)
+def get_products_batch(
+    batch: ProductBatchRequest,
+    session: ReadSessionDep,
+    _: str = Depends(get_current_active_user)
+) -> ProductBatchResponse:
+    """Get details for many products by ids and/or barcodes in one request."""
+    if len(batch.ids) + len(batch.barcodes) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_ITEMS} ids and barcodes per request")
+
+    conditions = []
+    if batch.ids:
+        conditions.append(Product.id.in_(set(batch.ids)))
+    if batch.barcodes:
+        conditions.append(Product.barcode.in_(set(batch.barcodes)))
+    products = load_product_details(session, or_(*conditions)) if conditions else []
+
+    by_id = {product.id: product for product in products}
+    by_barcode: Dict[str, ProductDetail] = {}
+    for product in products:
+        if product.barcode is not None:
+            by_barcode.setdefault(product.barcode, product)
+
+    results = [
+        ProductBatchItem(id=product_id, found=product_id in by_id, product=by_id.get(product_id))
+        for product_id in batch.ids
+    ] + [
+        ProductBatchItem(barcode=barcode, found=barcode in by_barcode, product=by_barcode.get(barcode))
+        for barcode in batch.barcodes
+    ]
+    found = sum(1 for item in results if item.found)
+    return ProductBatchResponse(results=results, found=found, not_found=len(results) - found)
+
+
+@router.post("/cart/nutrition", response_model=CartNutritionResponse)
+def get_cart_nutrition(
+    cart: CartNutritionRequest,
+    session: ReadSessionDep,
+    _: str = Depends(get_current_active_user)
+) -> CartNutritionResponse:
+    """Aggregate nutrition, allergens, processing level and health rating over a basket of barcodes."""
+    quantities: Dict[str, float] = {}
+    for item in cart.items:
+        quantities[item.barcode] = quantities.get(item.barcode, 0) + item.quantity
+    if len(quantities) > CART_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {CART_MAX_ITEMS} distinct barcodes per cart")
+
+    product_statement = (
+        select(
+            Product.id, Product.barcode, Product.display_name,
+            Product.net_quantity_value, Product.net_quantity_unit,
+            Product.nutrition_serving_value, Product.nutrition_serving_unit,
+            Product.health_rating, Product.processing_level, Product.allergens
         )
-        products.append(product_item)
-    
-    # Create filter object for response
-    filters_applied = ProductSearchFilter(
-        query=query,
-        brand_name=brand_name,
-        barcode=barcode,
-        super_category_id=super_category_id,
-        category_id=category_id,
-        sub_category_l3=sub_category_l3,
-        sub_category_l4=sub_category_l4,
-        sub_category_l5=sub_category_l5,
-        veg_status=veg_status,
-        min_health_rating=min_health_rating,
-        max_health_rating=max_health_rating,
-        processing_level=processing_level,
-        min_price=min_price,
-        max_price=max_price,
-        sort_by=sort_by,
-        sort_order=sort_order,
-        limit=limit,
-        offset=offset
+        .where(Product.barcode.in_(list(quantities)))
+        .order_by(Product.id)
     )
-    
-    return ProductSearchResponse(
-        products=products,
-        total=total,
-        limit=limit,
-        offset=offset,
-        filters_applied=filters_applied
+    rows_by_barcode = {}
+    for row in session.exec(product_statement).all() if quantities else []:
+        rows_by_barcode.setdefault(row.barcode, row)
+
+    # Barcodes mapping to the same product are merged into one line
+    cart_products: Dict[int, CartProduct] = {}
+    for barcode, quantity in quantities.items():
+        row = rows_by_barcode.get(barcode)
+        if row is None:
+            continue
+        if row.id in cart_products:
+            cart_products[row.id].quantity += quantity
+            continue
+        cart_products[row.id] = CartProduct(
+            product_id=row.id,
+            quantity=quantity,
+            net_quantity_value=row.net_quantity_value,
+            net_quantity_unit=row.net_quantity_unit,
+            nutrition_serving_value=row.nutrition_serving_value,
+            nutrition_serving_unit=row.nutrition_serving_unit,
+            health_rating=row.health_rating,
+            processing_level=row.processing_level,
+            allergens=row.allergens
+        )
+
+    nutrition_rows = []
+    if cart_products:
+        nutrition_statement = select(
+            NutritionFact.product_id, NutritionFact.nutrient, NutritionFact.value, NutritionFact.unit
+        ).where(NutritionFact.product_id.in_(list(cart_products)))
+        nutrition_rows = session.exec(nutrition_statement).all()
+
+    aggregate = aggregate_cart(list(cart_products.values()), nutrition_rows)
+
+    items = []
+    for barcode, quantity in quantities.items():
+        row = rows_by_barcode.get(barcode)
+        items.append(CartItemResult(
+            barcode=barcode,
+            quantity=quantity,
+            found=row is not None,
+            product_id=row.id if row else None,
+            display_name=row.display_name if row else None,
+            pack_weight_grams=aggregate.pack_grams.get(row.id) if row else None,
+            has_nutrition=aggregate.has_nutrition.get(row.id, False) if row else False
+        ))
+
+    return CartNutritionResponse(
+        total_weight_grams=aggregate.total_weight_grams,
+        nutrients=[
+            CartNutrientTotal(
+                nutrient=nutrient,
+                unit=NUTRIENT_UNITS[nutrient],
+                total=aggregate.totals[nutrient],
+                per_100g=aggregate.per_100g[nutrient]
+            )
+            for nutrient in NUTRIENTS
+        ],
+        allergens=aggregate.allergens,
+        worst_processing_level=aggregate.worst_processing_level,
+        health_rating=aggregate.health_rating,
+        items=items
     )
 
 
 @router.get("/{product_id}", response_model=ProductDetail)
+@cached_endpoint
 def get_product_detail(
     product_id: int,
-    session: SessionDep,
+    session: ReadSessionDep,
     _: str = Depends(get_current_active_user)
 ) -> ProductDetail:
     """Get complete product details by ID."""
-    # Query product with all relationships
-    statement = (
-        select(Product, Brand, SuperCategory, Category)
-        .join(Brand, Product.brand_id == Brand.id)
-        .join(SuperCategory, Product.super_category_id == SuperCategory.id)
-        .join(Category, Product.category_id == Category.id)
-        .where(Product.id == product_id)
-    )
-    
-    result = session.exec(statement).first()
-    if not result:
+    products = load_product_details(session, Product.id == product_id)
+    if not products:
         raise HTTPException(status_code=404, detail="Product not found")
-    
-    product, brand, super_category, category = result
-    
-    # Get images
-    image_statement = select(ProductImage).where(ProductImage.product_id == product.id).order_by(ProductImage.order_index)
-    images = session.exec(image_statement).all()
-    image_filenames = [img.filename for img in images]
-    primary_image = None
-    for img in images:
-        if img.is_primary:
-            primary_image = img.filename
-            break
-    if not primary_image and image_filenames:
-        primary_image = image_filenames[0]
-    
-    # Get nutrition facts
-    nutrition_statement = select(NutritionFact).where(NutritionFact.product_id == product.id)
-    nutrition_facts = session.exec(nutrition_statement).all()
-    
-    # Get ingredients
-    ingredient_statement = select(Ingredient).where(Ingredient.product_id == product.id).order_by(Ingredient.order_index)
-    ingredients = session.exec(ingredient_statement).all()
-    
-    # Parse JSON fields safely
-    def safe_json_parse(json_str: Optional[str]) -> List[str]:
-        if not json_str:
-            return []
-        try:
-            result = json.loads(json_str)
-            return result if isinstance(result, list) else []
-        except (json.JSONDecodeError, TypeError):
-            return []
-    
-    # Convert to response models
-    brand_response = BrandResponse(id=brand.id, name=brand.name)
-    super_category_response = SuperCategoryResponse(
-        id=super_category.id, 
-        name=super_category.name,
-        image_filename=super_category.image_filename,
-        taxonomy_type=super_category.taxonomy_type
-    )
-    category_response = CategoryResponse(
-        id=category.id,
-        name=category.name,
-        image_filename=category.image_filename,
-        product_count=category.product_count,
-        age_consent_required=category.age_consent_required
-    )
-    
-    nutrition_responses = [
-        NutritionFactResponse(
-            id=nf.id,
-            nutrient=nf.nutrient,
-            value=nf.value,
-            unit=nf.unit,
-            rda_percentage=nf.rda_percentage
-        )
-        for nf in nutrition_facts
-    ]
-    
-    ingredient_responses = [
-        IngredientResponse(
-            id=ing.id,
-            name=ing.name,
-            percentage=ing.percentage,
-            ins_numbers=safe_json_parse(ing.ins_numbers),
-            additives=safe_json_parse(ing.additives),
-            is_alarming=ing.is_alarming,
-            alarming_reason=ing.alarming_reason
-        )
-        for ing in ingredients
-    ]
-    
-    return ProductDetail(
-        id=product.id,
-        name=product.name,
-        display_name=product.display_name,
-        brand=brand_response,
-        primary_source=product.primary_source,
-        primary_external_id=product.primary_external_id,
-        primary_external_variation_id=product.primary_external_variation_id,
-        super_category=super_category_response,
-        category=category_response,
-        sub_category_l3=product.sub_category_l3,
-        sub_category_l4=product.sub_category_l4,
-        sub_category_l5=product.sub_category_l5,
-        veg_status=product.veg_status,
-        health_rating=product.health_rating,
-        processing_level=product.processing_level,
-        mrp=product.mrp,
-        store_price=product.store_price,
-        offer_price=product.offer_price,
-        discount_value=product.discount_value,
-        unit_level_price=product.unit_level_price,
-        quantity=product.quantity,
-        weight_in_grams=product.weight_in_grams,
-        unit_of_measure=product.unit_of_measure,
-        volumetric_weight=product.volumetric_weight,
-        sku_quantity_with_combo=product.sku_quantity_with_combo,
-        primary_image=primary_image,
-        images=image_filenames,
-        barcode=product.barcode,
-        country_of_origin=product.country_of_origin,
-        net_quantity_value=product.net_quantity_value,
-        net_quantity_unit=product.net_quantity_unit,
-        nutrition_serving_value=product.nutrition_serving_value,
-        nutrition_serving_unit=product.nutrition_serving_unit,
-        approx_serves_per_pack=product.approx_serves_per_pack,
-        ingredients_string=product.ingredients_string,
-        storage_instructions=product.storage_instructions,
-        cooking_instructions=product.cooking_instructions,
-        ingredients=ingredient_responses,
-        nutrition_facts=nutrition_responses,
-        allergens=safe_json_parse(product.allergens),
-        certifications=safe_json_parse(product.certifications),
-        positive_health_aspects=safe_json_parse(product.positive_health_aspects),
-        negative_health_aspects=safe_json_parse(product.negative_health_aspects),
-        tags=[],  # You can add tags logic here if needed
-        created_at=product.created_at,
-        updated_at=product.updated_at
-    )
+    return products[0]
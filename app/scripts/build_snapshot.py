@@ -0,0 +1,110 @@
+"""Script to build an optimized, read-only SQLite snapshot of the catalog."""
+import argparse
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy.engine import make_url
+from sqlmodel import SQLModel, create_engine
+
+from ..snapshot import SNAPSHOT_DIR, publish_snapshot, read_current_snapshot
+from .. import models  # noqa: F401  (registers all tables on SQLModel.metadata)
+
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 65536
+
+
+def sqlite_path(database_url: str) -> Path:
+    """Filesystem path of a sqlite:/// database URL."""
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite" or not url.database:
+        raise ValueError(f"Snapshots can only be built from a SQLite file database, got {database_url}")
+    return Path(url.database)
+
+
+def build_snapshot(source: Path, target: Path, page_size: int = DEFAULT_PAGE_SIZE) -> None:
+    """Copy `source` into `target` and optimize it for read-only serving."""
+    # Online backup gives a consistent copy even while a migration is writing to the source
+    src = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+    # Make sure every table and index declared on the models exists in the copy
+    target_engine = create_engine(f"sqlite:///{target}")
+    SQLModel.metadata.create_all(target_engine)
+    target_engine.dispose()
+
+    conn = sqlite3.connect(target, isolation_level=None)
+    try:
+        # page_size only changes on VACUUM and not in WAL mode
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.execute(f"PRAGMA page_size={page_size}")
+        conn.execute("ANALYZE")
+        conn.execute("VACUUM")
+        result = conn.execute("PRAGMA quick_check").fetchone()[0]
+        if result != "ok":
+            raise RuntimeError(f"Snapshot integrity check failed: {result}")
+    finally:
+        conn.close()
+
+
+def prune_snapshots(snapshot_dir: Path, keep: int) -> None:
+    """Delete all but the newest `keep` snapshots, never the current one."""
+    current = read_current_snapshot(snapshot_dir)
+    snapshots = sorted(snapshot_dir.glob("catalog-*.db"), reverse=True)
+    for path in snapshots[keep:]:
+        if path != current:
+            # Workers still reading an unlinked file keep their open handle until they switch
+            path.unlink()
+            logger.info(f"Removed old snapshot {path.name}")
+
+
+def main():
+    """Build and publish a catalog snapshot from command line arguments."""
+    parser = argparse.ArgumentParser(description="Build a read-only catalog snapshot")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", "sqlite:///./app.db"),
+                        help="Source SQLite database URL")
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR or "./snapshots",
+                        help="Directory holding snapshots and the CURRENT pointer")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="SQLite page size of the snapshot")
+    parser.add_argument("--keep", type=int, default=3, help="Number of snapshots to keep")
+    args = parser.parse_args()
+
+    source = sqlite_path(args.database_url)
+    if not source.exists():
+        raise SystemExit(f"Source database {source} does not exist")
+
+    snapshot_dir = Path(args.snapshot_dir)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    name = f"catalog-{datetime.now().strftime('%Y%m%d-%H%M%S')}.db"
+    tmp_path = snapshot_dir / f".{name}.tmp"
+    final_path = snapshot_dir / name
+
+    start = time.perf_counter()
+    logger.info(f"Building snapshot of {source} into {final_path}")
+    try:
+        build_snapshot(source, tmp_path, args.page_size)
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_path, final_path)
+    publish_snapshot(snapshot_dir, final_path)
+
+    size_mb = final_path.stat().st_size / 1024 / 1024
+    logger.info(f"Published {final_path.name} ({size_mb:.1f} MB) in {time.perf_counter() - start:.1f}s")
+    prune_snapshots(snapshot_dir, args.keep)
+
+
+if __name__ == "__main__":
+    main()
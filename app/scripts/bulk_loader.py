@@ -0,0 +1,548 @@
+"""Batched upserts of parsed products and their child rows for the catalog migration."""
+import csv
+import io
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+from sqlalchemy import Index, delete, insert, or_, sql, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, SQLModel, select
+
+from .profiling import PhaseTimer
+from ..models import (
+    Brand, SuperCategory, Category, Product, ProductImage, NutritionFact, Ingredient, ProductCategoryLink,
+    ProductSourceMapping, MigrationManifest, MigrationCheckpoint
+)
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+# Keeps IN (...) lists well below the bind parameter limits of SQLite and Postgres
+IN_CHUNK_SIZE = 500
+
+# Unique constraint products are upserted on
+PRODUCT_KEY_COLUMNS = ("primary_source", "primary_external_id", "primary_external_variation_id")
+
+# Child tables: (ProductRows attribute, columns compared when replacing a product's rows)
+CHILD_TABLES = {
+    ProductImage: ("images", ("filename", "order_index", "is_primary")),
+    NutritionFact: ("nutrition_facts", ("nutrient", "value", "unit", "rda_percentage")),
+    Ingredient: ("ingredients", (
+        "name", "percentage", "is_alarming", "alarming_reason", "order_index", "ins_numbers", "additives"
+    )),
+    ProductCategoryLink: ("category_links", ("category_id",)),
+}
+
+
+def required_columns(model: type[SQLModel]) -> Tuple[str, ...]:
+    """NOT NULL columns without a default that parsed rows must supply (product_id is filled in by the loader)."""
+    return tuple(
+        column.name for column in model.__table__.columns
+        if not column.nullable and column.default is None and column.server_default is None
+        and not column.primary_key and column.name != "product_id"
+    )
+
+
+# Values a record has to have to be written; records missing one are skipped rather than failing the batch
+REQUIRED_COLUMNS = {model: required_columns(model) for model in (Product, *CHILD_TABLES)}
+
+# Tables written by the loader, whose secondary indexes a fast initial load defers
+BULK_LOADED_MODELS = (Product, ProductImage, NutritionFact, Ingredient, ProductCategoryLink, ProductSourceMapping)
+
+ProductKey = Tuple[Any, str, Any]
+
+# Key of the set of staging tables created on a pooled connection, in its `info` dict
+STAGING_TABLES_INFO_KEY = "bulk_loader_staging_tables"
+
+
+def chunks(items: List[Any], size: int = IN_CHUNK_SIZE):
+    """Split a list into lists of at most `size` items."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def dialect_insert(session: Session, model: type[SQLModel]):
+    """INSERT statement supporting ON CONFLICT for the session's database."""
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    raise ValueError(f"Upserts are not supported on {dialect}")
+
+
+@dataclass
+class ProductRows:
+    """Column values of one product and its child rows; ids are filled in by the loader."""
+    product: Dict[str, Any]
+    images: List[Dict[str, Any]] = field(default_factory=list)
+    nutrition_facts: List[Dict[str, Any]] = field(default_factory=list)
+    ingredients: List[Dict[str, Any]] = field(default_factory=list)
+    category_links: List[Dict[str, Any]] = field(default_factory=list)
+    external_brand_id: Optional[str] = None
+    # MigrationManifest values (without product_id) of the source files, if tracked
+    manifest: Optional[Dict[str, Any]] = None
+    # For an existing product another source owns: the only child attributes to write.
+    # Its columns and other child rows are left alone; `product` only needs the key columns.
+    children_only: Optional[Tuple[str, ...]] = None
+
+    @property
+    def key(self) -> ProductKey:
+        """The product's (primary_source, primary_external_id, primary_external_variation_id)."""
+        return tuple(self.product.get(column) for column in PRODUCT_KEY_COLUMNS)
+
+    def writes(self, attribute: str) -> bool:
+        """Whether the loader replaces this product's rows of a child attribute."""
+        return self.children_only is None or attribute in self.children_only
+
+    def missing_values(self) -> List[str]:
+        """Required columns (as table.column) that the product or one of its written child rows lacks."""
+        missing = []
+        if self.children_only is None:
+            missing = [f"product.{column}" for column in REQUIRED_COLUMNS[Product] if self.product.get(column) is None]
+        for model, (attribute, _) in CHILD_TABLES.items():
+            if not self.writes(attribute):
+                continue
+            for child in getattr(self, attribute):
+                missing += [
+                    f"{model.__tablename__}.{column}" for column in REQUIRED_COLUMNS[model]
+                    if child.get(column) is None
+                ]
+        return list(dict.fromkeys(missing))
+
+
+@dataclass
+class MigrationLookups:
+    """Natural key -> id maps of the catalog, loaded in bulk once and kept current by the migration."""
+    brands: Dict[str, int]
+    super_categories: Dict[str, int]
+    categories: Dict[Tuple[str, int], int]  # (name, super category id)
+    products: Dict[ProductKey, int]
+    barcodes: Dict[str, int]
+    product_barcodes: Dict[int, str]
+    mapped_products: Set[int]  # products with a source mapping
+    inactive_products: Set[int]  # products with an inactive source mapping
+
+    @classmethod
+    def load(cls, session: Session) -> "MigrationLookups":
+        """Load every map with one query per table."""
+        started = time.perf_counter()
+        products, barcodes, product_barcodes = {}, {}, {}
+        statement = select(Product.id, Product.barcode, *(getattr(Product, c) for c in PRODUCT_KEY_COLUMNS))
+        for product_id, barcode, *key in session.exec(statement).all():
+            products[tuple(key)] = product_id
+            if barcode:
+                barcodes[barcode] = product_id
+                product_barcodes[product_id] = barcode
+
+        mapped_products, inactive_products = set(), set()
+        for product_id, is_active in session.exec(
+            select(ProductSourceMapping.product_id, ProductSourceMapping.is_active)
+        ).all():
+            mapped_products.add(product_id)
+            if not is_active:
+                inactive_products.add(product_id)
+
+        lookups = cls(
+            brands=dict(session.exec(select(Brand.name, Brand.id)).all()),
+            super_categories=dict(session.exec(select(SuperCategory.name, SuperCategory.id)).all()),
+            categories={
+                (name, super_category_id): category_id for category_id, name, super_category_id in
+                session.exec(select(Category.id, Category.name, Category.super_category_id)).all()
+            },
+            products=products,
+            barcodes=barcodes,
+            product_barcodes=product_barcodes,
+            mapped_products=mapped_products,
+            inactive_products=inactive_products,
+        )
+        logger.info(
+            f"Loaded lookups for {len(lookups.brands)} brands, {len(lookups.categories)} categories and "
+            f"{len(products)} products in {time.perf_counter() - started:.2f}s"
+        )
+        return lookups
+
+    def set_barcode(self, product_id: int, barcode: Optional[str]) -> None:
+        """Record a product's current barcode, releasing the one it held before."""
+        previous = self.product_barcodes.pop(product_id, None)
+        if previous and self.barcodes.get(previous) == product_id:
+            del self.barcodes[previous]
+        if barcode:
+            self.barcodes[barcode] = product_id
+            self.product_barcodes[product_id] = barcode
+
+
+class BulkLoader:
+    """
+    Buffers parsed products and writes them in batches: one multi-row INSERT ... ON CONFLICT DO UPDATE
+    for the products, set-based replacement of their child rows and a single commit per batch.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        lookups: MigrationLookups,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        timer: Optional[PhaseTimer] = None,
+        append_only: Tuple[str, ...] = ()
+    ):
+        self.session = session
+        self.lookups = lookups
+        self.batch_size = batch_size
+        # Time (and queries, if the timer counts them) per write step, summed over batches
+        self.timer = timer or PhaseTimer()
+        # Child attributes (of CHILD_TABLES) this importer only adds to, keeping rows other importers wrote
+        self.append_only = set(append_only)
+        self.pending: List[ProductRows] = []
+        self.pending_manifest: List[Dict[str, Any]] = []
+        self.pending_checkpoints: List[Dict[str, Any]] = []
+        self.seen_keys: Set[ProductKey] = set()
+        self.stats = {
+            "products": 0, "updated": 0, "unchanged": 0, "children_only": 0, "skipped": 0, "invalid": 0,
+            "images": 0, "nutrition_facts": 0, "ingredients": 0, "category_links": 0, "children_deleted": 0,
+            "brand_dirs": 0,
+        }
+        self.started = time.perf_counter()
+
+    def add(self, rows: ProductRows) -> None:
+        """Queue a product; the batch is written once it is full."""
+        self.pending.append(rows)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def add_manifest(self, entry: Dict[str, Any]) -> None:
+        """Queue a manifest row for files that produced no product to write."""
+        self.pending_manifest.append(entry)
+        if len(self.pending_manifest) >= self.batch_size:
+            self.flush()
+
+    def add_checkpoint(self, run_id: int, brand_dir: str) -> None:
+        """Record a finished brand directory; it is committed together with its last products."""
+        self.pending_checkpoints.append({"run_id": run_id, "brand_dir": brand_dir})
+
+    def products_per_second(self) -> float:
+        """Inserted and updated products per second since the loader was created."""
+        elapsed = time.perf_counter() - self.started
+        written = sum(self.stats[name] for name in ("products", "updated", "unchanged", "children_only"))
+        return written / elapsed if elapsed > 0 else 0.0
+
+    def _split_batch(self) -> List[ProductRows]:
+        """Pick the queued products to upsert, skipping those that would break a unique constraint."""
+        batch = []
+        batch_barcodes: Dict[str, ProductKey] = {}
+        for rows in self.pending:
+            # The barcode of a children-only product is not written
+            barcode = rows.product.get("barcode") if rows.children_only is None else None
+            display_name = rows.product.get("display_name")
+            existing_id = self.lookups.products.get(rows.key)
+            if rows.key in self.seen_keys:
+                logger.info(f"Product '{display_name}' was already imported in this session. Skipping.")
+            elif rows.children_only is not None and not existing_id:
+                logger.warning(f"Product '{display_name}' belongs to another source but does not exist. Skipping.")
+            elif missing := rows.missing_values():
+                # A NULL in a NOT NULL column would fail the whole batch's upsert
+                logger.warning(f"Product '{display_name}' has no {', '.join(missing)}. Skipping.")
+                self.stats["invalid"] += 1
+            elif existing_id and rows.key[2] is None:
+                # NULLs never conflict, so ON CONFLICT cannot match a product without a variation id
+                logger.warning(f"Product '{display_name}' has no variation id and already exists. Skipping.")
+            elif barcode and self.lookups.barcodes.get(barcode, existing_id) != existing_id:
+                logger.info(f"Barcode {barcode} already belongs to another product, '{display_name}'. Skipping.")
+            elif barcode and batch_barcodes.get(barcode, rows.key) != rows.key:
+                logger.warning(f"Duplicate barcode {barcode} found in this session for '{display_name}'. Skipping.")
+            else:
+                batch.append(rows)
+                self.seen_keys.add(rows.key)
+                if barcode:
+                    batch_barcodes[barcode] = rows.key
+                continue
+            self.stats["skipped"] += 1
+        return batch
+
+    def _upsert_products(self, batch: List[ProductRows], now: datetime) -> Dict[ProductKey, int]:
+        """
+        Insert new products and update changed ones in one statement.
+        Returns the ids of inserted or changed products; unchanged rows are left alone and not returned.
+        """
+        columns = [column for column in batch[0].product if column not in PRODUCT_KEY_COLUMNS]
+        values = [{**rows.product, "created_at": now, "updated_at": now} for rows in batch]
+
+        statement = dialect_insert(self.session, Product)
+        table, excluded = Product.__table__, statement.excluded
+        statement = statement.on_conflict_do_update(
+            index_elements=list(PRODUCT_KEY_COLUMNS),
+            set_={**{column: excluded[column] for column in columns}, "updated_at": excluded.updated_at},
+            # updated_at only moves when a value actually changed
+            where=or_(*(table.c[column].is_distinct_from(excluded[column]) for column in columns)),
+        ).returning(Product.id, *(table.c[column] for column in PRODUCT_KEY_COLUMNS))
+
+        # Executed on the connection: Core's insertmanyvalues batches RETURNING rows, the ORM bulk path does not
+        result = self.session.connection().execute(statement, values).all()
+        return {tuple(row[1:]): row[0] for row in result}
+
+    def _replace_children(self, batch: List[ProductRows], product_ids: Dict[ProductKey, int], existing_ids: Set[int]) -> None:
+        """Make each product's child rows match the parsed ones, touching only rows that differ."""
+        for model, (attribute, columns) in CHILD_TABLES.items():
+            owners = [rows for rows in batch if rows.writes(attribute)]
+            owner_ids = existing_ids.intersection(product_ids[rows.key] for rows in owners)
+            # Current rows by (product id, values); a multiset, as a product may repeat a row
+            current: Dict[Tuple[int, Tuple], List[int]] = defaultdict(list)
+            for ids_chunk in chunks(list(owner_ids)):
+                statement = select(model.id, model.product_id, *(getattr(model, c) for c in columns)).where(
+                    model.product_id.in_(ids_chunk)
+                )
+                for row_id, product_id, *row_values in self.session.exec(statement).all():
+                    current[(product_id, tuple(row_values))].append(row_id)
+
+            inserts = []
+            for rows in owners:
+                product_id = product_ids[rows.key]
+                for child in getattr(rows, attribute):
+                    matching = current.get((product_id, tuple(child.get(c) for c in columns)))
+                    if matching:
+                        matching.pop()
+                    else:
+                        inserts.append({**child, "product_id": product_id})
+
+            stale = [row_id for row_ids in current.values() for row_id in row_ids]
+            if attribute in self.append_only:
+                stale = []
+            # Deletes go first so replacements don't trip unique (product_id, filename / nutrient)
+            for ids_chunk in chunks(stale):
+                self.session.execute(delete(model).where(model.id.in_(ids_chunk)))
+            if inserts:
+                self._insert_rows(model, ("product_id", *columns), inserts)
+            self.stats[attribute] += len(inserts)
+            self.stats["children_deleted"] += len(stale)
+
+    def _execute_insert(self, model: type[SQLModel], rows: List[Dict[str, Any]]) -> None:
+        """
+        INSERT the rows with a single executemany. Runs on the connection: the ORM bulk path groups
+        rows by which values are None and sends one statement per group.
+        """
+        self.session.connection().execute(insert(model.__table__), rows)
+
+    def _insert_rows(self, model: type[SQLModel], columns: Tuple[str, ...], rows: List[Dict[str, Any]]) -> None:
+        """Insert new child rows."""
+        self._execute_insert(model, rows)
+
+    @staticmethod
+    def _source_mapping(rows: ProductRows, product_id: int, now: datetime) -> Dict[str, Any]:
+        source, external_id, variation_id = rows.key
+        return dict(
+            product_id=product_id, source=source, external_id=external_id, external_variation_id=variation_id,
+            external_brand_id=rows.external_brand_id, last_synced=now, is_active=True,
+            created_at=now, updated_at=now,
+        )
+
+    def _sync_source_mappings(self, batch: List[ProductRows], product_ids: Dict[ProductKey, int], now: datetime) -> None:
+        """Mark written products as seen at their source, adding mappings they lack."""
+        lookups = self.lookups
+        reactivate = [product_id for product_id in product_ids.values() if product_id in lookups.inactive_products]
+        for ids_chunk in chunks(reactivate):
+            self.session.execute(
+                update(ProductSourceMapping)
+                .where(ProductSourceMapping.product_id.in_(ids_chunk))
+                .values(is_active=True, updated_at=now)
+            )
+        lookups.inactive_products.difference_update(reactivate)
+
+        missing = [
+            self._source_mapping(rows, product_ids[rows.key], now)
+            for rows in batch if product_ids[rows.key] not in lookups.mapped_products
+        ]
+        if missing:
+            self._execute_insert(ProductSourceMapping, missing)
+            lookups.mapped_products.update(mapping["product_id"] for mapping in missing)
+
+    def _write_manifest(self, entries: List[Dict[str, Any]], now: datetime) -> None:
+        """Upsert the manifest rows of the given paths."""
+        if not entries:
+            return
+        # A path can be queued twice within a batch; the last entry wins
+        by_path = {entry["path"]: {**entry, "updated_at": now} for entry in entries}
+        statement = dialect_insert(self.session, MigrationManifest)
+        statement = statement.on_conflict_do_update(
+            index_elements=["path"],
+            set_={column: statement.excluded[column] for column in
+                  ("mtime", "size", "content_hash", "product_id", "updated_at")},
+        )
+        # On the connection, like the product upsert: the ORM session runs ON CONFLICT once per row
+        self.session.connection().execute(statement, list(by_path.values()))
+
+    def flush(self) -> None:
+        """Upsert all queued products and their child rows, then commit."""
+        if not self.pending and not self.pending_manifest and not self.pending_checkpoints:
+            return
+        now = datetime.utcnow()
+        existing_keys = self.lookups.products
+        batch = self._split_batch()
+        # Which products exist has to be known before the upsert adds the new ones
+        existing_ids = {existing_keys[rows.key] for rows in batch if rows.key in existing_keys}
+        upserted = [rows for rows in batch if rows.children_only is None]
+        with self.timer.phase("product upsert"):
+            written = self._upsert_products(upserted, now) if upserted else {}
+        product_ids = {rows.key: written.get(rows.key) or existing_keys[rows.key] for rows in batch}
+
+        inserted = sum(1 for key in written if key not in existing_keys)
+        updated = len(written) - inserted
+        self.stats["products"] += inserted
+        self.stats["updated"] += updated
+        self.stats["unchanged"] += len(upserted) - len(written)
+        self.stats["children_only"] += len(batch) - len(upserted)
+
+        if batch:
+            with self.timer.phase("child rows"):
+                self._replace_children(batch, product_ids, existing_ids)
+            with self.timer.phase("source mappings"):
+                self._sync_source_mappings(batch, product_ids, now)
+            for rows in upserted:
+                existing_keys[rows.key] = product_ids[rows.key]
+                self.lookups.set_barcode(product_ids[rows.key], rows.product.get("barcode"))
+
+        manifest = list(self.pending_manifest)
+        for rows in self.pending:
+            if rows.manifest is not None:
+                product_id = product_ids.get(rows.key) or existing_keys.get(rows.key)
+                manifest.append({**rows.manifest, "product_id": product_id})
+        with self.timer.phase("manifest"):
+            self._write_manifest(manifest, now)
+            if self.pending_checkpoints:
+                checkpoints = [{**checkpoint, "completed_at": now} for checkpoint in self.pending_checkpoints]
+                self._execute_insert(MigrationCheckpoint, checkpoints)
+                self.stats["brand_dirs"] += len(checkpoints)
+
+        self.pending = []
+        self.pending_manifest = []
+        self.pending_checkpoints = []
+        with self.timer.phase("commit"):
+            self.session.commit()
+        if batch:
+            logger.info(
+                f"Wrote {len(batch)} products: {inserted} new, {updated} updated "
+                f"({self.products_per_second():.0f} products/sec)"
+            )
+
+
+class CopyBulkLoader(BulkLoader):
+    """
+    Postgres backend of the loader: rows are streamed with COPY FROM STDIN (CSV) instead of
+    multi-row INSERTs. Products go through a temporary staging table and are merged with one
+    INSERT ... SELECT ... ON CONFLICT DO UPDATE; child rows, which the diff guarantees to be new,
+    are copied straight into their tables. Works with psycopg (3) and psycopg2.
+    """
+
+    def _copy(self, table_name: str, columns: Tuple[str, ...], rows: List[Dict[str, Any]], model: type[SQLModel]) -> None:
+        """Stream rows into a table with COPY, converting values like the model's column types would."""
+        dialect = self.session.get_bind().dialect
+        processors = [model.__table__.c[name].type.bind_processor(dialect) for name in columns]
+        buffer = io.StringIO()
+        # NULLs are written unquoted and empty, which COPY reads as NULL; every other value is quoted
+        writer = csv.writer(buffer, quoting=csv.QUOTE_NOTNULL)
+        for row in rows:
+            values = [row.get(name) for name in columns]
+            writer.writerow([
+                process(value) if process and value is not None else value
+                for process, value in zip(processors, values)
+            ])
+        buffer.seek(0)
+
+        sql = f"COPY {table_name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        cursor = self.session.connection().connection.cursor()
+        try:
+            if hasattr(cursor, "copy"):  # psycopg 3
+                with cursor.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+            else:  # psycopg2
+                cursor.copy_expert(sql, buffer)
+        finally:
+            cursor.close()
+
+    def _staging_table(self, model: type[SQLModel], columns: Tuple[str, ...]) -> str:
+        """Temporary table with the given columns of the model's table, emptied on every commit."""
+        name = f"staging_{model.__tablename__}"
+        connection = self.session.connection()
+        # Temporary tables live on one DBAPI connection, and the session may get a different one from
+        # the pool after a commit. The pool's per-connection info dict goes away with the connection.
+        staging_tables = connection.connection.info.setdefault(STAGING_TABLES_INFO_KEY, set())
+        if name not in staging_tables:
+            connection.exec_driver_sql(
+                f"CREATE TEMPORARY TABLE IF NOT EXISTS {name} ON COMMIT DELETE ROWS AS "
+                f"SELECT {', '.join(columns)} FROM {model.__tablename__} WITH NO DATA"
+            )
+            staging_tables.add(name)
+        return name
+
+    def _upsert_products(self, batch: List[ProductRows], now: datetime) -> Dict[ProductKey, int]:
+        """COPY the batch into the staging table and merge it into product in one statement."""
+        columns = [column for column in batch[0].product if column not in PRODUCT_KEY_COLUMNS]
+        copied = (*PRODUCT_KEY_COLUMNS, *columns, "created_at", "updated_at")
+        staging = self._staging_table(Product, copied)
+        self._copy(staging, copied, [{**rows.product, "created_at": now, "updated_at": now} for rows in batch], Product)
+
+        source = sql.table(staging, *(sql.column(name) for name in copied))
+        statement = postgresql.insert(Product).from_select(list(copied), select(*source.c))
+        product_table, excluded = Product.__table__, statement.excluded
+        statement = statement.on_conflict_do_update(
+            index_elements=list(PRODUCT_KEY_COLUMNS),
+            set_={**{name: excluded[name] for name in columns}, "updated_at": excluded.updated_at},
+            # updated_at only moves when a value actually changed
+            where=or_(*(product_table.c[name].is_distinct_from(excluded[name]) for name in columns)),
+        ).returning(Product.id, *(product_table.c[name] for name in PRODUCT_KEY_COLUMNS))
+
+        result = self.session.connection().execute(statement).all()
+        return {tuple(row[1:]): row[0] for row in result}
+
+    def _insert_rows(self, model: type[SQLModel], columns: Tuple[str, ...], rows: List[Dict[str, Any]]) -> None:
+        """COPY new child rows straight into their table."""
+        self._copy(model.__tablename__, columns, rows, model)
+
+
+def create_loader(
+    session: Session,
+    lookups: MigrationLookups,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    timer: Optional[PhaseTimer] = None,
+    append_only: Tuple[str, ...] = ()
+) -> BulkLoader:
+    """The loader backend for the session's database: COPY on Postgres, multi-row INSERTs elsewhere."""
+    if session.get_bind().dialect.name == "postgresql":
+        return CopyBulkLoader(session, lookups, batch_size, timer, append_only)
+    return BulkLoader(session, lookups, batch_size, timer, append_only)
+
+
+def secondary_indexes(models: Tuple[type[SQLModel], ...] = BULK_LOADED_MODELS) -> List[Index]:
+    """The non-unique indexes of the given tables."""
+    return [index for model in models for index in model.__table__.indexes if not index.unique]
+
+
+def drop_secondary_indexes(engine: Engine, models: Tuple[type[SQLModel], ...] = BULK_LOADED_MODELS) -> List[Index]:
+    """Drop the non-unique indexes of the given tables and return them for rebuilding.
+
+    Unique constraints stay in place; the upserts rely on them.
+    """
+    indexes = secondary_indexes(models)
+    with engine.begin() as conn:
+        for index in indexes:
+            index.drop(conn, checkfirst=True)
+    return indexes
+
+
+def create_indexes(engine: Engine, indexes: List[Index]) -> None:
+    """Create indexes that are missing, e.g. after drop_secondary_indexes."""
+    with engine.begin() as conn:
+        for index in indexes:
+            index.create(conn, checkfirst=True)
+
+
+def analyze_database(engine: Engine, vacuum: bool = True) -> None:
+    """Refresh planner statistics, and on SQLite rewrite the file without fragmentation."""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("ANALYZE")
+        if vacuum and engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("VACUUM")
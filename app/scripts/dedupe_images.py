@@ -0,0 +1,163 @@
+"""Script to move already-downloaded product images into the content-addressed blob store."""
+import argparse
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Set, Tuple
+from sqlmodel import Session, select
+
+from ..models import ProductImage
+from ..database import engine, create_db_and_tables
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SCRAPED_DATA_DIR = Path("scraped_data")
+LISTINGS_DIR = SCRAPED_DATA_DIR / "swiggy" / "listings"
+BLOBS_DIR = SCRAPED_DATA_DIR / "swiggy" / "blobs"
+
+
+def hash_file(file_path: Path) -> str:
+    """Return the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def blob_path_for(file_path: Path) -> Path:
+    """Content-addressed location for an image file: blobs/<aa>/<sha256><ext>."""
+    digest = hash_file(file_path)
+    extension = file_path.suffix.lower() or ".png"
+    return BLOBS_DIR / digest[:2] / f"{digest}{extension}"
+
+
+def dedupe_image(image_file: Path, dry_run: bool, seen_blobs: Set[Path]) -> Tuple[Path, int]:
+    """
+    Move an image into the blob store and leave a hard link in its place.
+    `seen_blobs` collects the blobs of the run, so a dry run counts repeats of content it
+    hasn't moved. Returns the blob path and the number of bytes freed.
+    """
+    blob_path = blob_path_for(image_file)
+    duplicate = blob_path in seen_blobs
+    seen_blobs.add(blob_path)
+    if blob_path.exists() and os.path.samefile(blob_path, image_file):
+        return blob_path, 0
+
+    freed = image_file.stat().st_size if duplicate or blob_path.exists() else 0
+    if dry_run:
+        return blob_path, freed
+
+    if blob_path.exists():
+        image_file.unlink()
+    else:
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(image_file, blob_path)
+    os.link(blob_path, image_file)
+    return blob_path, freed
+
+
+def dedupe_listing_images(dry_run: bool = False) -> Dict[str, str]:
+    """Dedupe every variation image and return a map of legacy path -> blob path."""
+    path_map: Dict[str, str] = {}
+    stats = {"images": 0, "bytes_freed": 0}
+    seen_blobs: Set[Path] = set()
+
+    for brand_dir in LISTINGS_DIR.iterdir():
+        if not brand_dir.is_dir(): continue
+
+        for variation_dir in brand_dir.iterdir():
+            images_dir = variation_dir / "images"
+            if not images_dir.is_dir(): continue
+
+            image_blobs = {}
+            for image_file in images_dir.iterdir():
+                if not image_file.is_file(): continue
+
+                blob_path, freed = dedupe_image(image_file, dry_run, seen_blobs)
+                blob_ref = blob_path.relative_to(SCRAPED_DATA_DIR).as_posix()
+                legacy_ref = image_file.relative_to(SCRAPED_DATA_DIR).as_posix()
+
+                image_blobs[image_file.name] = blob_ref
+                path_map[legacy_ref] = blob_ref
+                stats["images"] += 1
+                stats["bytes_freed"] += freed
+
+            data_file = variation_dir / "data.json"
+            if image_blobs and data_file.exists() and not dry_run:
+                with open(data_file, 'r', encoding='utf-8') as f:
+                    variation_data = json.load(f)
+                variation_data["image_blobs"] = image_blobs
+                with open(data_file, 'w', encoding='utf-8') as f:
+                    json.dump(variation_data, f, indent=2, ensure_ascii=False)
+
+    logger.info(f"Images scanned: {stats['images']}")
+    logger.info(f"Unique blobs: {len(seen_blobs)}")
+    logger.info(f"Space freed: {stats['bytes_freed'] / (1024 * 1024):.1f} MiB")
+    return path_map
+
+
+def repoint_product_images(session: Session, path_map: Dict[str, str], dry_run: bool = False) -> None:
+    """Point ProductImage.filename at blob paths, dropping per-product duplicates."""
+    updated = 0
+    removed = 0
+    product_paths: Dict[int, set] = {}
+
+    renames = []
+    images = session.exec(select(ProductImage).order_by(ProductImage.product_id, ProductImage.order_index)).all()
+    for image in images:
+        seen = product_paths.setdefault(image.product_id, set())
+        new_path = path_map.get(image.filename, image.filename)
+
+        if new_path in seen:
+            # Same content twice for one product: keep the first reference only
+            session.delete(image)
+            removed += 1
+            continue
+
+        seen.add(new_path)
+        if new_path != image.filename:
+            renames.append((image, new_path))
+
+    # Flush deletes first so renames can't collide with a row that is going away
+    session.flush()
+    for image, new_path in renames:
+        image.filename = new_path
+        session.add(image)
+        updated += 1
+
+    if dry_run:
+        session.rollback()
+    else:
+        session.commit()
+
+    logger.info(f"Product images repointed: {updated}")
+    logger.info(f"Duplicate product images removed: {removed}")
+
+
+def main():
+    """Dedupe downloaded images and update the database references."""
+    parser = argparse.ArgumentParser(description="Move product images into the content-addressed blob store")
+    parser.add_argument("--dry-run", action="store_true", help="Report savings without touching files or the database")
+    args = parser.parse_args()
+
+    if not LISTINGS_DIR.exists():
+        logger.error("swiggy/listings directory not found!")
+        return
+
+    path_map = dedupe_listing_images(dry_run=args.dry_run)
+
+    create_db_and_tables()
+    with Session(engine) as session:
+        repoint_product_images(session, path_map, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""Script to import scraper-v3 product output (responses-v4/products/<product_id>/data.json) into the database."""
+import argparse
+import hashlib
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Tuple
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, select
+
+from ..models import DataSource, MigrationManifest, Product
+from ..database import engine, create_db_and_tables
+from ..catalog import bump_catalog_version
+from .profiling import PhaseTimer
+from .bulk_loader import (
+    BulkLoader, MigrationLookups, ProductRows, DEFAULT_BATCH_SIZE,
+    chunks, create_indexes, create_loader, secondary_indexes
+)
+from .migrate_data import (
+    DEFAULT_WORKERS, ManifestEntry,
+    deactivate_vanished, iter_in_pool, load_json_bytes, load_manifest, migrate_brand,
+    migrate_categories_and_build_map, migrate_super_categories,
+    parse_ingredients, parse_nutrition_facts, parse_product, resolve_category
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT_DIR = Path("scraper-v3/swiggy/responses-v4")
+# MigrationManifest.layout of v3 product directories; their paths are "products/<product_id>"
+MANIFEST_LAYOUT = "products"
+# Product directories parsed per worker task
+PARSE_CHUNK_SIZE = 200
+# Child rows v3 writes for products a v1 listing provides; migrate_data owns everything else of those
+LISTING_PRODUCT_CHILDREN = ("category_links",)
+
+
+@dataclass
+class ParsedProduct:
+    """A new or changed product directory; `rows` is None when only its mtime changed."""
+    path: str
+    mtime: float
+    size: int
+    content_hash: str
+    brand_name: Optional[str] = None
+    category_name: Optional[str] = None
+    # Every category and filter the product was listed under
+    memberships: List[str] = field(default_factory=list)
+    rows: Optional[ProductRows] = None
+
+
+@dataclass
+class ParsedChunk:
+    """Products read from a chunk of product directories."""
+    products: List[ParsedProduct] = field(default_factory=list)
+    seen: List[str] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)  # by exception type
+
+
+def image_root_for(output_dir: Path) -> str:
+    """Path of the v3 output directory below scraped_data/, where /images serves files from."""
+    try:
+        return output_dir.resolve().relative_to(Path("scraped_data").resolve()).as_posix()
+    except ValueError:
+        logger.warning(
+            f"{output_dir} is outside scraped_data/; images are recorded under '{output_dir.name}/' "
+            f"and are served once the directory is moved to scraped_data/{output_dir.name}"
+        )
+        return output_dir.name
+
+
+def parse_v3_images(data: Dict[str, Any], image_root: str, product_id: str) -> List[Dict[str, Any]]:
+    """Product image rows, one per distinct image path."""
+    # Blob paths are relative to the output directory (see step5_download_images.py)
+    image_blobs = data.get("image_blobs") or {}
+    seen_paths: Set[str] = set()
+    rows = []
+
+    for i, image in enumerate(data.get("images") or []):
+        if not image:
+            continue
+        filename = Path(image).name
+        blob_key = filename if Path(filename).suffix else f"{filename}.png"
+        blob_ref = image_blobs.get(blob_key)
+        image_path = f"{image_root}/{blob_ref}" if blob_ref else f"{image_root}/products/{product_id}/images/{filename}"
+        if image_path in seen_paths:
+            continue
+        seen_paths.add(image_path)
+        rows.append(dict(filename=image_path, order_index=i, is_primary=(i == 0)))
+    return rows
+
+
+def category_memberships(data: Dict[str, Any]) -> List[str]:
+    """Names of the categories and filters a product was listed under, in first-seen order."""
+    names = list(data.get("categories") or []) + list(data.get("filters") or [])
+    for source in (data.get("swiggy_data") or {}).get("sources") or []:
+        names.append(source.get("filter_name") or source.get("category_name"))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def parse_product_dir(
+    product_dir: Path,
+    image_root: str,
+    known: Optional[ManifestEntry] = None
+) -> Tuple[bool, Optional[ParsedProduct]]:
+    """
+    Read a product directory unless the manifest shows it unchanged.
+    Returns (whether it holds a data.json, the parsed product if it is new or changed).
+    """
+    data_file = product_dir / "data.json"
+    ai_file = product_dir / "parsed_ai.json"
+    if not data_file.exists():
+        return False, None
+
+    files = [data_file, ai_file] if ai_file.exists() else [data_file]
+    file_stats = [f.stat() for f in files]
+    mtime = max(st.st_mtime for st in file_stats)
+    size = sum(st.st_size for st in file_stats)
+    if known and known.mtime == mtime and known.size == size:
+        return True, None
+
+    contents = [f.read_bytes() for f in files]
+    digest = hashlib.sha256()
+    for content in contents:
+        digest.update(hashlib.sha256(content).digest())
+    parsed = ParsedProduct(
+        path=f"products/{product_dir.name}", mtime=mtime, size=size, content_hash=digest.hexdigest()
+    )
+    if known and known.content_hash == parsed.content_hash:
+        return True, parsed
+
+    data = load_json_bytes(contents[0], data_file)
+    ai_data = load_json_bytes(contents[1], ai_file) if len(contents) > 1 else {}
+    if not isinstance(data, dict):
+        return True, None
+
+    # parse_product reads the v1 listing shape; a v3 record is the variation itself
+    product_id = data.get("product_id") or product_dir.name
+    variation_data = {"variation": {**data, "id": product_id}}
+    parsed.brand_name = data.get("brand")
+    parsed.category_name = data.get("super_category")
+    parsed.memberships = category_memberships(data)
+    parsed.rows = ProductRows(
+        product=parse_product(variation_data, ai_data),
+        images=parse_v3_images(data, image_root, product_dir.name),
+        nutrition_facts=parse_nutrition_facts(ai_data),
+        ingredients=parse_ingredients(ai_data),
+        external_brand_id=data.get("brand_id"),
+        manifest=dict(
+            path=parsed.path, layout=MANIFEST_LAYOUT, mtime=mtime, size=size, content_hash=parsed.content_hash
+        ),
+    )
+    return True, parsed
+
+
+def load_listing_categories(session: Session) -> Dict[int, int]:
+    """Primary category id of every product imported from a v1 listing (see migrate_data)."""
+    statement = (
+        select(Product.id, Product.category_id)
+        .join(MigrationManifest, MigrationManifest.product_id == Product.id)
+        .where(MigrationManifest.layout == "listings")
+        .distinct()
+    )
+    return dict(session.exec(statement).all())
+
+
+def parse_product_dirs(
+    product_dirs: List[Path],
+    image_root: str,
+    known: Dict[str, ManifestEntry]
+) -> ParsedChunk:
+    """Parse every new or changed product directory of a chunk."""
+    parsed = ParsedChunk()
+    for product_dir in product_dirs:
+        path = f"products/{product_dir.name}"
+        try:
+            present, product = parse_product_dir(product_dir, image_root, known.get(path))
+        except Exception as e:
+            logger.error(f"Error processing product {product_dir}: {e}", exc_info=True)
+            parsed.errors[type(e).__name__] = parsed.errors.get(type(e).__name__, 0) + 1
+            continue
+        if present:
+            parsed.seen.append(path)
+        if product is not None:
+            parsed.products.append(product)
+    return parsed
+
+
+def import_v3_products(
+    output_dir: Path = DEFAULT_OUTPUT_DIR,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = DEFAULT_WORKERS,
+    queue_size: Optional[int] = None,
+    full: bool = False
+):
+    """Import the products of a scraper-v3 output directory."""
+    products_dir = output_dir / "products"
+    if not products_dir.exists():
+        logger.error(f"{products_dir} not found!")
+        return
+    logger.info(f"Importing scraper-v3 products from {products_dir}...")
+
+    timer = PhaseTimer()
+    with timer.phase("create tables"):
+        create_db_and_tables()
+    # Indexes an interrupted `migrate_data --fast-initial-load` left dropped
+    with timer.phase("restore indexes"):
+        create_indexes(engine, secondary_indexes())
+    stats: Dict[str, Any] = {"brands": set(), "unchanged": 0, "skipped": 0, "errors": Counter(), "vanished": 0}
+    image_root = image_root_for(output_dir)
+
+    with Session(engine) as session:
+        with timer.phase("lookups"):
+            lookups = MigrationLookups.load(session)
+        with timer.phase("super categories"):
+            super_category_map = migrate_super_categories(session, lookups)
+        with timer.phase("categories"):
+            category_map = migrate_categories_and_build_map(session, lookups, super_category_map)
+        with timer.phase("manifest"):
+            manifest = load_manifest(session, MANIFEST_LAYOUT)
+            listing_categories = load_listing_categories(session)
+        known = {} if full else manifest
+        seen_paths: Set[str] = set()
+        # Variation ids by external id, so products imported from v1 listings are updated in place
+        variation_ids = {key[1]: key[2] for key in lookups.products if key[0] == DataSource.SWIGGY}
+
+        product_dirs = sorted(d for d in products_dir.iterdir() if d.is_dir())
+        tasks = [
+            (chunk, image_root, {f"products/{d.name}": known[f"products/{d.name}"]
+                                 for d in chunk if f"products/{d.name}" in known})
+            for chunk in chunks(product_dirs, PARSE_CHUNK_SIZE)
+        ]
+        logger.info(f"Parsing {len(product_dirs)} product directories with {workers} worker(s)...")
+
+        loader = create_loader(session, lookups, batch_size)
+        with timer.phase("load products"):
+            for parsed in iter_in_pool(parse_product_dirs, tasks, workers, queue_size or max(2 * workers, 1)):
+                queue_products(session, lookups, loader, parsed, manifest, seen_paths, variation_ids,
+                               listing_categories, category_map, super_category_map, stats)
+            loader.flush()
+        with timer.phase("deactivate vanished"):
+            stats["vanished"] = deactivate_vanished(session, manifest, seen_paths)
+        catalog_version = bump_catalog_version(session)
+
+    logger.info("\nImport completed!")
+    logger.info(f"Brands: {len(stats['brands'])}")
+    logger.info(f"Products imported: {loader.stats['products']}")
+    logger.info(f"Products updated: {loader.stats['updated']} (re-read but identical: {loader.stats['unchanged']})")
+    logger.info(f"Products from v1 listings (category links only): {loader.stats['children_only']}")
+    logger.info(f"Images / nutrition facts / ingredients / category links written: {loader.stats['images']} / "
+                f"{loader.stats['nutrition_facts']} / {loader.stats['ingredients']} / "
+                f"{loader.stats['category_links']} ({loader.stats['children_deleted']} stale rows deleted)")
+    logger.info(f"Products skipped: {stats['skipped'] + loader.stats['skipped']} "
+                f"({loader.stats['invalid']} missing required values)")
+    logger.info(f"Unchanged since last run: {stats['unchanged']}")
+    logger.info(f"Vanished (marked inactive): {stats['vanished']}")
+    logger.info(f"Errors: {sum(stats['errors'].values())} {dict(stats['errors']) or ''}")
+    logger.info(f"Products/sec while loading: {loader.products_per_second():.0f}")
+    logger.info(f"Catalog version: {catalog_version}")
+    logger.info(f"Phase timings:\n{timer.report()}")
+
+
+def queue_products(
+    session: Session,
+    lookups: MigrationLookups,
+    loader: BulkLoader,
+    parsed: ParsedChunk,
+    manifest: Dict[str, ManifestEntry],
+    seen_paths: Set[str],
+    variation_ids: Dict[str, Optional[str]],
+    listing_categories: Dict[int, int],
+    category_map: Dict[str, Tuple[int, int]],
+    super_category_map: Dict[str, int],
+    stats: Dict[str, Any]
+) -> None:
+    """
+    Resolve brands and categories of a parsed chunk and queue its products on the loader.
+
+    Products a v1 listing provides keep the listing's columns, images, nutrition facts and
+    ingredients; v3 only replaces their category links, keeping the listing's primary category.
+    """
+    stats["errors"].update(parsed.errors)
+    stats["unchanged"] += len(parsed.seen) - len(parsed.products)
+    seen_paths.update(parsed.seen)
+
+    for product in parsed.products:
+        manifest_entry = dict(
+            path=product.path, layout=MANIFEST_LAYOUT, mtime=product.mtime, size=product.size,
+            content_hash=product.content_hash
+        )
+        rows = product.rows
+        if rows is None:
+            # Same content with a new mtime
+            stats["unchanged"] += 1
+            known = manifest.get(product.path)
+            loader.add_manifest({**manifest_entry, "product_id": known.product_id if known else None})
+            continue
+        try:
+            external_id = rows.product["primary_external_id"]
+            # v3 output has no parent product id; the external id stands in, as ON CONFLICT never matches NULL
+            rows.product["primary_external_variation_id"] = variation_ids.get(external_id) or external_id
+            listing_category_id = listing_categories.get(lookups.products.get(rows.key))
+            if listing_category_id is not None:
+                category_ids = [listing_category_id] + [
+                    resolve_category(session, lookups, name, category_map, super_category_map)[1]
+                    for name in product.memberships
+                ]
+                rows.children_only = LISTING_PRODUCT_CHILDREN
+                rows.category_links = [dict(category_id=c) for c in dict.fromkeys(category_ids)]
+                loader.add(rows)
+                continue
+
+            brand_id = migrate_brand(session, lookups, {"brand_name": product.brand_name})
+            if not brand_id or not product.category_name:
+                logger.warning(f"No brand or 'super_category' field for {product.path}. Skipping.")
+                stats["skipped"] += 1
+                loader.add_manifest({**manifest_entry, "product_id": None})
+                continue
+            stats["brands"].add(brand_id)
+
+            super_category_id, category_id = resolve_category(
+                session, lookups, product.category_name, category_map, super_category_map
+            )
+            category_ids = [category_id] + [
+                resolve_category(session, lookups, name, category_map, super_category_map)[1]
+                for name in product.memberships
+            ]
+            rows.product.update(
+                brand_id=brand_id,
+                super_category_id=super_category_id,
+                category_id=category_id,
+            )
+            rows.category_links = [dict(category_id=c) for c in dict.fromkeys(category_ids)]
+            loader.add(rows)
+
+        except SQLAlchemyError:
+            # A failed write leaves the session unusable; stop instead of skipping
+            raise
+        except Exception as e:
+            logger.error(f"Error processing product {product.path}: {e}", exc_info=True)
+            stats["errors"][type(e).__name__] += 1
+
+
+def main():
+    """Run the import from command line arguments."""
+    parser = argparse.ArgumentParser(description="Import scraper-v3 product output into the database")
+    parser.add_argument("--output-dir", type=Path, default=DEFAULT_OUTPUT_DIR,
+                        help="scraper-v3 output directory holding products/<product_id>/data.json")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Products upserted and committed per batch")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Processes parsing JSON (1 parses in the writer process)")
+    parser.add_argument("--queue-size", type=int, default=None,
+                        help="Parsed chunks buffered ahead of the writer (default: 2 x workers)")
+    parser.add_argument("--full", action="store_true",
+                        help="Re-read every product directory, ignoring the manifest")
+    args = parser.parse_args()
+    import_v3_products(
+        output_dir=args.output_dir, batch_size=args.batch_size, workers=args.workers,
+        queue_size=args.queue_size, full=args.full
+    )
+
+
+if __name__ == "__main__":
+    main()
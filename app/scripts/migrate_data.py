@@ -1,18 +1,31 @@
 """Script to migrate scraped data to the database."""
+import argparse
+import hashlib
 import json
-import os
 import logging
-from pathlib import Path
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, Any, List, Set, Optional
-from sqlmodel import Session, create_engine, select
-from sqlalchemy.exc import IntegrityError
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterator, List, NamedTuple, Set, Optional, Tuple
+from sqlalchemy import delete, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, select
 
 from ..models import (
-    Brand, SuperCategory, Category, Product, ProductImage,
-    NutritionFact, Ingredient, DataSource, VegStatus, ProcessingLevel
+    Brand, SuperCategory, Category, DataSource, VegStatus, ProcessingLevel,
+    ProductSourceMapping, MigrationManifest, MigrationRun, MigrationCheckpoint
 )
 from ..database import engine, create_db_and_tables
+from ..catalog import bump_catalog_version
+from .profiling import MigrationProfiler, PhaseTimer
+from .bulk_loader import (
+    BulkLoader, MigrationLookups, ProductRows, DEFAULT_BATCH_SIZE,
+    analyze_database, chunks, create_indexes, create_loader, drop_secondary_indexes, secondary_indexes
+)
 
 # Setup logging
 logging.basicConfig(
@@ -21,6 +34,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+DEFAULT_WORKERS = os.cpu_count() or 1
+
 
 def load_json_file(file_path: Path) -> Dict[str, Any] | List[Any]:
     """Load JSON file safely."""
@@ -64,8 +79,8 @@ def safe_enum(value: Any, enum_class) -> Any:
         return None
 
 
-def migrate_super_categories(session: Session) -> Dict[str, SuperCategory]:
-    """Migrate super categories from super_categories.json."""
+def migrate_super_categories(session: Session, lookups: MigrationLookups) -> Dict[str, int]:
+    """Migrate super categories from super_categories.json; returns name -> id."""
     logger.info("Migrating super categories from super_categories.json...")
     super_categories_file = Path("scraped_data/swiggy/categories/super_categories.json")
     super_category_map = {}
@@ -84,11 +99,8 @@ def migrate_super_categories(session: Session) -> Dict[str, SuperCategory]:
         if not name:
             continue
 
-        statement = select(SuperCategory).where(SuperCategory.name == name)
-        existing_sc = session.exec(statement).first()
-
-        if existing_sc:
-            super_category_map[name] = existing_sc
+        if name in lookups.super_categories:
+            super_category_map[name] = lookups.super_categories[name]
             continue
 
         image_filename = sc_data.get("image_filename")
@@ -100,30 +112,29 @@ def migrate_super_categories(session: Session) -> Dict[str, SuperCategory]:
             taxonomy_type=sc_data.get("taxonomyType")
         )
         session.add(super_category)
-        try:
-            session.commit()
-            session.refresh(super_category)
-            super_category_map[name] = super_category
-        except IntegrityError:
-            session.rollback()
-            existing_sc = session.exec(select(SuperCategory).where(SuperCategory.name == name)).one()
-            super_category_map[name] = existing_sc
+        session.flush()
+        super_category_map[name] = lookups.super_categories[name] = super_category.id
 
+    session.commit()
     logger.info(f"Loaded {len(super_category_map)} super categories.")
     return super_category_map
 
 
-def migrate_categories_and_build_map(session: Session, super_category_map: Dict[str, SuperCategory]) -> Dict[str, Category]:
-    """Migrate categories from metadata files and build a mapping."""
+def migrate_categories_and_build_map(
+    session: Session,
+    lookups: MigrationLookups,
+    super_category_map: Dict[str, int]
+) -> Dict[str, Tuple[int, int]]:
+    """Migrate categories from metadata files and build a map of name -> (super category id, category id)."""
     logger.info("Migrating categories from metadata files...")
     categories_dir = Path("scraped_data/swiggy/categories")
-    category_map: Dict[str, Category] = {}
+    category_map: Dict[str, Tuple[int, int]] = {}
 
     for metadata_file in categories_dir.glob("*_metadata.json"):
         super_category_name_from_file = metadata_file.stem.replace("_metadata", "").replace("_", " ")
 
-        super_category = super_category_map.get(super_category_name_from_file)
-        if not super_category:
+        super_category_id = super_category_map.get(super_category_name_from_file)
+        if not super_category_id:
             logger.warning(f"SuperCategory '{super_category_name_from_file}' from file name not in map. Skipping {metadata_file.name}")
             continue
 
@@ -148,12 +159,9 @@ def migrate_categories_and_build_map(session: Session, super_category_map: Dict[
             if not category_name:
                 continue
 
-            statement = select(Category).where(Category.name == category_name, Category.super_category_id == super_category.id)
-            existing_cat = session.exec(statement).first()
-
-            if existing_cat:
-                if category_name not in category_map:
-                    category_map[category_name] = existing_cat
+            existing_id = lookups.categories.get((category_name, super_category_id))
+            if existing_id:
+                category_map.setdefault(category_name, (super_category_id, existing_id))
                 continue
 
             image_filename = item.get("image_filename")
@@ -162,95 +170,58 @@ def migrate_categories_and_build_map(session: Session, super_category_map: Dict[
             category = Category(
                 name=category_name,
                 image_filename=image_path,
-                super_category_id=super_category.id,
+                super_category_id=super_category_id,
                 product_count=item.get("product_count", 0),
                 age_consent_required=item.get("age_consent_required", False)
             )
             session.add(category)
-            try:
-                session.commit()
-                session.refresh(category)
-                if category_name not in category_map:
-                    category_map[category_name] = category
-                logger.info(f"Created Category: '{category_name}' under SuperCategory: '{super_category.name}'")
-            except IntegrityError:
-                session.rollback()
-                existing_cat = session.exec(select(Category).where(Category.name == category_name, Category.super_category_id == super_category.id)).first()
-                if existing_cat and category_name not in category_map:
-                    category_map[category_name] = existing_cat
+            session.flush()
+            lookups.categories[(category_name, super_category_id)] = category.id
+            category_map.setdefault(category_name, (super_category_id, category.id))
+            logger.info(f"Created Category: '{category_name}' under SuperCategory: '{super_category_name_from_file}'")
 
+    session.commit()
     logger.info(f"Built map with {len(category_map)} categories.")
     return category_map
 
 
-def migrate_brand(session: Session, brand_data: Dict[str, Any]) -> Optional[Brand]:
-    """Migrate a single brand."""
+def migrate_brand(session: Session, lookups: MigrationLookups, brand_data: Dict[str, Any]) -> Optional[int]:
+    """Get or create a brand and return its id; new brands are committed with the next product batch."""
     brand_name = brand_data.get("brand_name")
     if not brand_name:
         return None
     
-    statement = select(Brand).where(Brand.name == brand_name)
-    existing_brand = session.exec(statement).first()
-    
-    if existing_brand:
-        return existing_brand
+    if brand_name in lookups.brands:
+        return lookups.brands[brand_name]
     
     brand = Brand(name=brand_name)
     session.add(brand)
-    try:
-        session.commit()
-        session.refresh(brand)
-        logger.info(f"Created brand: {brand_name}")
-        return brand
-    except IntegrityError:
-        session.rollback()
-        return session.exec(select(Brand).where(Brand.name == brand_name)).one()
-
-
-def migrate_product(
-    session: Session, 
-    variation_data: Dict[str, Any], 
-    ai_data: Dict[str, Any],
-    brand: Brand,
-    super_category: SuperCategory,
-    category: Category,
-    seen_barcodes: Set[str]
-) -> Optional[Product]:
-    """Migrate a single product with its variation and AI data."""
-    
+    session.flush()
+    lookups.brands[brand_name] = brand.id
+    logger.info(f"Created brand: {brand_name}")
+    return brand.id
+
+
+def json_list(data: Dict[str, Any], key: str) -> Optional[str]:
+    """JSON-encode a list field, or None when it is missing or empty."""
+    return json.dumps(data.get(key, [])) if data and data.get(key) else None
+
+
+def parse_product(variation_data: Dict[str, Any], ai_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Product column values from data.json and parsed_ai.json, without brand and category ids."""
     variation = variation_data.get("variation", {})
     price_info = variation.get("price", {})
     
     barcode = ai_data.get("barcode") if ai_data else None
     if barcode:
-        barcode = barcode.strip()
-        if not barcode:
-            barcode = None
-    
-    if barcode:
-        if barcode in seen_barcodes:
-            logger.warning(f"Duplicate barcode {barcode} found in this session for '{variation.get('display_name')}'. Skipping.")
-            return None
-        
-        existing_product = session.exec(select(Product).where(Product.barcode == barcode)).first()
-        if existing_product:
-            logger.info(f"Barcode {barcode} already exists in DB for product '{existing_product.display_name}'. Skipping.")
-            return None
-        
-        seen_barcodes.add(barcode)
+        barcode = barcode.strip() or None
     
-    veg_status = safe_enum(ai_data.get("veg_non_veg") if ai_data else None, VegStatus)
-    processing_level = safe_enum(ai_data.get("processing_level") if ai_data else None, ProcessingLevel)
-    
-    product = Product(
+    return dict(
         name=ai_data.get("product_name") if ai_data else variation.get("product_name_without_brand", ""),
         display_name=variation.get("display_name", ""),
         primary_source=DataSource.SWIGGY,
         primary_external_id=variation.get("id", ""),
         primary_external_variation_id=variation_data.get("parent_product", {}).get("product_id"),
-        brand_id=brand.id,
-        super_category_id=super_category.id,
-        category_id=category.id,
         sub_category_l3=variation.get("category"), # Mapping product's 'category' to sub_category_l3
         sub_category_l4=variation.get("sub_category_l3"),
         sub_category_l5=variation.get("sub_category_l4"),
@@ -267,9 +238,9 @@ def migrate_product(
         product_type=variation.get("scm_item_type"),
         filters_tag=variation.get("filters_tag"),
         barcode=barcode,
-        veg_status=veg_status,
+        veg_status=safe_enum(ai_data.get("veg_non_veg") if ai_data else None, VegStatus),
         health_rating=safe_int(ai_data.get("health_rating")) if ai_data else None,
-        processing_level=processing_level,
+        processing_level=safe_enum(ai_data.get("processing_level") if ai_data else None, ProcessingLevel),
         country_of_origin=ai_data.get("country_of_origin") if ai_data else None,
         net_quantity_value=safe_float(ai_data.get("net_quantity_value")) if ai_data else None,
         net_quantity_unit=ai_data.get("net_quantity_unit") if ai_data else None,
@@ -279,88 +250,67 @@ def migrate_product(
         ingredients_string=ai_data.get("ingredients_string") if ai_data else None,
         storage_instructions=ai_data.get("storage_instructions") if ai_data else None,
         cooking_instructions=ai_data.get("cooking_instructions") if ai_data else None,
-        allergens=json.dumps(ai_data.get("allergens", [])) if ai_data and ai_data.get("allergens") else None,
-        certifications=json.dumps(ai_data.get("certifications", [])) if ai_data and ai_data.get("certifications") else None,
-        positive_health_aspects=json.dumps(ai_data.get("positive_health_aspects", [])) if ai_data and ai_data.get("positive_health_aspects") else None,
-        negative_health_aspects=json.dumps(ai_data.get("negative_health_aspects", [])) if ai_data and ai_data.get("negative_health_aspects") else None,
-        preservatives=json.dumps(ai_data.get("preservatives", [])) if ai_data and ai_data.get("preservatives") else None,
-        ins_numbers_found=json.dumps(ai_data.get("ins_numbers_found", [])) if ai_data and ai_data.get("ins_numbers_found") else None,
-        additives=json.dumps(ai_data.get("additives", [])) if ai_data and ai_data.get("additives") else None,
-        alarming_ingredients=json.dumps(ai_data.get("alarming_ingredients", [])) if ai_data and ai_data.get("alarming_ingredients") else None
+        allergens=json_list(ai_data, "allergens"),
+        certifications=json_list(ai_data, "certifications"),
+        positive_health_aspects=json_list(ai_data, "positive_health_aspects"),
+        negative_health_aspects=json_list(ai_data, "negative_health_aspects"),
+        preservatives=json_list(ai_data, "preservatives"),
+        ins_numbers_found=json_list(ai_data, "ins_numbers_found"),
+        additives=json_list(ai_data, "additives"),
+        alarming_ingredients=json_list(ai_data, "alarming_ingredients"),
     )
-    
-    try:
-        session.add(product)
-        session.commit()
-        session.refresh(product)
-        logger.info(f"Created product: {product.display_name}")
-        return product
-    except IntegrityError as e:
-        session.rollback()
-        logger.error(f"Error creating product {product.display_name}: {e}")
-        return None
 
 
-def migrate_product_images(session: Session, product: Product, variation_data: Dict[str, Any], brand_id: str, variation_id: str):
-    """Migrate product images."""
+def parse_images(variation_data: Dict[str, Any], brand_id: str, variation_id: str) -> List[Dict[str, Any]]:
+    """Product image rows, one per distinct image path."""
     variation = variation_data.get("variation", {})
     images = variation.get("images", [])
+    # Content-addressed blob paths written by the downloader, keyed by filename
+    image_blobs = variation_data.get("image_blobs") or {}
+    seen_paths: Set[str] = set()
+    rows = []
     
     for i, image_catalog_path in enumerate(images):
         filename = Path(image_catalog_path).name
-        image_path = f"swiggy/listings/{brand_id}/{variation_id}/images/{filename}"
-        
-        statement = select(ProductImage).where(
-            ProductImage.product_id == product.id,
-            ProductImage.filename == image_path
-        )
-        if session.exec(statement).first():
+        blob_key = filename if Path(filename).suffix else f"{filename}.png"
+        image_path = image_blobs.get(blob_key) or f"swiggy/listings/{brand_id}/{variation_id}/images/{filename}"
+        if image_path in seen_paths:
             continue
-        
-        product_image = ProductImage(
-            product_id=product.id,
-            filename=image_path,
-            order_index=i,
-            is_primary=(i == 0)
-        )
-        session.add(product_image)
-    
-    if images:
-        try:
-            session.commit()
-        except IntegrityError as e:
-            session.rollback()
-            logger.error(f"Error committing images for {product.display_name}: {e}")
+        seen_paths.add(image_path)
+        rows.append(dict(filename=image_path, order_index=i, is_primary=(i == 0)))
+    return rows
 
 
-def migrate_nutrition_facts(session: Session, product: Product, ai_data: Dict[str, Any]):
-    """Migrate nutrition facts for a product."""
+def parse_nutrition_facts(ai_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Nutrition fact rows; a nutrient listed twice keeps its first value."""
     if not ai_data or not ai_data.get("nutrition_info_table"):
-        return
+        return []
     
+    rows = []
+    seen_nutrients: Set[str] = set()
     for item in ai_data["nutrition_info_table"]:
         if not isinstance(item, dict): continue
-        session.add(NutritionFact(
-            product_id=product.id,
-            nutrient=item.get("nutrient", ""),
+        nutrient = item.get("nutrient", "")
+        if nutrient in seen_nutrients: continue
+        seen_nutrients.add(nutrient)
+        rows.append(dict(
+            nutrient=nutrient,
             value=safe_float(item.get("value")) or 0.0,
             unit=item.get("unit", ""),
             rda_percentage=safe_float(item.get("rda_percentage"))
         ))
-    try:
-        session.commit()
-    except IntegrityError:
-        session.rollback()
+    return rows
+
 
-def migrate_ingredients(session: Session, product: Product, ai_data: Dict[str, Any]):
-    """Migrate ingredients for a product."""
+def parse_ingredients(ai_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Ingredient rows in label order."""
     if not ai_data or not ai_data.get("parsed_ingredients"):
-        return
+        return []
 
+    rows = []
     for i, item in enumerate(ai_data["parsed_ingredients"]):
         if not isinstance(item, dict): continue
-        session.add(Ingredient(
-            product_id=product.id,
+        rows.append(dict(
             name=item.get("name", ""),
             percentage=safe_float(item.get("percentage")),
             is_alarming=item.get("is_alarming", False),
@@ -369,130 +319,572 @@ def migrate_ingredients(session: Session, product: Product, ai_data: Dict[str, A
             ins_numbers=json.dumps(item.get("ins_numbers", [])) if item.get("ins_numbers") else None,
             additives=json.dumps(item.get("additives", [])) if item.get("additives") else None
         ))
+    return rows
+
+
+class ManifestEntry(NamedTuple):
+    """Recorded state of a variation directory (see MigrationManifest)."""
+    mtime: float
+    size: int
+    content_hash: str
+    product_id: Optional[int]
+
+
+@dataclass
+class ParsedVariation:
+    """A new or changed variation directory; `rows` is None when only its mtime changed."""
+    name: str
+    path: str
+    mtime: float
+    size: int
+    content_hash: str
+    category_name: Optional[str] = None
+    rows: Optional[ProductRows] = None
+
+
+def load_manifest(session: Session, layout: str = "listings") -> Dict[str, ManifestEntry]:
+    """Manifest rows of one source layout, keyed by path."""
+    statement = select(
+        MigrationManifest.path, MigrationManifest.mtime, MigrationManifest.size,
+        MigrationManifest.content_hash, MigrationManifest.product_id
+    ).where(MigrationManifest.layout == layout)
+    return {path: ManifestEntry(*values) for path, *values in session.exec(statement).all()}
+
+
+def load_json_bytes(content: bytes, file_path: Path) -> Dict[str, Any] | List[Any]:
+    """Parse JSON file contents safely."""
     try:
+        return json.loads(content)
+    except json.JSONDecodeError as e:
+        logger.error(f"Error loading {file_path}: {e}")
+        return {}
+
+
+def parse_variation(
+    variation_dir: Path,
+    brand_id: str,
+    known: Optional[ManifestEntry] = None
+) -> Tuple[bool, Optional[ParsedVariation]]:
+    """
+    Read a variation directory unless the manifest shows it unchanged.
+    Returns (whether it holds a data.json, the parsed variation if it is new or changed).
+    """
+    data_file = variation_dir / "data.json"
+    ai_file = variation_dir / "parsed_ai.json"
+    if not data_file.exists():
+        return False, None
+
+    files = [data_file, ai_file] if ai_file.exists() else [data_file]
+    file_stats = [f.stat() for f in files]
+    mtime = max(st.st_mtime for st in file_stats)
+    size = sum(st.st_size for st in file_stats)
+    if known and known.mtime == mtime and known.size == size:
+        return True, None
+
+    contents = [f.read_bytes() for f in files]
+    digest = hashlib.sha256()
+    for content in contents:
+        digest.update(hashlib.sha256(content).digest())
+    parsed = ParsedVariation(
+        name=variation_dir.name, path=f"{brand_id}/{variation_dir.name}",
+        mtime=mtime, size=size, content_hash=digest.hexdigest()
+    )
+    if known and known.content_hash == parsed.content_hash:
+        return True, parsed
+
+    variation_data = load_json_bytes(contents[0], data_file)
+    ai_data = load_json_bytes(contents[1], ai_file) if len(contents) > 1 else {}
+    if not isinstance(variation_data, dict):
+        return True, None
+
+    parsed.category_name = variation_data.get("variation", {}).get("super_category")
+    parsed.rows = ProductRows(
+        product=parse_product(variation_data, ai_data),
+        images=parse_images(variation_data, brand_id, variation_dir.name),
+        nutrition_facts=parse_nutrition_facts(ai_data),
+        ingredients=parse_ingredients(ai_data),
+        external_brand_id=brand_id,
+        manifest=dict(path=parsed.path, mtime=mtime, size=size, content_hash=parsed.content_hash),
+    )
+    return True, parsed
+
+
+@dataclass
+class ParsedBrand:
+    """Everything read from one brand directory; plain data so it can cross process boundaries."""
+    brand_dir: str
+    brand_info: Dict[str, Any]
+    variations: List[ParsedVariation] = field(default_factory=list)
+    # Manifest paths of every variation directory present, changed or not
+    seen: List[str] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)  # by exception type
+    parse_seconds: float = 0.0  # wall time spent parsing, in the worker
+
+
+def parse_brand_dir(brand_dir: Path, known: Optional[Dict[str, ManifestEntry]] = None) -> ParsedBrand:
+    """Parse brand_info.json and every new or changed variation directory of a brand."""
+    started = time.perf_counter()
+    known = known or {}
+    brand_info = load_json_file(brand_dir / "brand_info.json")
+    parsed = ParsedBrand(brand_dir=brand_dir.name, brand_info=brand_info if isinstance(brand_info, dict) else {})
+    if not parsed.brand_info:
+        return parsed
+
+    for variation_dir in sorted(brand_dir.iterdir()):
+        if not variation_dir.is_dir(): continue
+        path = f"{brand_dir.name}/{variation_dir.name}"
+        try:
+            present, variation = parse_variation(variation_dir, brand_dir.name, known.get(path))
+        except Exception as e:
+            logger.error(f"Error processing variation {variation_dir}: {e}", exc_info=True)
+            parsed.errors[type(e).__name__] = parsed.errors.get(type(e).__name__, 0) + 1
+            continue
+        if present:
+            parsed.seen.append(path)
+        if variation is not None:
+            parsed.variations.append(variation)
+    parsed.parse_seconds = time.perf_counter() - started
+    return parsed
+
+
+def deactivate_vanished(session: Session, manifest: Dict[str, ManifestEntry], seen_paths: Set[str]) -> int:
+    """Mark products whose variation directory disappeared as inactive at their source."""
+    vanished = [path for path in manifest if path not in seen_paths]
+    if not vanished:
+        return 0
+    now = datetime.utcnow()
+    product_ids = [manifest[path].product_id for path in vanished if manifest[path].product_id]
+    for ids_chunk in chunks(product_ids):
+        session.execute(
+            update(ProductSourceMapping)
+            .where(ProductSourceMapping.product_id.in_(ids_chunk), ProductSourceMapping.source == DataSource.SWIGGY)
+            .values(is_active=False, updated_at=now)
+        )
+    for paths_chunk in chunks(vanished):
+        session.execute(delete(MigrationManifest).where(MigrationManifest.path.in_(paths_chunk)))
+    session.commit()
+    return len(vanished)
+
+
+def iter_parsed_brands(
+    brand_dirs: List[Path],
+    known_by_brand: Dict[str, Dict[str, ManifestEntry]],
+    workers: int,
+    queue_size: int
+) -> Iterator[ParsedBrand]:
+    """Parse brand directories in a process pool and yield them in order."""
+    return iter_in_pool(
+        parse_brand_dir, [(brand_dir, known_by_brand.get(brand_dir.name)) for brand_dir in brand_dirs],
+        workers, queue_size
+    )
+
+
+def iter_in_pool(func: Callable[..., Any], arguments: List[Tuple], workers: int, queue_size: int) -> Iterator[Any]:
+    """
+    Call `func` on each argument tuple in a process pool and yield the results in order.
+    At most `queue_size` results wait for the consumer, which bounds memory use.
+    """
+    if workers <= 1:
+        for args in arguments:
+            yield func(*args)
+        return
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        for args in arguments:
+            if len(pending) >= queue_size:
+                yield pending.popleft().result()
+            pending.append(pool.submit(func, *args))
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def resolve_category(
+    session: Session,
+    lookups: MigrationLookups,
+    category_name: str,
+    category_map: Dict[str, Tuple[int, int]],
+    super_category_map: Dict[str, int]
+) -> Tuple[int, int]:
+    """(super category id, category id) of a product, creating the category under 'Uncategorized' if unknown."""
+    if category_name in category_map:
+        return category_map[category_name]
+
+    logger.warning(f"Category '{category_name}' not in map. Assigning to 'Uncategorized'.")
+    uncategorized_sc_name = "Uncategorized"
+    super_category_id = super_category_map.get(uncategorized_sc_name) or lookups.super_categories.get(uncategorized_sc_name)
+    if not super_category_id:
+        super_category = SuperCategory(name=uncategorized_sc_name)
+        session.add(super_category)
+        session.flush()
+        super_category_id = lookups.super_categories[uncategorized_sc_name] = super_category.id
+    super_category_map[uncategorized_sc_name] = super_category_id
+
+    category_id = lookups.categories.get((category_name, super_category_id))
+    if not category_id:
+        category = Category(name=category_name, super_category_id=super_category_id)
+        session.add(category)
+        session.flush()
+        category_id = lookups.categories[(category_name, super_category_id)] = category.id
+    category_map[category_name] = (super_category_id, category_id)
+    return category_map[category_name]
+
+
+def start_run(resume: bool) -> Tuple[int, Set[str], Dict[str, Any]]:
+    """
+    Start a migration run, or with `resume` reopen the latest one if it did not complete.
+    Returns (run id, brand directories already committed by the run, stats of its earlier attempts).
+    """
+    with Session(engine) as session:
+        run = session.exec(select(MigrationRun).order_by(MigrationRun.id.desc())).first() if resume else None
+        if run is not None and run.status == "completed":
+            logger.warning(f"Latest migration run {run.id} completed; starting a new run instead of resuming")
+            run = None
+        if run is None:
+            run = MigrationRun()
+        else:
+            run.attempts += 1
+            run.status = "running"
+            run.finished_at = None
+        session.add(run)
+        session.commit()
+        session.refresh(run)
+
+        completed = set(session.exec(
+            select(MigrationCheckpoint.brand_dir).where(MigrationCheckpoint.run_id == run.id)
+        ).all())
+        if completed:
+            logger.info(f"Resuming migration run {run.id} (attempt {run.attempts}), "
+                        f"skipping {len(completed)} completed brand directories")
+        return run.id, completed, json.loads(run.stats) if run.stats else {}
+
+
+def merge_run_stats(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the counters of a resumed attempt to those of the earlier attempts."""
+    merged = {name: value for name, value in previous.items() if name != "error"}
+    for name, value in current.items():
+        if isinstance(value, dict):
+            merged[name] = merge_run_stats(previous.get(name) or {}, value)
+        elif isinstance(value, (int, float)) and name != "products_per_second":
+            merged[name] = round((previous.get(name) or 0) + value, 3)
+        else:
+            merged[name] = value
+    return merged
+
+
+def finish_run(run_id: int, status: str, stats: Dict[str, Any]) -> None:
+    """Persist the outcome and stats of a migration run."""
+    with Session(engine) as session:
+        run = session.get(MigrationRun, run_id)
+        run.status = status
+        run.finished_at = datetime.utcnow()
+        run.stats = json.dumps(stats, default=str)
+        session.add(run)
         session.commit()
-    except IntegrityError:
-        session.rollback()
 
 
-def migrate_scraped_data():
-    """Main migration function."""
+@dataclass
+class MigrationResult:
+    """Outcome of loading the catalog."""
+    stats: Dict[str, Any]
+    loader: BulkLoader
+    super_categories: int
+    categories: int
+    catalog_version: int
+
+
+def migrate_scraped_data(
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = DEFAULT_WORKERS,
+    queue_size: Optional[int] = None,
+    full: bool = False,
+    fast_initial_load: bool = False,
+    resume: bool = False,
+    timer: Optional[PhaseTimer] = None
+) -> Optional[MigrationResult]:
+    """Main migration function; returns None if there was nothing to migrate."""
     logger.info("Starting data migration...")
-    create_db_and_tables()
-    
     scraped_data_dir = Path("scraped_data")
     if not scraped_data_dir.exists():
         logger.error("scraped_data directory not found!")
         return
-    
-    stats = {"brands": 0, "products": 0, "skipped": 0, "errors": 0}
-    seen_barcodes: Set[str] = set()
+
+    timer = timer or PhaseTimer()
+    with timer.phase("create tables"):
+        create_db_and_tables()
+    run_id, completed_brands, previous_stats = start_run(resume)
+    stats: Dict[str, Any] = {
+        "brands": 0, "unchanged": 0, "skipped": 0, "errors": Counter(), "vanished": 0,
+        "parsed_variations": 0, "parse_seconds": 0.0,
+    }
+    started = time.perf_counter()
+
+    deferred_indexes = []
+    if not fast_initial_load:
+        # create_all skips existing tables, so indexes a killed fast initial load dropped come back here
+        with timer.phase("restore indexes"):
+            create_indexes(engine, secondary_indexes())
+    else:
+        # Every insert would otherwise maintain all secondary indexes; build them once at the end
+        with timer.phase("drop indexes"):
+            deferred_indexes = drop_secondary_indexes(engine)
+        logger.info(f"Fast initial load: deferred {len(deferred_indexes)} secondary indexes")
+
+    try:
+        try:
+            result = load_catalog(
+                timer, run_id, completed_brands, stats,
+                batch_size, workers, queue_size or max(2 * workers, 1), full, fast_initial_load
+            )
+        finally:
+            if deferred_indexes:
+                with timer.phase("rebuild indexes"):
+                    create_indexes(engine, deferred_indexes)
+        if result is not None and fast_initial_load:
+            with timer.phase("analyze / vacuum"):
+                analyze_database(engine, vacuum=True)
+    except BaseException as e:
+        # Completed brands are checkpointed; `--resume` continues from there
+        stats["error"] = f"{type(e).__name__}: {e}"
+        finish_run(run_id, "failed", merge_run_stats(previous_stats, run_stats(stats, timer, started)))
+        logger.error(f"Migration run {run_id} failed; rerun with --resume to continue")
+        raise
+    if result is None:
+        finish_run(run_id, "failed", merge_run_stats(previous_stats, run_stats(stats, timer, started)))
+        return None
+
+    loader = result.loader
+    finish_run(run_id, "completed", merge_run_stats(previous_stats, run_stats(stats, timer, started)))
+    logger.info("\nMigration completed!")
+    logger.info(f"Run: {run_id}")
+    logger.info(f"Super categories: {result.super_categories}")
+    logger.info(f"Categories: {result.categories}")
+    logger.info(f"Brands migrated: {stats['brands']}")
+    logger.info(f"Products migrated: {loader.stats['products']}")
+    logger.info(f"Products updated: {loader.stats['updated']} (re-read but identical: {loader.stats['unchanged']})")
+    logger.info(f"Images / nutrition facts / ingredients written: {loader.stats['images']} / "
+                f"{loader.stats['nutrition_facts']} / {loader.stats['ingredients']} "
+                f"({loader.stats['children_deleted']} stale rows deleted)")
+    logger.info(f"Products skipped: {stats['skipped'] + loader.stats['skipped']} "
+                f"({loader.stats['invalid']} missing required values)")
+    logger.info(f"Unchanged since last run: {stats['unchanged']}")
+    logger.info(f"Vanished (marked inactive): {stats['vanished']}")
+    logger.info(f"Errors: {sum(stats['errors'].values())} {dict(stats['errors']) or ''}")
+    logger.info(f"Products/sec while loading: {loader.products_per_second():.0f}")
+    logger.info(f"Catalog version: {result.catalog_version}")
+    logger.info(f"Phase timings:\n{timer.report()}")
+    return result
+
+
+def run_stats(stats: Dict[str, Any], timer: PhaseTimer, started: float) -> Dict[str, Any]:
+    """Stats persisted on the MigrationRun row."""
+    loader_stats = stats.get("written", {})
+    written = sum(loader_stats.get(name, 0) for name in ("products", "updated", "unchanged"))
+    load_seconds = timer.durations.get("load products", 0.0)
+    return {
+        "brand_dirs": loader_stats.get("brand_dirs", 0),
+        "products_inserted": loader_stats.get("products", 0),
+        "products_updated": loader_stats.get("updated", 0),
+        "products_unchanged": loader_stats.get("unchanged", 0),
+        "skipped": stats["skipped"] + loader_stats.get("skipped", 0),
+        "invalid": loader_stats.get("invalid", 0),
+        "files_unchanged": stats["unchanged"],
+        "vanished": stats["vanished"],
+        "errors": sum(stats["errors"].values()),
+        "errors_by_type": dict(stats["errors"]),
+        "products_per_second": round(written / load_seconds, 1) if load_seconds else 0.0,
+        "elapsed_seconds": round(time.perf_counter() - started, 2),
+        "phase_seconds": {name: round(seconds, 3) for name, seconds in timer.durations.items()},
+        **({"error": stats["error"]} if "error" in stats else {}),
+    }
+
+
+def load_catalog(
+    timer: PhaseTimer,
+    run_id: int,
+    completed_brands: Set[str],
+    stats: Dict[str, Any],
+    batch_size: int,
+    workers: int,
+    queue_size: int,
+    full: bool,
+    fast_initial_load: bool
+) -> Optional[MigrationResult]:
+    """Import categories and listings, updating `stats`; None if the listings directory is missing."""
+    listings_dir = Path("scraped_data") / "swiggy" / "listings"
     
     with Session(engine) as session:
-        super_category_map = migrate_super_categories(session)
-        category_map = migrate_categories_and_build_map(session, super_category_map)
+        # Natural key -> id maps, loaded once so per-variation work runs no lookup queries
+        with timer.phase("lookups"):
+            lookups = MigrationLookups.load(session)
+        if fast_initial_load and lookups.products:
+            logger.warning("Fast initial load on a non-empty catalog: updates will run without secondary indexes")
+        with timer.phase("super categories"):
+            super_category_map = migrate_super_categories(session, lookups)
+        with timer.phase("categories"):
+            category_map = migrate_categories_and_build_map(session, lookups, super_category_map)
         
-        listings_dir = scraped_data_dir / "swiggy" / "listings"
         if not listings_dir.exists():
             logger.error("swiggy/listings directory not found!")
-            return
+            return None
         
-        for brand_dir in listings_dir.iterdir():
-            if not brand_dir.is_dir(): continue
-            
-            try:
-                brand_info = load_json_file(brand_dir / "brand_info.json")
-                if not brand_info: continue
-
-                brand = migrate_brand(session, brand_info)
-                if not brand: continue
-                stats["brands"] += 1
-                
-                for variation_dir in brand_dir.iterdir():
-                    if not variation_dir.is_dir(): continue
-                    
-                    try:
-                        data_file = variation_dir / "data.json"
-                        ai_file = variation_dir / "parsed_ai.json"
-                        if not data_file.exists(): continue
-
-                        variation_data = load_json_file(data_file)
-                        ai_data = load_json_file(ai_file) if ai_file.exists() else {}
-                        if not isinstance(variation_data, dict): continue
-                        
-                        variation = variation_data.get("variation", {})
-                        product_category_name = variation.get("super_category")
-                        
-                        if not product_category_name:
-                            logger.warning(f"No 'super_category' field for {variation_dir}. Skipping.")
-                            stats["skipped"] += 1
-                            continue
-
-                        category = category_map.get(product_category_name)
-                        super_category = None
-
-                        if category:
-                            super_category = session.get(SuperCategory, category.super_category_id)
-                        else:
-                            logger.warning(f"Category '{product_category_name}' not in map. Assigning to 'Uncategorized'.")
-                            uncategorized_sc_name = "Uncategorized"
-                            super_category = super_category_map.get(uncategorized_sc_name)
-                            if not super_category:
-                                super_category = SuperCategory(name=uncategorized_sc_name)
-                                session.add(super_category)
-                                try:
-                                    session.commit()
-                                    session.refresh(super_category)
-                                    super_category_map[uncategorized_sc_name] = super_category
-                                except IntegrityError:
-                                    session.rollback()
-                                    super_category = session.exec(select(SuperCategory).where(SuperCategory.name == uncategorized_sc_name)).one()
-                            
-                            category = session.exec(select(Category).where(Category.name == product_category_name, Category.super_category_id == super_category.id)).first()
-                            if not category:
-                                category = Category(name=product_category_name, super_category_id=super_category.id)
-                                session.add(category)
-                                try:
-                                    session.commit()
-                                    session.refresh(category)
-                                    category_map[product_category_name] = category
-                                except IntegrityError:
-                                    session.rollback()
-                                    category = session.exec(select(Category).where(Category.name == product_category_name, Category.super_category_id == super_category.id)).one()
-
-                        if not super_category or not category:
-                            logger.error(f"Could not determine category/super-category for {variation_dir}. Skipping.")
-                            stats["skipped"] += 1
-                            continue
-
-                        product = migrate_product(
-                            session, variation_data, ai_data, brand, super_category, category, seen_barcodes
-                        )
-                        
-                        if product:
-                            stats["products"] += 1
-                            migrate_product_images(session, product, variation_data, brand_dir.name, variation_dir.name)
-                            migrate_nutrition_facts(session, product, ai_data)
-                            migrate_ingredients(session, product, ai_data)
-                        else:
-                            stats["skipped"] += 1
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing variation {variation_dir}: {e}", exc_info=True)
-                        stats["errors"] += 1
+        # Only new or changed variation directories are read, unless --full
+        with timer.phase("manifest"):
+            manifest = load_manifest(session)
+        known_by_brand: Dict[str, Dict[str, ManifestEntry]] = {}
+        if not full:
+            for path, entry in manifest.items():
+                known_by_brand.setdefault(path.split("/", 1)[0], {})[path] = entry
+        # Brands committed by an earlier attempt of this run are neither re-read nor vanished
+        seen_paths = {path for path in manifest if path.split("/", 1)[0] in completed_brands}
+
+        brand_dirs = sorted(d for d in listings_dir.iterdir() if d.is_dir() and d.name not in completed_brands)
+        logger.info(f"Parsing {len(brand_dirs)} brand directories with {workers} worker(s)...")
+
+        # Workers parse JSON in parallel; this process is the only writer. Listings only know a
+        # product's primary category, so the memberships the v3 importer adds are kept
+        loader = create_loader(session, lookups, batch_size, PhaseTimer(timer.query_stats), append_only=("category_links",))
+        # Counters of committed products, kept in the run stats if the load fails
+        stats["written"] = loader.stats
+        with timer.phase("load products"):
+            load_listings(
+                session, lookups, loader, iter_parsed_brands(brand_dirs, known_by_brand, workers, queue_size),
+                manifest, seen_paths, category_map, super_category_map, stats, run_id
+            )
+            loader.flush()
+        with timer.phase("deactivate vanished"):
+            stats["vanished"] = deactivate_vanished(session, manifest, seen_paths)
+        # Let running API workers know the catalog changed
+        catalog_version = bump_catalog_version(session)
+
+    return MigrationResult(stats, loader, len(super_category_map), len(category_map), catalog_version)
+
+
+def load_listings(
+    session: Session,
+    lookups: MigrationLookups,
+    loader: BulkLoader,
+    parsed_brands: Iterator[ParsedBrand],
+    manifest: Dict[str, ManifestEntry],
+    seen_paths: Set[str],
+    category_map: Dict[str, Tuple[int, int]],
+    super_category_map: Dict[str, int],
+    stats: Dict[str, Any],
+    run_id: int
+) -> None:
+    """Resolve brands and categories of parsed brands and queue their products on the loader."""
+    for parsed in parsed_brands:
+        stats["errors"].update(parsed.errors)
+        stats["parsed_variations"] += sum(1 for variation in parsed.variations if variation.rows is not None)
+        stats["parse_seconds"] += parsed.parse_seconds
+        stats["unchanged"] += len(parsed.seen) - len(parsed.variations)
+        seen_paths.update(parsed.seen)
+        try:
+            brand_id = migrate_brand(session, lookups, parsed.brand_info)
+            if not brand_id:
+                loader.add_checkpoint(run_id, parsed.brand_dir)
+                continue
+            stats["brands"] += 1
             
-            except Exception as e:
-                logger.error(f"Error processing brand {brand_dir}: {e}", exc_info=True)
-                stats["errors"] += 1
+            for variation in parsed.variations:
+                manifest_entry = dict(
+                    path=variation.path, mtime=variation.mtime, size=variation.size,
+                    content_hash=variation.content_hash
+                )
+                rows = variation.rows
+                if rows is None:
+                    # Same content with a new mtime
+                    stats["unchanged"] += 1
+                    known = manifest.get(variation.path)
+                    loader.add_manifest({**manifest_entry, "product_id": known.product_id if known else None})
+                    continue
+                if not variation.category_name:
+                    logger.warning(f"No 'super_category' field for {variation.path}. Skipping.")
+                    stats["skipped"] += 1
+                    loader.add_manifest({**manifest_entry, "product_id": None})
+                    continue
+
+                super_category_id, category_id = resolve_category(
+                    session, lookups, variation.category_name, category_map, super_category_map
+                )
+                rows.product.update(
+                    brand_id=brand_id,
+                    super_category_id=super_category_id,
+                    category_id=category_id,
+                )
+                rows.category_links = [dict(category_id=category_id)]
+                loader.add(rows)
+        
+        except SQLAlchemyError:
+            # A failed write leaves the session unusable; stop instead of skipping
+            raise
+        except Exception as e:
+            logger.error(f"Error processing brand {parsed.brand_dir}: {e}", exc_info=True)
+            stats["errors"][type(e).__name__] += 1
+        # Written with the brand's last products, so a resumed run skips exactly the committed brands
+        loader.add_checkpoint(run_id, parsed.brand_dir)
+
+
+def main():
+    """Run the migration from command line arguments."""
+    parser = argparse.ArgumentParser(description="Import scraped data into the database")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Products upserted and committed per batch")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Processes parsing JSON (1 parses in the writer process)")
+    parser.add_argument("--queue-size", type=int, default=None,
+                        help="Parsed brands buffered ahead of the writer (default: 2 x workers)")
+    parser.add_argument("--full", action="store_true",
+                        help="Re-read every variation directory, ignoring the manifest")
+    parser.add_argument("--fast-initial-load", action="store_true",
+                        help="Drop secondary indexes during the load, then rebuild them and run ANALYZE/VACUUM")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the latest unfinished run, skipping brand directories it committed")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record phase timings, query counts and memory peaks in a JSON report")
+    parser.add_argument("--profile-report", type=Path, default=Path("migration_profile.json"),
+                        help="Where --profile writes its report")
+    parser.add_argument("--cprofile", type=Path, default=None,
+                        help="Also dump cProfile stats of the writer process to this file (implies --profile)")
+    args = parser.parse_args()
+    options = dict(
+        batch_size=args.batch_size, workers=args.workers, queue_size=args.queue_size, full=args.full,
+        fast_initial_load=args.fast_initial_load, resume=args.resume
+    )
+    if not (args.profile or args.cprofile):
+        migrate_scraped_data(**options)
+        return
 
-    logger.info("\nMigration completed!")
-    logger.info(f"Super categories: {len(super_category_map)}")
-    logger.info(f"Categories: {len(category_map)}")
-    logger.info(f"Brands migrated: {stats['brands']}")
-    logger.info(f"Products migrated: {stats['products']}")
-    logger.info(f"Products skipped: {stats['skipped']}")
-    logger.info(f"Errors: {stats['errors']}")
+    profiler = MigrationProfiler(args.cprofile)
+    result: Optional[MigrationResult] = None
+    sections: Dict[str, Any] = {"options": options}
+    try:
+        with profiler:
+            result = migrate_scraped_data(**options, timer=profiler.timer)
+    except BaseException as e:
+        # Measurements up to the failure are still worth keeping
+        sections["error"] = repr(e)
+        raise
+    finally:
+        if result is not None:
+            loader = result.loader
+            sections.update(
+                # Parse time is summed over worker processes; with --workers > 1 it overlaps the writer phases
+                parse={
+                    "brands": result.stats["brands"],
+                    "variations": result.stats["parsed_variations"],
+                    "worker_seconds": round(result.stats["parse_seconds"], 3),
+                },
+                loader_phases=loader.timer.as_dict(),
+                products_per_second=round(loader.products_per_second(), 1),
+                loader_stats=loader.stats,
+                stats={name: value for name, value in result.stats.items() if name != "written"},
+            )
+        profiler.write_report(args.profile_report, **sections)
 
 
 if __name__ == "__main__":
-    migrate_scraped_data()
\ No newline at end of file
+    main()
@@ -0,0 +1,122 @@
+"""Phase timing and profiling instrumentation for the import scripts."""
+import cProfile
+import json
+import logging
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..query_stats import QUERY_STATS_ENABLED, QueryStats, start_query_stats, stop_query_stats
+
+
+logger = logging.getLogger(__name__)
+
+
+class PhaseTimer:
+    """Accumulated wall time, and optionally SQL queries, per named migration phase."""
+
+    def __init__(self, query_stats: Optional[QueryStats] = None):
+        self.query_stats = query_stats
+        self.durations: Dict[str, float] = {}
+        self.queries: Dict[str, int] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        queries_before = self.query_stats.count if self.query_stats else 0
+        try:
+            yield
+        finally:
+            self.durations[name] = self.durations.get(name, 0.0) + time.perf_counter() - start
+            if self.query_stats:
+                self.queries[name] = self.queries.get(name, 0) + self.query_stats.count - queries_before
+
+    def report(self) -> str:
+        """Table of phases with their duration and share of the total."""
+        total = sum(self.durations.values()) or 1.0
+        lines = [f"{'phase':<20}{'seconds':>10}{'share':>8}" + (f"{'queries':>10}" if self.query_stats else "")]
+        lines += [
+            f"{name:<20}{seconds:>10.2f}{seconds / total:>8.1%}"
+            + (f"{self.queries.get(name, 0):>10}" if self.query_stats else "")
+            for name, seconds in self.durations.items()
+        ]
+        return "\n".join(lines)
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        """Seconds and queries per phase."""
+        return {
+            name: {"seconds": round(seconds, 4), **({"queries": self.queries.get(name, 0)} if self.query_stats else {})}
+            for name, seconds in self.durations.items()
+        }
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MigrationProfiler:
+    """
+    Profiles a migration run: per-phase wall time and SQL query counts, the tracemalloc peak of
+    Python allocations, peak RSS and optionally a cProfile dump. Only the writer process is
+    traced; parse workers report their own parse time.
+    """
+
+    def __init__(self, cprofile_path: Optional[Path] = None):
+        self.cprofile_path = cprofile_path
+        self.query_stats: Optional[QueryStats] = None
+        self.timer = PhaseTimer()
+        self.profile: Optional[cProfile.Profile] = None
+        self.elapsed = 0.0
+        self.tracemalloc_peak = 0
+
+    def __enter__(self) -> "MigrationProfiler":
+        if QUERY_STATS_ENABLED:
+            self.query_stats, self._token = start_query_stats()
+            self.timer = PhaseTimer(self.query_stats)
+        else:
+            logger.warning("QUERY_STATS=0: the profile report will not count queries")
+        tracemalloc.start()
+        if self.cprofile_path:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.elapsed = time.perf_counter() - self._started
+        if self.profile:
+            self.profile.disable()
+            self.profile.dump_stats(self.cprofile_path)
+            logger.info(f"Wrote cProfile stats to {self.cprofile_path} (view with `python -m pstats`)")
+        self.tracemalloc_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if self.query_stats:
+            stop_query_stats(self._token)
+
+    def write_report(self, path: Path, **sections: Any) -> Dict[str, Any]:
+        """Write the JSON report with the measurements and any extra sections; returns the report."""
+        report = {
+            "generated_at": datetime.utcnow().isoformat(),
+            "elapsed_seconds": round(self.elapsed, 3),
+            "phases": self.timer.as_dict(),
+            "queries": self.query_stats.count if self.query_stats else None,
+            "query_seconds": round(self.query_stats.duration, 3) if self.query_stats else None,
+            "tracemalloc_peak_bytes": self.tracemalloc_peak,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "cprofile": str(self.cprofile_path) if self.cprofile_path else None,
+            **sections,
+        }
+        path.write_text(json.dumps(report, indent=2, default=str))
+        logger.info(
+            f"Wrote profile report to {path}: {report['queries']} queries, "
+            f"tracemalloc peak {self.tracemalloc_peak / 2**20:.1f} MiB, peak RSS {report['peak_rss_bytes'] / 2**20:.1f} MiB"
+        )
+        return report
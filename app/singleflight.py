@@ -0,0 +1,50 @@
+"""Request coalescing: concurrent calls with the same key share one computation."""
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class _Call:
+    """An in-flight computation and its outcome."""
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Run at most one computation per key at a time; callers arriving meanwhile wait for it.
+
+    Endpoints are sync and run in the threadpool, so waiting blocks the worker thread
+    rather than the event loop.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (result, shared); shared is True when another caller did the work."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
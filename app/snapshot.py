@@ -0,0 +1,101 @@
+"""Read-only catalog snapshots produced by `python -m app.scripts.build_snapshot`."""
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlmodel import create_engine
+
+from .metrics import instrument_engine_pool
+from .query_stats import install_query_hooks
+
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "")  # empty serves reads from DATABASE_URL
+SNAPSHOT_CHECK_SECONDS = float(os.getenv("SNAPSHOT_CHECK_SECONDS", "5"))
+SNAPSHOT_MMAP_SIZE = int(os.getenv("SNAPSHOT_MMAP_SIZE", str(1024 ** 3)))
+SNAPSHOT_CACHE_SIZE_KB = int(os.getenv("SNAPSHOT_CACHE_SIZE_KB", str(256 * 1024)))
+
+CURRENT_POINTER = "CURRENT"
+
+
+def read_current_snapshot(snapshot_dir: Path) -> Optional[Path]:
+    """Resolve the snapshot file named by the directory's CURRENT pointer."""
+    try:
+        name = (snapshot_dir / CURRENT_POINTER).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    return snapshot_dir / name if name else None
+
+
+def publish_snapshot(snapshot_dir: Path, snapshot_path: Path) -> None:
+    """Atomically point CURRENT at a snapshot file."""
+    tmp_pointer = snapshot_dir / f".{CURRENT_POINTER}.tmp"
+    tmp_pointer.write_text(snapshot_path.name + "\n", encoding="utf-8")
+    os.replace(tmp_pointer, snapshot_dir / CURRENT_POINTER)
+
+
+def _configure_snapshot_connection(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA mmap_size={SNAPSHOT_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size=-{SNAPSHOT_CACHE_SIZE_KB}")
+    cursor.execute("PRAGMA query_only=1")
+    cursor.close()
+
+
+def create_snapshot_engine(snapshot_path: Path) -> Engine:
+    """Open a snapshot read-only; immutable=1 skips file locking and change detection."""
+    url = f"sqlite:///file:{snapshot_path.resolve()}?mode=ro&immutable=1&uri=true"
+    snapshot_engine = create_engine(url, connect_args={"check_same_thread": False}, echo=False)
+    event.listen(snapshot_engine, "connect", _configure_snapshot_connection)
+    install_query_hooks(snapshot_engine)
+    instrument_engine_pool(snapshot_engine, "snapshot")
+    return snapshot_engine
+
+
+class SnapshotManager:
+    """Serve reads from the current snapshot and switch to a new one without restarting."""
+
+    def __init__(self, snapshot_dir: str):
+        self.snapshot_dir = Path(snapshot_dir)
+        self.path: Optional[Path] = None
+        self.engine: Optional[Engine] = None
+        # Never checked: the first get_engine() reads CURRENT
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def get_engine(self) -> Optional[Engine]:
+        """Engine for the current snapshot, re-reading the CURRENT pointer at most every few seconds."""
+        now = time.monotonic()
+        # Throttled even without a snapshot, so a missing CURRENT isn't re-read on every request
+        if now - self._checked_at >= SNAPSHOT_CHECK_SECONDS:
+            with self._lock:
+                if now - self._checked_at >= SNAPSHOT_CHECK_SECONDS:
+                    self._checked_at = now
+                    self._switch_if_changed()
+        return self.engine
+
+    def _switch_if_changed(self) -> None:
+        path = read_current_snapshot(self.snapshot_dir)
+        if path is None or path == self.path:
+            return
+        if not path.exists():
+            logger.warning(f"Snapshot {path} named by {CURRENT_POINTER} does not exist; keeping {self.path}")
+            return
+
+        previous = self.engine
+        # Swap in a single assignment; requests already holding a session keep the old engine
+        self.engine = create_snapshot_engine(path)
+        self.path = path
+        logger.info(f"Serving reads from snapshot {path}")
+        if previous is not None:
+            # Closes idle connections; checked-out ones finish their request first
+            previous.dispose()
+
+
+snapshot_manager = SnapshotManager(SNAPSHOT_DIR) if SNAPSHOT_DIR else None
@@ -0,0 +1,54 @@
+"""Compare two load test result files.
+
+Example:
+    python -m benchmarks.compare benchmarks/results/before.json benchmarks/results/after.json
+"""
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+METRICS = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    """Load a results file written by benchmarks.load_test."""
+    with open(Path(path), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def format_change(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def main():
+    """Print per-endpoint deltas between two benchmark runs."""
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline", help="Baseline results JSON")
+    parser.add_argument("candidate", help="Candidate results JSON")
+    args = parser.parse_args()
+
+    baseline = load_results(args.baseline)
+    candidate = load_results(args.candidate)
+    print(f"baseline:  {baseline['git'].get('commit')} {baseline.get('label', '')}")
+    print(f"candidate: {candidate['git'].get('commit')} {candidate.get('label', '')}\n")
+
+    print(f"{'endpoint':<18}{'metric':<16}{'baseline':>12}{'candidate':>12}{'change':>10}")
+    endpoints = list(baseline["results"]["endpoints"]) + ["overall"]
+    for endpoint in endpoints:
+        if endpoint == "overall":
+            before, after = baseline["results"]["overall"], candidate["results"]["overall"]
+        else:
+            before = baseline["results"]["endpoints"].get(endpoint)
+            after = candidate["results"]["endpoints"].get(endpoint)
+            if not before or not after:
+                continue
+        for metric in METRICS:
+            print(f"{endpoint:<18}{metric:<16}{before[metric]:>12}{after[metric]:>12}"
+                  f"{format_change(before[metric], after[metric]):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Generate a synthetic product catalog directly into the app.models schema.
+
+Example:
+    python -m benchmarks.generate_catalog --products 100000 --database-url sqlite:///./bench.db
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from sqlalchemy import create_engine, insert, event
+from sqlmodel import SQLModel
+
+from app.models import (
+    Brand, SuperCategory, Category, Product, ProductImage, NutritionFact, Ingredient, User,
+    DataSource, VegStatus, ProcessingLevel
+)
+
+
+BENCH_USERNAME = "bench"
+BENCH_PASSWORD = "bench-password"
+
+SUPER_CATEGORY_NAMES = [
+    "Fresh Vegetables", "Fresh Fruits", "Dairy, Bread and Eggs", "Atta, Rice and Dal", "Masalas",
+    "Oils and Ghee", "Chips and Namkeens", "Biscuits and Cakes", "Chocolates", "Cold Drinks and Juices",
+    "Tea, Coffee and Milk drinks", "Instant Food and Frozen Food", "Sauces and Spreads", "Sweets",
+    "Cereals and Breakfast", "Dry Fruits and Seeds Mix", "Ice Creams and Frozen Desserts", "Baby Care",
+]
+WORDS = [
+    "Classic", "Masala", "Crunchy", "Organic", "Roasted", "Salted", "Spicy", "Tangy", "Creamy", "Golden",
+    "Premium", "Whole", "Multigrain", "Honey", "Chocolate", "Mango", "Cheese", "Pepper", "Lemon", "Garlic",
+    "Protein", "Millet", "Oats", "Almond", "Coconut", "Tomato", "Onion", "Mint", "Butter", "Vanilla",
+]
+NOUNS = ["Chips", "Cookies", "Noodles", "Juice", "Bar", "Flakes", "Sauce", "Mix", "Bites", "Paste", "Powder", "Rusk"]
+NUTRIENTS = [
+    ("energy", "kcal", 50, 600), ("protein", "g", 0, 30), ("total_carbohydrates", "g", 0, 90),
+    ("total_sugars", "g", 0, 60), ("added_sugars", "g", 0, 40), ("total_fat", "g", 0, 45),
+    ("saturated_fat", "g", 0, 25), ("trans_fat", "g", 0, 1), ("sodium", "mg", 0, 2000),
+    ("dietary_fiber", "g", 0, 15), ("cholesterol", "mg", 0, 80),
+]
+INGREDIENTS = [
+    "Refined Wheat Flour", "Sugar", "Edible Vegetable Oil", "Iodized Salt", "Milk Solids", "Cocoa Solids",
+    "Potato", "Rice Flour", "Corn Starch", "Spices and Condiments", "Emulsifier (INS 322)",
+    "Raising Agent (INS 500(ii))", "Citric Acid (INS 330)", "Natural Flavour", "Palm Oil", "Whole Wheat",
+]
+ALLERGENS = ["Wheat", "Milk", "Soya", "Nuts", "Sulphite", "Gluten", "Egg", "Sesame"]
+UNITS = [("g", 50, 1000), ("ml", 100, 2000), ("kg", 1, 5)]
+
+
+def _chunks(rows: List[Dict[str, Any]], size: int):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _sqlite_fast_load(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=MEMORY")
+    cursor.execute("PRAGMA synchronous=OFF")
+    cursor.close()
+
+
+def generate_catalog(database_url: str, products: int, seed: int = 42, batch_size: int = 5000) -> Dict[str, int]:
+    """Populate the database with a synthetic catalog and a benchmark user."""
+    # Imported here: app.auth pulls in app.database, which binds DATABASE_URL at import time
+    from app.auth import get_password_hash
+
+    rng = random.Random(seed)
+    engine = create_engine(database_url)
+    if database_url.startswith("sqlite"):
+        event.listen(engine, "connect", _sqlite_fast_load)
+    SQLModel.metadata.create_all(engine)
+
+    now = datetime.utcnow()
+    brand_count = max(10, products // 40)
+    counts = {"super_categories": 0, "categories": 0, "brands": 0, "products": 0,
+              "images": 0, "nutrition_facts": 0, "ingredients": 0}
+
+    with engine.begin() as conn:
+        super_categories = [
+            {"id": i + 1, "name": name, "image_filename": f"swiggy/categories/images/sc_{i + 1}.png",
+             "taxonomy_type": "Speciality taxonomy 1", "created_at": now, "updated_at": now}
+            for i, name in enumerate(SUPER_CATEGORY_NAMES)
+        ]
+        conn.execute(insert(SuperCategory), super_categories)
+
+        categories = []
+        for sc in super_categories:
+            for j in range(rng.randint(4, 10)):
+                categories.append({
+                    "id": len(categories) + 1, "name": f"{sc['name']} {rng.choice(WORDS)} {j}",
+                    "image_filename": f"swiggy/categories/images/c_{len(categories) + 1}.png",
+                    "super_category_id": sc["id"], "product_count": 0, "age_consent_required": False,
+                    "created_at": now, "updated_at": now,
+                })
+        conn.execute(insert(Category), categories)
+
+        brands = [{"id": i + 1, "name": f"Brand {i + 1} {rng.choice(WORDS)}", "created_at": now, "updated_at": now}
+                  for i in range(brand_count)]
+        conn.execute(insert(Brand), brands)
+
+        conn.execute(insert(User), [{
+            "username": BENCH_USERNAME, "email": f"{BENCH_USERNAME}@example.com", "full_name": "Benchmark User",
+            "hashed_password": get_password_hash(BENCH_PASSWORD), "is_active": True,
+            "created_at": now, "updated_at": now,
+        }])
+
+    counts.update(super_categories=len(super_categories), categories=len(categories), brands=len(brands))
+    sub_l3 = {c["id"]: [f"{rng.choice(WORDS)} {rng.choice(NOUNS)}" for _ in range(rng.randint(2, 6))] for c in categories}
+    sub_l4 = ["Regular", "Family Pack", "Combo", "Mini", "Sugar Free", None]
+
+    image_id = nutrition_id = ingredient_id = 0
+    start = time.perf_counter()
+    for batch_start in range(0, products, batch_size):
+        product_rows, image_rows, nutrition_rows, ingredient_rows = [], [], [], []
+        for product_id in range(batch_start + 1, min(batch_start + batch_size, products) + 1):
+            category = rng.choice(categories)
+            brand = rng.choice(brands)
+            name = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(NOUNS)}"
+            mrp = round(rng.uniform(10, 800), 0)
+            offer = round(mrp * rng.uniform(0.6, 1.0), 0)
+            unit, low, high = rng.choice(UNITS)
+            net_quantity = rng.randint(low, high)
+            product_rows.append({
+                "id": product_id, "name": name, "display_name": f"{brand['name']} {name} {net_quantity} {unit}",
+                "primary_source": DataSource.SWIGGY, "primary_external_id": f"BENCH{product_id:08d}",
+                "primary_external_variation_id": f"P{product_id:08d}",
+                "brand_id": brand["id"], "super_category_id": category["super_category_id"], "category_id": category["id"],
+                "sub_category_l3": rng.choice(sub_l3[category["id"]]), "sub_category_l4": rng.choice(sub_l4),
+                "sub_category_l5": None, "mrp": mrp, "store_price": mrp, "offer_price": offer,
+                "discount_value": mrp - offer, "unit_level_price": None,
+                "quantity": f"{net_quantity} {unit}", "unit_of_measure": unit, "weight_in_grams": float(net_quantity),
+                "volumetric_weight": 0.0, "sku_quantity_with_combo": f"{net_quantity} {unit}",
+                "product_type": "NORMAL", "filters_tag": None,
+                "barcode": f"890{product_id:010d}" if rng.random() < 0.9 else None,
+                "veg_status": rng.choice(list(VegStatus)), "health_rating": rng.randint(0, 100),
+                "processing_level": rng.choice(list(ProcessingLevel)), "country_of_origin": "India",
+                "net_quantity_value": float(net_quantity), "net_quantity_unit": unit,
+                "nutrition_serving_value": 100.0, "nutrition_serving_unit": "g" if unit != "ml" else "ml",
+                "approx_serves_per_pack": rng.randint(1, 10),
+                "ingredients_string": None, "storage_instructions": "Store in a cool and dry place.",
+                "cooking_instructions": None,
+                "allergens": json.dumps(rng.sample(ALLERGENS, rng.randint(0, 3))),
+                "certifications": json.dumps(["FSSAI"]),
+                "positive_health_aspects": json.dumps(["Good source of protein"]),
+                "negative_health_aspects": json.dumps(["High in sodium"]),
+                "preservatives": None, "ins_numbers_found": None, "additives": None, "alarming_ingredients": None,
+                "created_at": now - timedelta(minutes=product_id), "updated_at": now,
+            })
+            for order in range(rng.randint(1, 5)):
+                image_id += 1
+                digest = f"{product_id:08x}{order:02x}".rjust(64, "0")
+                image_rows.append({"id": image_id, "product_id": product_id,
+                                   "filename": f"swiggy/blobs/{digest[:2]}/{digest}.png",
+                                   "order_index": order, "is_primary": order == 0})
+            for nutrient, unit_name, low_value, high_value in rng.sample(NUTRIENTS, rng.randint(5, len(NUTRIENTS))):
+                nutrition_id += 1
+                nutrition_rows.append({"id": nutrition_id, "product_id": product_id, "nutrient": nutrient,
+                                       "value": round(rng.uniform(low_value, high_value), 1), "unit": unit_name,
+                                       "rda_percentage": None})
+            for order, ingredient in enumerate(rng.sample(INGREDIENTS, rng.randint(3, 10))):
+                ingredient_id += 1
+                ingredient_rows.append({"id": ingredient_id, "product_id": product_id, "name": ingredient,
+                                        "percentage": None, "is_alarming": ingredient == "Palm Oil",
+                                        "alarming_reason": "Palm oil" if ingredient == "Palm Oil" else None,
+                                        "order_index": order, "ins_numbers": None, "additives": None})
+
+        with engine.begin() as conn:
+            conn.execute(insert(Product), product_rows)
+            for rows, table in ((image_rows, ProductImage), (nutrition_rows, NutritionFact), (ingredient_rows, Ingredient)):
+                for chunk in _chunks(rows, batch_size):
+                    conn.execute(insert(table), chunk)
+
+        counts["products"] += len(product_rows)
+        counts["images"] += len(image_rows)
+        counts["nutrition_facts"] += len(nutrition_rows)
+        counts["ingredients"] += len(ingredient_rows)
+        elapsed = time.perf_counter() - start
+        print(f"  {counts['products']:,}/{products:,} products ({counts['products'] / elapsed:,.0f} products/sec)")
+
+    engine.dispose()
+    return counts
+
+
+def main():
+    """Generate a synthetic catalog from command line arguments."""
+    parser = argparse.ArgumentParser(description="Generate a synthetic catalog for benchmarks")
+    parser.add_argument("--products", type=int, default=10000, help="Number of products (e.g. 10000 - 1000000)")
+    parser.add_argument("--database-url", default="sqlite:///./bench.db", help="Target database URL (must be empty)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducible catalogs")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per insert batch")
+    args = parser.parse_args()
+
+    print(f"Generating {args.products:,} products into {args.database_url}")
+    start = time.perf_counter()
+    counts = generate_catalog(args.database_url, args.products, seed=args.seed, batch_size=args.batch_size)
+    elapsed = time.perf_counter() - start
+
+    for name, value in counts.items():
+        print(f"  {name}: {value:,}")
+    print(f"Done in {elapsed:.1f}s. Benchmark user: {BENCH_USERNAME} / {BENCH_PASSWORD}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""Replay a realistic request mix against the API and report throughput and latency percentiles.
+
+Example:
+    uvicorn app.main:app --workers 4   # with DATABASE_URL pointing at the benchmark catalog
+    python -m benchmarks.load_test --base-url http://localhost:8000 --database-url sqlite:///./bench.db
+
+Use --in-process to drive the ASGI app directly without a server (useful for quick comparisons).
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import httpx
+from sqlalchemy import create_engine, select
+
+from app.models import Product, SuperCategory, Category, Brand
+from .generate_catalog import BENCH_USERNAME, BENCH_PASSWORD
+
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Request mix: (name, weight)
+DEFAULT_MIX = {
+    "search": 45,
+    "search_filtered": 15,
+    "detail": 20,
+    "barcode": 10,
+    "category": 10,
+}
+SEARCH_TERMS = ["masala", "chips", "classic", "organic", "honey", "cheese", "oats", "mango", "protein", "butter"]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    """Throughput and latency percentiles (ms) for a set of requests."""
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+    }
+
+
+def load_samples(database_url: str, sample_size: int = 5000) -> Dict[str, List[Any]]:
+    """Pick product ids, barcodes, categories and brands to build realistic requests from."""
+    engine = create_engine(database_url)
+    with engine.connect() as conn:
+        product_ids = conn.execute(select(Product.id).limit(sample_size)).scalars().all()
+        barcodes = conn.execute(
+            select(Product.barcode).where(Product.barcode.is_not(None)).limit(sample_size)
+        ).scalars().all()
+        super_category_ids = conn.execute(select(SuperCategory.id)).scalars().all()
+        categories = conn.execute(select(Category.id, Category.super_category_id)).all()
+        brands = conn.execute(select(Brand.name).limit(500)).scalars().all()
+    engine.dispose()
+    return {
+        "product_ids": list(product_ids),
+        "barcodes": list(barcodes),
+        "super_category_ids": list(super_category_ids),
+        "categories": [tuple(row) for row in categories],
+        "brands": list(brands),
+    }
+
+
+def build_request_factories(samples: Dict[str, List[Any]], rng: random.Random) -> Dict[str, Callable[[], str]]:
+    """Map each request kind to a function producing a URL for it."""
+    def search():
+        return f"/products/search?query={rng.choice(SEARCH_TERMS)}&limit=20&offset={rng.choice([0, 0, 0, 20, 40])}"
+
+    def search_filtered():
+        params = [
+            f"super_category_id={rng.choice(samples['super_category_ids'])}",
+            f"min_health_rating={rng.choice([0, 30, 50, 70])}",
+            f"sort_by={rng.choice(['name', 'price', 'health_rating'])}",
+            f"sort_order={rng.choice(['asc', 'desc'])}",
+            "limit=20",
+        ]
+        if samples["brands"] and rng.random() < 0.3:
+            params.append(f"brand_name={rng.choice(samples['brands']).split()[0]}")
+        return "/products/search?" + "&".join(params)
+
+    def detail():
+        return f"/products/{rng.choice(samples['product_ids'])}"
+
+    def barcode():
+        return f"/products/barcode/{rng.choice(samples['barcodes'])}"
+
+    def category():
+        category_id, super_category_id = rng.choice(samples["categories"])
+        if rng.random() < 0.3:
+            return f"/products/super-categories/{super_category_id}"
+        return f"/products/super-categories/{super_category_id}/products?category_id={category_id}&limit=20"
+
+    return {"search": search, "search_filtered": search_filtered, "detail": detail,
+            "barcode": barcode, "category": category}
+
+
+async def get_token(client: httpx.AsyncClient) -> str:
+    """Log in as the benchmark user."""
+    response = await client.post("/auth/token", data={"username": BENCH_USERNAME, "password": BENCH_PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run_load(client: httpx.AsyncClient, factories: Dict[str, Callable[[], str]], mix: Dict[str, int],
+                   concurrency: int, duration: float, warmup: float, rng: random.Random) -> Dict[str, Any]:
+    """Run `concurrency` workers issuing weighted requests for `duration` seconds."""
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    latencies: Dict[str, List[float]] = {kind: [] for kind in kinds}
+    errors: Dict[str, int] = {kind: 0 for kind in kinds}
+    db_queries: List[int] = []
+
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    async def worker():
+        while True:
+            now = time.perf_counter()
+            if now >= stop_at:
+                return
+            kind = rng.choices(kinds, weights)[0]
+            url = factories[kind]()
+            request_start = time.perf_counter()
+            try:
+                response = await client.get(url)
+                ok = response.status_code < 500 and response.status_code != 401
+            except httpx.HTTPError:
+                response, ok = None, False
+            latency = time.perf_counter() - request_start
+            if request_start < measure_from:
+                continue
+            if ok:
+                latencies[kind].append(latency)
+                if response is not None and "x-db-queries" in response.headers:
+                    db_queries.append(int(response.headers["x-db-queries"]))
+            else:
+                errors[kind] += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - measure_from
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "overall": summarize(all_latencies, sum(errors.values()), elapsed),
+        "endpoints": {kind: summarize(latencies[kind], errors[kind], elapsed) for kind in kinds},
+        "avg_db_queries": round(sum(db_queries) / len(db_queries), 2) if db_queries else None,
+        "measured_seconds": round(elapsed, 2),
+    }
+
+
+def git_revision() -> Dict[str, Any]:
+    """Current commit, so results can be compared across commits."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True).stdout.strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    """Print a human readable summary table."""
+    print(f"\n{'endpoint':<18}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    rows = list(results["endpoints"].items()) + [("overall", results["overall"])]
+    for name, stats in rows:
+        print(f"{name:<18}{stats['requests']:>10}{stats['errors']:>8}{stats['throughput_rps']:>10}"
+              f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+    if results.get("avg_db_queries") is not None:
+        print(f"\nAverage SQL statements per request: {results['avg_db_queries']}")
+
+
+async def main_async(args) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    samples = load_samples(args.database_url)
+    if not samples["product_ids"]:
+        raise SystemExit("No products found; run `python -m benchmarks.generate_catalog` first.")
+    factories = build_request_factories(samples, rng)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    if args.in_process:
+        os.environ["DATABASE_URL"] = args.database_url
+        from app.main import app
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=args.timeout)
+    else:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits)
+
+    async with client:
+        token = await get_token(client)
+        client.headers["Authorization"] = f"Bearer {token}"
+        results = await run_load(client, factories, DEFAULT_MIX, args.concurrency, args.duration, args.warmup, rng)
+
+    return results
+
+
+def main():
+    """Run the load test from command line arguments."""
+    parser = argparse.ArgumentParser(description="Load test the product API")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--database-url", default="sqlite:///./bench.db", help="Catalog DB used to sample request parameters")
+    parser.add_argument("--in-process", action="store_true", help="Drive the ASGI app in-process instead of over HTTP")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent client workers")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Warm-up seconds excluded from the results")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the request mix")
+    parser.add_argument("--label", default="", help="Free-form label stored with the results")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<timestamp>_<commit>.json)")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    print_report(results)
+
+    revision = git_revision()
+    report = {
+        "label": args.label,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git": revision,
+        "config": {
+            "base_url": None if args.in_process else args.base_url,
+            "in_process": args.in_process,
+            "database_url": args.database_url,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "mix": DEFAULT_MIX,
+        },
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "results": results,
+    }
+
+    if args.output:
+        output_path = Path(args.output)
+    else:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        short_commit = (revision["commit"] or "nogit")[:10]
+        output_path = RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{short_commit}.json"
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
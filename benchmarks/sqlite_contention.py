@@ -0,0 +1,139 @@
+"""Measure catalog read throughput while a migration-style writer commits row by row.
+
+Runs the same read workload twice against a copy of the benchmark catalog: once with SQLite's
+defaults (rollback journal) and once with the profile from app.database.SQLITE_PRAGMAS.
+
+Example:
+    python -m benchmarks.generate_catalog --products 50000 --database-url sqlite:///./bench.db
+    python -m benchmarks.sqlite_contention --database ./bench.db --readers 8 --duration 15
+"""
+import argparse
+import multiprocessing
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+from sqlalchemy import create_engine, text
+
+from app.database import SQLITE_PRAGMAS, apply_sqlite_pragmas
+from .load_test import SEARCH_TERMS, summarize
+
+
+BASELINE_PRAGMAS = {"journal_mode": "DELETE", "synchronous": "FULL", "busy_timeout": "5000"}
+
+SEARCH_SQL = text("SELECT id, name, offer_price FROM product WHERE name LIKE :term ORDER BY name LIMIT 20")
+DETAIL_SQL = text("SELECT * FROM product WHERE id = :id")
+
+
+def run_writer(path: str, pragmas: Dict[str, str], stop_at: float, counter) -> None:
+    """Update products one row per transaction, like migrate_data.py's per-row commits."""
+    conn = sqlite3.connect(path, timeout=30)
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name}={value}")
+    max_id = conn.execute("SELECT max(id) FROM product").fetchone()[0]
+    rng = random.Random(7)
+    while time.time() < stop_at:
+        conn.execute("UPDATE product SET updated_at = ? WHERE id = ?",
+                     (datetime.utcnow().isoformat(), rng.randint(1, max_id)))
+        conn.commit()
+        with counter.get_lock():
+            counter.value += 1
+    conn.close()
+
+
+def run_readers(path: str, pragmas: Dict[str, str], readers: int, duration: float) -> Dict[str, Any]:
+    """Run `readers` threads issuing search and detail queries for `duration` seconds."""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False},
+                           pool_size=readers, max_overflow=0)
+    apply_sqlite_pragmas(engine, pragmas)
+    with engine.connect() as conn:
+        max_id = conn.execute(text("SELECT max(id) FROM product")).scalar()
+
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def reader(seed: int):
+        rng = random.Random(seed)
+        local_latencies, local_errors = [], 0
+        with engine.connect() as conn:
+            while time.perf_counter() < stop_at:
+                start = time.perf_counter()
+                try:
+                    if rng.random() < 0.5:
+                        conn.execute(SEARCH_SQL, {"term": f"%{rng.choice(SEARCH_TERMS)}%"}).all()
+                    else:
+                        conn.execute(DETAIL_SQL, {"id": rng.randint(1, max_id)}).all()
+                    conn.rollback()
+                    local_latencies.append(time.perf_counter() - start)
+                except Exception:
+                    conn.rollback()
+                    local_errors += 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+    return summarize(latencies, errors[0], elapsed)
+
+
+def run_profile(source: Path, name: str, pragmas: Dict[str, str], readers: int, duration: float) -> Dict[str, Any]:
+    """Copy the catalog, start the writer and measure readers under one pragma profile."""
+    workdir = Path(tempfile.mkdtemp(prefix=f"ohara-{name}-"))
+    path = workdir / source.name
+    try:
+        shutil.copyfile(source, path)
+        # journal_mode is persistent in the file; set it before anyone connects
+        conn = sqlite3.connect(path)
+        conn.execute(f"PRAGMA journal_mode={pragmas['journal_mode']}")
+        conn.close()
+
+        counter = multiprocessing.Value("i", 0)
+        stop_at = time.time() + duration + 1
+        writer = multiprocessing.Process(target=run_writer, args=(str(path), pragmas, stop_at, counter))
+        writer.start()
+        time.sleep(0.5)  # let the writer get going
+        results = run_readers(str(path), pragmas, readers, duration)
+        writer.join()
+        results["writer_commits_per_sec"] = round(counter.value / (duration + 0.5), 1)
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    """Compare read throughput under a concurrent writer for default vs tuned SQLite settings."""
+    parser = argparse.ArgumentParser(description="SQLite read throughput while a migration writes")
+    parser.add_argument("--database", default="./bench.db", help="Benchmark catalog (see benchmarks.generate_catalog)")
+    parser.add_argument("--readers", type=int, default=8, help="Concurrent reader threads")
+    parser.add_argument("--duration", type=float, default=15.0, help="Measured seconds per profile")
+    args = parser.parse_args()
+
+    source = Path(args.database)
+    if not source.exists():
+        raise SystemExit(f"{source} not found; run `python -m benchmarks.generate_catalog` first.")
+
+    profiles = {"default": BASELINE_PRAGMAS, "tuned": SQLITE_PRAGMAS}
+    print(f"\n{'profile':<10}{'reads':>10}{'errors':>8}{'reads/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'writes/s':>10}")
+    for name, pragmas in profiles.items():
+        stats = run_profile(source, name, pragmas, args.readers, args.duration)
+        print(f"{name:<10}{stats['requests']:>10}{stats['errors']:>8}{stats['throughput_rps']:>10}"
+              f"{stats['p50_ms']:>10}{stats['p99_ms']:>10}{stats['writer_commits_per_sec']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,16 @@
 Step 5: Image Downloader
 Downloads product images from Swiggy media assets and updates product data files.
 Makes the script resumable by tracking images_fetched status.
+Images are stored once by content hash under <output>/blobs/ and every product
+directory only holds hard links to them, so shared packshots aren't duplicated.
 """
 
 import asyncio
 import sys
 import os
 import json
+import hashlib
+import shutil
 import aiohttp
 import aiofiles
 from pathlib import Path
@@ -103,15 +107,32 @@ class ImageDownloader:
         except Exception:
             return False
     
-    async def download_image(self, image_path: str, save_path: Path) -> bool:
+    def get_blob_path(self, image_data: bytes, filename: str, blobs_dir: Path) -> Path:
         """
-        Download a single image and validate it.
-        Returns True if successful, False otherwise.
+        Content-addressed location of an image: blobs/<aa>/<sha256><ext>.
+        """
+        digest = hashlib.sha256(image_data).hexdigest()
+        extension = Path(filename).suffix.lower() or '.png'
+        return blobs_dir / digest[:2] / f"{digest}{extension}"
+    
+    def link_blob(self, blob_path: Path, link_path: Path) -> None:
+        """
+        Hard link a blob into a product directory, copying if linking fails.
+        """
+        if link_path.exists():
+            if os.path.samefile(blob_path, link_path):
+                return
+            link_path.unlink()
+        try:
+            os.link(blob_path, link_path)
+        except OSError:
+            shutil.copyfile(blob_path, link_path)
+    
+    async def download_image(self, image_path: str, save_path: Path, blobs_dir: Path) -> Optional[Path]:
+        """
+        Download a single image, validate it and store it in the blob store.
+        Returns the blob path if successful, None otherwise.
         """
-        if save_path.exists():
-            self.skipped_count += 1
-            return True
-        
         # Construct the full URL
         url = f"{self.base_url}{image_path}"
         
@@ -123,21 +144,27 @@ class ImageDownloader:
                     # Validate the image
                     if not self.validate_image(image_data):
                         self.failed_count += 1
-                        return False
+                        return None
                     
-                    # Save the image
-                    async with aiofiles.open(save_path, 'wb') as f:
-                        await f.write(image_data)
+                    # Save the image once per unique content
+                    blob_path = self.get_blob_path(image_data, save_path.name, blobs_dir)
+                    if not blob_path.exists():
+                        ensure_directory(blob_path.parent)
+                        tmp_path = blob_path.with_name(f"{blob_path.name}.{os.getpid()}.tmp")
+                        async with aiofiles.open(tmp_path, 'wb') as f:
+                            await f.write(image_data)
+                        os.replace(tmp_path, blob_path)
                     
+                    self.link_blob(blob_path, save_path)
                     self.downloaded_count += 1
-                    return True
+                    return blob_path
                 else:
                     self.failed_count += 1
-                    return False
+                    return None
                     
         except Exception:
             self.failed_count += 1
-            return False
+            return None
     
     async def download_product_images(self, product_data: Dict[str, Any], product_dir: Path, progress: Progress, task_id: TaskID) -> Dict[str, Any]:
         """
@@ -154,6 +181,11 @@ class ImageDownloader:
         images_dir = product_dir / "images"
         ensure_directory(images_dir)
         
+        # Blob store shared by all products: <output>/blobs
+        output_dir = product_dir.parent.parent
+        blobs_dir = output_dir / "blobs"
+        image_blobs = dict(product_data.get('image_blobs') or {})
+        
         # Download each image
         downloaded_images = []
         successful_downloads = 0
@@ -165,7 +197,28 @@ class ImageDownloader:
             filename = self.get_filename_from_path(image_path)
             save_path = images_dir / filename
             
-            success = await self.download_image(image_path, save_path)
+            blob_ref = image_blobs.get(filename)
+            if blob_ref and (output_dir / blob_ref).exists():
+                self.skipped_count += 1
+                success = True
+            elif save_path.exists():
+                # Downloaded before the blob store existed: adopt the local file
+                with open(save_path, 'rb') as f:
+                    image_data = f.read()
+                blob_path = self.get_blob_path(image_data, filename, blobs_dir)
+                if not blob_path.exists():
+                    ensure_directory(blob_path.parent)
+                    os.replace(save_path, blob_path)
+                self.link_blob(blob_path, save_path)
+                image_blobs[filename] = blob_path.relative_to(output_dir).as_posix()
+                self.skipped_count += 1
+                success = True
+            else:
+                blob_path = await self.download_image(image_path, save_path, blobs_dir)
+                success = blob_path is not None
+                if success:
+                    image_blobs[filename] = blob_path.relative_to(output_dir).as_posix()
+            
             if success:
                 downloaded_images.append(filename)
                 successful_downloads += 1
@@ -176,6 +229,7 @@ class ImageDownloader:
         # Update product data with local image paths
         updated_data = product_data.copy()
         updated_data['images'] = downloaded_images
+        updated_data['image_blobs'] = image_blobs
         updated_data['images_fetched'] = True
         updated_data['images_download_stats'] = {
             'total_images': len(images),
@@ -2,8 +2,10 @@ import asyncio
 import json
 from pathlib import Path
 from utils.config import get_api_config, get_directories_config, get_categories_to_process
-from utils.http_client import create_http_client, download_image
-from utils.file_operations import save_json, load_json, clean_image_id
+from utils.http_client import create_http_client, download_image, fetch_image
+from utils.file_operations import (
+    save_json, load_json, clean_image_id, store_image_blob, link_image_blob, adopt_image_file
+)
 from utils.data_processing import extract_products_from_data
 from utils.console_utils import (
     get_console, get_progress_bar, print_success, print_warning, log_message,
@@ -89,6 +91,23 @@ async def process_category_metadata(category_metadata, output_dir, client, semap
     save_json(cleaned_metadata, str(metadata_path))
 
 
+async def download_variation_image(image_id, images_dir, blobs_dir, output_dir, client, semaphore):
+    """
+    Download a variation image into the content-addressed blob store.
+    The variation's images/ directory only gets a hard link to the blob, so
+    tools reading per-variation images keep working without a second copy.
+    Returns (cleaned_filename, blob path relative to output_dir) or None.
+    """
+    cleaned_filename = clean_image_id(image_id)
+    content = await fetch_image(client, image_id, semaphore)
+    if content is None:
+        return None
+    
+    blob_path = store_image_blob(content, blobs_dir, cleaned_filename)
+    link_image_blob(blob_path, images_dir / cleaned_filename)
+    return cleaned_filename, blob_path.relative_to(output_dir).as_posix()
+
+
 async def process_product(product_data, output_dir, client, semaphore, progress, task_id):
     """
     Processes a single product, saves its data, and downloads its images.
@@ -173,31 +192,52 @@ async def process_product(product_data, output_dir, client, semaphore, progress,
             variation_dir = brand_dir / variation_id
             variation_dir.mkdir(exist_ok=True)
             
-            # Save variation data with parent product info for context
-            variation_data = {
-                "variation": variation,
-                "parent_product": {
-                    "product_id": product_id,
-                    "display_name": product_data.get("display_name"),
-                    "brand": brand_name,
-                    "brand_id": brand_id
-                }
-            }
-            save_json(variation_data, str(variation_dir / "data.json"))
-                
             images_dir = variation_dir / "images"
             images_dir.mkdir(exist_ok=True)
+            blobs_dir = output_dir / "swiggy" / "blobs"
+            
+            # Keep blob references from earlier runs so images aren't fetched again
+            data_path = variation_dir / "data.json"
+            try:
+                image_blobs = load_json(data_path).get("image_blobs", {})
+            except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+                image_blobs = {}
             
             image_ids = variation.get("images", [])
             download_tasks = []
             for image_id in image_ids:
                 cleaned_filename = clean_image_id(image_id)
-                download_path = images_dir / cleaned_filename
-                if not download_path.exists():  # Avoid re-downloading
-                    download_tasks.append(download_image(client, image_id, str(download_path), semaphore))
+                blob_ref = image_blobs.get(cleaned_filename)
+                if blob_ref and (output_dir / blob_ref).exists():  # Avoid re-downloading
+                    continue
+                legacy_path = images_dir / cleaned_filename
+                if legacy_path.exists():
+                    # Downloaded before the blob store existed: adopt the local file
+                    blob_path = adopt_image_file(legacy_path, blobs_dir)
+                    image_blobs[cleaned_filename] = blob_path.relative_to(output_dir).as_posix()
+                    continue
+                download_tasks.append(download_variation_image(
+                    image_id, images_dir, blobs_dir, output_dir, client, semaphore
+                ))
             
             if download_tasks:
-                await asyncio.gather(*download_tasks)
+                for result in await asyncio.gather(*download_tasks):
+                    if result:
+                        cleaned_filename, blob_ref = result
+                        image_blobs[cleaned_filename] = blob_ref
+            
+            # Save variation data with parent product info for context
+            variation_data = {
+                "variation": variation,
+                "parent_product": {
+                    "product_id": product_id,
+                    "display_name": product_data.get("display_name"),
+                    "brand": brand_name,
+                    "brand_id": brand_id
+                },
+                "image_blobs": image_blobs
+            }
+            save_json(variation_data, str(data_path))
     finally:
         progress.update(task_id, advance=1)
 
@@ -1,5 +1,8 @@
 """File operations utilities."""
+import hashlib
 import json
+import os
+import shutil
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, Union
@@ -56,3 +59,58 @@ def clean_image_id(image_id: str) -> str:
     if not Path(filename).suffix:
         filename += ".png"
     return filename
+
+
+def store_image_blob(content: bytes, blobs_dir: Union[str, Path], filename: str) -> Path:
+    """
+    Store image bytes in the content-addressed blob store.
+    Blobs are named by the SHA-256 of their content, so the same packshot
+    downloaded for several variations is only kept once.
+    e.g., blobs/3f/3fa4...c2.png
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    extension = Path(filename).suffix.lower() or ".png"
+    blob_path = Path(blobs_dir) / digest[:2] / f"{digest}{extension}"
+
+    if not blob_path.exists():
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = blob_path.with_name(f"{blob_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, blob_path)
+
+    return blob_path
+
+
+def adopt_image_file(image_path: Union[str, Path], blobs_dir: Union[str, Path]) -> Path:
+    """
+    Move an image downloaded before the blob store existed into it and
+    leave a hard link in its place. Returns the blob path.
+    """
+    image_path = Path(image_path)
+    with open(image_path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    extension = image_path.suffix.lower() or ".png"
+    blob_path = Path(blobs_dir) / digest[:2] / f"{digest}{extension}"
+
+    if not blob_path.exists():
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(image_path, blob_path)
+    link_image_blob(blob_path, image_path)
+    return blob_path
+
+
+def link_image_blob(blob_path: Union[str, Path], link_path: Union[str, Path]) -> None:
+    """
+    Expose a blob at a per-variation path without storing a second copy.
+    Uses a hard link, falling back to a copy when the filesystem refuses.
+    """
+    link_path = Path(link_path)
+    if link_path.exists():
+        if os.path.samefile(blob_path, link_path):
+            return
+        link_path.unlink()
+    try:
+        os.link(blob_path, link_path)
+    except OSError:
+        shutil.copyfile(blob_path, link_path)
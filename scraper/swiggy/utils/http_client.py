@@ -33,9 +33,9 @@ async def make_api_request(client: httpx.AsyncClient, url: str,
     return response
 
 
-async def download_image(client: httpx.AsyncClient, image_id: str, 
-                        download_path: str, semaphore: asyncio.Semaphore) -> bool:
-    """Download an image from Swiggy's CDN."""
+async def fetch_image(client: httpx.AsyncClient, image_id: str,
+                      semaphore: asyncio.Semaphore) -> Optional[bytes]:
+    """Fetch an image from Swiggy's CDN and return its bytes."""
     async with semaphore:
         api_config = get_api_config()
         base_url = api_config.get('image_base_url', '')
@@ -45,19 +45,28 @@ async def download_image(client: httpx.AsyncClient, image_id: str,
             timeout = api_config.get('download_timeout', 20.0)
             response = await client.get(image_url, timeout=timeout)
             response.raise_for_status()
-            
-            with open(download_path, 'wb') as f:
-                f.write(response.content)
-            return True
+            return response.content
         except httpx.HTTPStatusError as e:
             Console().print(
                 f"  [bold red]❌ HTTP ERROR[/bold red] downloading {image_url}: "
                 f"{e.response.status_code}"
             )
-            return False
+            return None
         except Exception as e:
             Console().print(
                 f"  [bold red]❌ Unexpected error[/bold red] downloading {image_url}: "
                 f"{type(e).__name__} - {e}"
             )
-            return False
+            return None
+
+
+async def download_image(client: httpx.AsyncClient, image_id: str, 
+                        download_path: str, semaphore: asyncio.Semaphore) -> bool:
+    """Download an image from Swiggy's CDN."""
+    content = await fetch_image(client, image_id, semaphore)
+    if content is None:
+        return False
+    
+    with open(download_path, 'wb') as f:
+        f.write(content)
+    return True
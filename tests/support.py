@@ -0,0 +1,96 @@
+"""Shared fixtures for the API tests: the app on an in-memory catalog, with authentication stubbed."""
+import unittest
+from typing import Any, Dict, Optional
+from unittest import mock
+
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from app import cache, catalog
+from app.auth import get_current_active_user
+from app.catalog import CategoryTreeCache
+from app.database import get_read_session, get_session, get_write_session
+from app.main import app
+from app.models import Brand, Category, DataSource, Product, SuperCategory, User
+from app.routers import products
+
+
+class ApiTestCase(unittest.TestCase):
+    """TestClient against an empty in-memory catalog, without the response cache or columnar backend.
+
+    Every test gets its own category tree cache: each in-memory catalog starts at version 0.
+    """
+
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        SQLModel.metadata.create_all(self.engine)
+        self.session = Session(self.engine)
+
+        def override_session():
+            with Session(self.engine) as session:
+                yield session
+
+        app.dependency_overrides.update({
+            get_session: override_session,
+            get_read_session: override_session,
+            get_write_session: override_session,
+            get_current_active_user: lambda: User(id=1, username="tester", email="tester@example.com", hashed_password=""),
+        })
+        for patcher in (
+            mock.patch.object(cache, "response_cache", None),
+            mock.patch.object(catalog, "_observed_version", None),
+            mock.patch.object(products, "columnar_catalog", None),
+            mock.patch.object(products, "category_tree_cache", CategoryTreeCache()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = TestClient(app)
+
+        self.brand = self.add(Brand(name="Brand"))
+        self.super_category = self.add(SuperCategory(name="Snacks"))
+        self.category = self.add(Category(name="Chips", super_category_id=self.super_category.id))
+        self._next_external_id = 0
+
+    def tearDown(self):
+        app.dependency_overrides.clear()
+        self.session.close()
+        self.engine.dispose()
+
+    def add(self, instance: SQLModel) -> Any:
+        """Commit a row and return it with its id."""
+        self.session.add(instance)
+        self.session.commit()
+        self.session.refresh(instance)
+        return instance
+
+    def add_product(self, name: str = "Product", commit: bool = True, **values: Any) -> Product:
+        """Add a product in the default brand and category; `values` override any column."""
+        self._next_external_id += 1
+        product = Product(**{
+            "name": name,
+            "display_name": name,
+            "primary_source": DataSource.SWIGGY,
+            "primary_external_id": f"V{self._next_external_id}",
+            "primary_external_variation_id": f"P{self._next_external_id}",
+            "brand_id": self.brand.id,
+            "super_category_id": self.super_category.id,
+            "category_id": self.category.id,
+            **values,
+        })
+        if not commit:
+            self.session.add(product)
+            return product
+        return self.add(product)
+
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None, status_code: int = 200) -> Any:
+        response = self.client.get(path, params=params)
+        self.assertEqual(response.status_code, status_code, response.text)
+        return response.json()
+
+    def post_json(self, path: str, body: Any, status_code: int = 200) -> Any:
+        response = self.client.post(path, json=body)
+        self.assertEqual(response.status_code, status_code, response.text)
+        return response.json()
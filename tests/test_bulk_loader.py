@@ -0,0 +1,242 @@
+"""Tests for the batched migration loader.
+
+The COPY loader tests run against the Postgres database in TEST_POSTGRES_URL, whose tables they
+create and drop; they are skipped when it is not set.
+"""
+import os
+import unittest
+
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine, func, select
+
+from app.models import (
+    Brand, Category, DataSource, Ingredient, Product, ProductCategoryLink, ProductImage, ProductSourceMapping,
+    SuperCategory
+)
+from app.scripts.bulk_loader import (
+    STAGING_TABLES_INFO_KEY, BulkLoader, CopyBulkLoader, MigrationLookups, ProductRows, create_loader
+)
+
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+class BulkLoaderTestCase(unittest.TestCase):
+    """In-memory database with one brand and category."""
+    database_url = "sqlite://"
+
+    def setUp(self):
+        self.engine = create_engine(self.database_url)
+        SQLModel.metadata.create_all(self.engine)
+        self.session = Session(self.engine)
+        brand, super_category = Brand(name="Brand"), SuperCategory(name="Super")
+        self.session.add_all([brand, super_category])
+        self.session.flush()
+        category = Category(name="Category", super_category_id=super_category.id)
+        self.session.add(category)
+        self.session.commit()
+        self.ids = dict(brand_id=brand.id, super_category_id=super_category.id, category_id=category.id)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def loader(self, **options) -> BulkLoader:
+        return BulkLoader(self.session, MigrationLookups.load(self.session), batch_size=100, **options)
+
+    def product(self, i: int) -> ProductRows:
+        return ProductRows(
+            product=dict(
+                name=f"Product {i}", display_name=f"Product {i}", primary_source=DataSource.SWIGGY,
+                primary_external_id=f"V{i}", primary_external_variation_id=f"P{i}", **self.ids
+            ),
+            external_brand_id="B1",
+        )
+
+
+class BulkLoaderStatementCountTest(BulkLoaderTestCase):
+    """Each batch writes every table with one statement, whatever values are None."""
+
+    def setUp(self):
+        super().setUp()
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def inserts_into(self, table: str) -> int:
+        return sum(1 for statement in self.statements if statement.startswith(f"INSERT INTO {table} "))
+
+    def test_child_rows_with_mixed_nulls_use_one_statement(self):
+        loader = self.loader()
+        for i in range(10):
+            rows = self.product(i)
+            rows.ingredients = [
+                dict(
+                    name=f"Ingredient {j}", percentage=None if j % 2 else 10.0, is_alarming=False,
+                    alarming_reason=None if j % 3 else "reason", order_index=j, ins_numbers=None, additives=None
+                )
+                for j in range(10)
+            ]
+            loader.add(rows)
+        loader.flush()
+
+        self.assertEqual(self.session.exec(select(func.count()).select_from(Ingredient)).one(), 100)
+        self.assertEqual(self.session.exec(select(func.count()).select_from(ProductSourceMapping)).one(), 10)
+        self.assertEqual(self.inserts_into("ingredient"), 1)
+        self.assertEqual(self.inserts_into("productsourcemapping"), 1)
+
+
+class AppendOnlyChildrenTest(BulkLoaderTestCase):
+    """Append-only child rows are added but never deleted by a later load."""
+
+    def setUp(self):
+        super().setUp()
+        other = Category(name="Other", super_category_id=self.ids["super_category_id"])
+        self.session.add(other)
+        self.session.commit()
+        self.other_id = other.id
+
+    def load(self, category_ids, **options) -> None:
+        loader = self.loader(**options)
+        rows = self.product(1)
+        rows.category_links = [dict(category_id=category_id) for category_id in category_ids]
+        loader.add(rows)
+        loader.flush()
+
+    def link_categories(self):
+        return sorted(self.session.exec(select(ProductCategoryLink.category_id)).all())
+
+    def test_append_only_keeps_existing_links(self):
+        self.load([self.ids["category_id"], self.other_id])
+        self.load([self.ids["category_id"]], append_only=("category_links",))
+        self.assertEqual(self.link_categories(), sorted([self.ids["category_id"], self.other_id]))
+
+    def test_replacing_loader_deletes_stale_links(self):
+        self.load([self.ids["category_id"], self.other_id])
+        self.load([self.ids["category_id"]])
+        self.assertEqual(self.link_categories(), [self.ids["category_id"]])
+
+
+class ChildrenOnlyTest(BulkLoaderTestCase):
+    """A children-only record replaces just its listed child rows of a product another source owns."""
+
+    def setUp(self):
+        super().setUp()
+        other = Category(name="Other", super_category_id=self.ids["super_category_id"])
+        self.session.add(other)
+        self.session.commit()
+        self.other_id = other.id
+
+    def link_categories(self):
+        return sorted(self.session.exec(select(ProductCategoryLink.category_id)).all())
+
+    def test_children_only_leaves_columns_and_other_children(self):
+        loader = self.loader()
+        for i in (1, 2):
+            rows = self.product(i)
+            rows.images = [dict(filename=f"{i}.png", order_index=0, is_primary=True)]
+            rows.category_links = [dict(category_id=self.ids["category_id"])]
+            loader.add(rows)
+        loader.flush()
+
+        loader = self.loader()
+        shared = self.product(1)
+        shared.product["name"] = "Renamed"
+        shared.children_only = ("category_links",)
+        shared.category_links = [dict(category_id=self.ids["category_id"]), dict(category_id=self.other_id)]
+        owned = self.product(2)
+        for rows in (shared, owned):
+            loader.add(rows)
+        loader.flush()
+
+        names = dict(self.session.exec(select(Product.primary_external_id, Product.name)).all())
+        self.assertEqual(names, {"V1": "Product 1", "V2": "Product 2"})
+        self.assertEqual(self.session.exec(select(ProductImage.filename)).all(), ["1.png"])
+        self.assertEqual(self.link_categories(), sorted([self.ids["category_id"], self.other_id]))
+        self.assertEqual(loader.stats["children_only"], 1)
+
+    def test_children_only_record_of_a_missing_product_is_skipped(self):
+        loader = self.loader()
+        rows = self.product(1)
+        rows.children_only = ("category_links",)
+        rows.category_links = [dict(category_id=self.other_id)]
+        loader.add(rows)
+        loader.flush()
+
+        self.assertEqual(self.session.exec(select(Product)).all(), [])
+        self.assertEqual(self.link_categories(), [])
+        self.assertEqual(loader.stats["skipped"], 1)
+
+
+@unittest.skipUnless(TEST_POSTGRES_URL, "TEST_POSTGRES_URL is not set")
+class CopyBulkLoaderTest(BulkLoaderTestCase):
+    """The COPY loader on Postgres, across commits and new pool connections."""
+    database_url = TEST_POSTGRES_URL
+
+    def tearDown(self):
+        self.session.close()
+        SQLModel.metadata.drop_all(self.engine)
+        super().tearDown()
+
+    def load(self, start: int, loader=None) -> BulkLoader:
+        loader = loader or create_loader(self.session, MigrationLookups.load(self.session), batch_size=2)
+        for i in range(start, start + 3):
+            rows = self.product(i)
+            rows.product["offer_price"] = float(i)
+            rows.images = [dict(filename=f"{i}.png", order_index=0, is_primary=True)]
+            loader.add(rows)
+        loader.flush()
+        return loader
+
+    def test_batches_across_commits_and_connections(self):
+        loader = self.load(0)
+        self.assertIsInstance(loader, CopyBulkLoader)
+        self.assertIn("staging_product", self.session.connection().connection.info[STAGING_TABLES_INFO_KEY])
+
+        # A new DBAPI connection has no staging table yet, whatever id() its wrapper gets
+        self.session.close()
+        self.engine.dispose()
+        self.assertNotIn(STAGING_TABLES_INFO_KEY, self.session.connection().connection.info)
+        self.load(3, loader)
+
+        prices = dict(self.session.exec(select(Product.primary_external_id, Product.offer_price)).all())
+        self.assertEqual(prices, {f"V{i}": float(i) for i in range(6)})
+        self.assertEqual(len(self.session.exec(select(ProductImage)).all()), 6)
+        self.assertEqual(loader.stats["products"], 6)
+
+
+class InvalidRecordTest(BulkLoaderTestCase):
+    """A record missing a required value is skipped without losing the rest of its batch."""
+
+    def test_batch_with_invalid_records(self):
+        loader = self.loader()
+        first = self.product(1)
+        first.product["offer_price"] = 10.0
+        loader.add(first)
+        loader.flush()
+
+        loader = self.loader()
+        updated = self.product(1)
+        updated.product["offer_price"] = 12.0
+        no_name = self.product(2)
+        no_name.product["name"] = None
+        bad_ingredient = self.product(3)
+        bad_ingredient.ingredients = [dict(name=None, order_index=0)]
+        valid = self.product(4)
+        valid.product["offer_price"] = 5.0
+        for rows in (updated, no_name, bad_ingredient, valid):
+            loader.add(rows)
+        loader.flush()
+
+        prices = dict(self.session.exec(select(Product.primary_external_id, Product.offer_price)).all())
+        self.assertEqual(prices, {"V1": 12.0, "V4": 5.0})
+        self.assertEqual(self.session.exec(select(Ingredient)).all(), [])
+        self.assertEqual(loader.stats["invalid"], 2)
+        self.assertEqual(loader.stats["skipped"], 2)
+        self.assertEqual(loader.stats["products"], 1)
+        self.assertEqual(loader.stats["updated"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""Tests for the response cache and the negotiated encodings of the cached endpoints."""
+import unittest
+from unittest import mock
+
+import msgpack
+
+from app import cache, catalog, encoding
+from app.catalog import bump_catalog_version
+
+from .support import ApiTestCase
+
+
+class ResponseCacheTest(ApiTestCase):
+    """Cached endpoints on an in-process LRU cache, re-reading the catalog version on every request."""
+
+    def setUp(self):
+        super().setUp()
+        for patcher in (
+            mock.patch.object(cache, "response_cache", cache.LRUCache(100)),
+            mock.patch.object(catalog, "CATALOG_VERSION_CHECK_SECONDS", 0),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.product = self.add_product(name="Chips")
+
+    def get(self, path, **headers):
+        response = self.client.get(path, headers=headers)
+        self.assertEqual(response.status_code, 200, response.text)
+        return response
+
+    def rename(self, name: str) -> None:
+        self.product.name = name
+        self.add(self.product)
+
+    def test_hit_until_the_catalog_version_changes(self):
+        path = f"/products/{self.product.id}"
+        response = self.get(path)
+        self.assertEqual((response.headers["x-cache"], response.json()["name"]), ("MISS", "Chips"))
+
+        self.rename("Crisps")
+        response = self.get(path)
+        self.assertEqual((response.headers["x-cache"], response.json()["name"]), ("HIT", "Chips"))
+
+        bump_catalog_version(self.session)
+        response = self.get(path)
+        self.assertEqual((response.headers["x-cache"], response.json()["name"]), ("MISS", "Crisps"))
+        self.assertEqual(self.get(path).headers["x-cache"], "HIT")
+
+    def test_query_params_are_normalized(self):
+        self.assertEqual(self.get("/products/search?limit=5&sort_by=name").headers["x-cache"], "MISS")
+        self.assertEqual(self.get("/products/search?sort_by=name&limit=5&query=").headers["x-cache"], "HIT")
+        self.assertEqual(self.get("/products/search?sort_by=name&limit=6").headers["x-cache"], "MISS")
+
+    def test_each_encoding_is_cached_separately(self):
+        path = f"/products/{self.product.id}"
+        identity = self.get(path, **{"accept-encoding": "identity"}).json()
+        with mock.patch.object(encoding, "COMPRESS_MIN_BYTES", 0):
+            for headers, content_encoding, first_status in [
+                ({"accept-encoding": "gzip"}, "gzip", "MISS"),
+                ({"accept-encoding": "br, gzip"}, "br", "MISS"),
+                # Same variant as the first request
+                ({"accept-encoding": "br;q=0, gzip"}, "gzip", "HIT"),
+            ]:
+                with self.subTest(**headers):
+                    first, second = self.get(path, **headers), self.get(path, **headers)
+                    self.assertEqual(first.headers["content-encoding"], content_encoding)
+                    self.assertEqual((first.headers["x-cache"], second.headers["x-cache"]), (first_status, "HIT"))
+                    self.assertEqual(second.headers["content-encoding"], content_encoding)
+                    self.assertEqual(second.headers["vary"], "Accept, Accept-Encoding")
+                    # The test client decodes gzip and brotli bodies
+                    self.assertEqual(second.json(), identity)
+
+            response = self.get(path, accept="application/msgpack", **{"accept-encoding": "gzip"})
+            self.assertEqual(response.headers["content-type"], "application/msgpack")
+            self.assertNotIn("content-encoding", response.headers)
+            self.assertEqual(msgpack.unpackb(response.content), identity)
+
+            response = self.get(path, accept="application/msgpack;q=0, application/json")
+            self.assertEqual(response.headers["content-type"], "application/json")
+            self.assertEqual(response.json(), identity)
+
+    def test_small_bodies_are_not_compressed(self):
+        for cache_status in ("MISS", "HIT"):
+            response = self.get("/products/super-categories", **{"accept-encoding": "gzip"})
+            self.assertEqual(response.headers["x-cache"], cache_status)
+            self.assertNotIn("content-encoding", response.headers)
+            self.assertEqual([item["name"] for item in response.json()], ["Snacks"])
+
+
+class CategoryTreeEncodingTest(ApiTestCase):
+
+    def test_tree_variants_and_etag(self):
+        self.add_product()
+        with mock.patch.object(encoding, "COMPRESS_MIN_BYTES", 0):
+            response = self.client.get("/products/category-tree", headers={"accept-encoding": "identity"})
+            self.assertNotIn("content-encoding", response.headers)
+            tree = response.json()
+
+            response = self.client.get("/products/category-tree", headers={"accept-encoding": "br"})
+            self.assertEqual(response.headers["content-encoding"], "br")
+            self.assertEqual(response.json(), tree)
+
+            headers = {"accept": "application/msgpack"}
+            response = self.client.get("/products/category-tree", headers=headers)
+            self.assertEqual(msgpack.unpackb(response.content), tree)
+
+            # ETags are per variant
+            etag = response.headers["etag"]
+            response = self.client.get("/products/category-tree", headers={**headers, "if-none-match": etag})
+            self.assertEqual(response.status_code, 304)
+            response = self.client.get("/products/category-tree", headers={"if-none-match": etag})
+            self.assertEqual(response.status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""Products are listed in their primary category and in every category they are linked to."""
+import unittest
+from unittest import mock
+
+from app.columnar import ColumnarCatalogCache
+from app.models import Category, ProductCategoryLink, SuperCategory
+from app.routers import products
+
+from .support import ApiTestCase
+
+
+class CategoryLinkTest(ApiTestCase):
+    """Chips (linked to Juice) and Nuts in Snacks; Juice in Drinks."""
+
+    def setUp(self):
+        super().setUp()
+        self.nuts = self.add(Category(name="Nuts", super_category_id=self.super_category.id))
+        self.drinks = self.add(SuperCategory(name="Drinks"))
+        self.juice = self.add(Category(name="Juice", super_category_id=self.drinks.id))
+        self.chips_product = self.add_product(name="Lime Chips")
+        self.nuts_product = self.add_product(name="Cashews", category_id=self.nuts.id)
+        # The primary category is linked too, as the importers write it
+        for category_id in (self.category.id, self.juice.id):
+            self.add(ProductCategoryLink(product_id=self.chips_product.id, category_id=category_id))
+
+    def product_ids(self, path, params=None):
+        body = self.get_json(path, params={**(params or {}), "fields": "id"})
+        return body["total"], sorted(product["id"] for product in body["products"])
+
+    def test_filters_include_linked_products(self):
+        self.assertEqual(
+            self.product_ids(f"/products/super-categories/{self.drinks.id}/products"),
+            (1, [self.chips_product.id])
+        )
+        self.assertEqual(
+            self.product_ids(f"/products/super-categories/{self.drinks.id}/products", {"category_id": self.juice.id}),
+            (1, [self.chips_product.id])
+        )
+        self.assertEqual(
+            self.product_ids(f"/products/super-categories/{self.super_category.id}/products"),
+            (2, sorted([self.chips_product.id, self.nuts_product.id]))
+        )
+        for backend in (None, ColumnarCatalogCache()):
+            with self.subTest(columnar=backend is not None), mock.patch.object(products, "columnar_catalog", backend):
+                self.assertEqual(
+                    self.product_ids("/products/search", {"category_id": self.juice.id}), (1, [self.chips_product.id])
+                )
+                self.assertEqual(
+                    self.product_ids("/products/search", {"super_category_id": self.drinks.id}),
+                    (1, [self.chips_product.id])
+                )
+                self.assertEqual(
+                    self.product_ids("/products/search", {"category_id": self.category.id}),
+                    (1, [self.chips_product.id])
+                )
+
+    def test_counts_include_linked_products(self):
+        counts = {item["name"]: item["product_count"] for item in self.get_json("/products/super-categories")}
+        self.assertEqual(counts, {"Drinks": 1, "Snacks": 2})
+
+        detail = self.get_json(f"/products/super-categories/{self.drinks.id}")
+        self.assertEqual(detail["product_count"], 1)
+        self.assertEqual([(c["name"], c["product_count"]) for c in detail["categories"]], [("Juice", 1)])
+
+        tree = self.get_json("/products/category-tree")
+        counts = {
+            super_category["name"]: (
+                super_category["product_count"],
+                {category["name"]: category["product_count"] for category in super_category["categories"]}
+            )
+            for super_category in tree["super_categories"]
+        }
+        self.assertEqual(counts, {"Drinks": (1, {"Juice": 1}), "Snacks": (2, {"Chips": 1, "Nuts": 1})})
+
+    def test_product_detail_lists_every_category(self):
+        detail = self.get_json(f"/products/{self.chips_product.id}")
+        self.assertEqual(detail["category"]["name"], "Chips")
+        self.assertEqual([category["name"] for category in detail["categories"]], ["Chips", "Juice"])
+
+        detail = self.get_json(f"/products/{self.nuts_product.id}")
+        self.assertEqual([category["name"] for category in detail["categories"]], ["Nuts"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""The columnar search backend returns the same pages as the SQL backend."""
+import itertools
+import random
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from app import catalog
+from app.catalog import bump_catalog_version
+from app.columnar import ColumnarCatalogCache
+from app.models import Brand, ProcessingLevel, VegStatus
+from app.routers import products
+
+from .support import ApiTestCase
+
+
+class ColumnarSearchParityTest(ApiTestCase):
+    """Same filters, sorting and pagination on both backends, on a catalog full of ties and NULLs."""
+
+    def setUp(self):
+        super().setUp()
+        rng = random.Random(7)
+        other_brand = self.add(Brand(name="Other 100% Foods"))
+        started = datetime(2025, 1, 1)
+        for i in range(300):
+            price = rng.choice([None, 10.0, 25.0, 49.5, 99.0])
+            self.add_product(
+                name=rng.choice(["Chips", "Biscuits", "Masala_Mix", "Crackers 50%", "Ünïcode Bar"]),
+                brand_id=rng.choice([self.brand.id, other_brand.id]),
+                health_rating=rng.choice([None, 10, 40, 40, 75, 90]),
+                veg_status=rng.choice([None, *VegStatus]),
+                processing_level=rng.choice([None, *ProcessingLevel]),
+                offer_price=price if rng.random() < 0.5 else None,
+                store_price=rng.choice([None, price]),
+                mrp=rng.choice([None, 120.0]),
+                sub_category_l3=rng.choice([None, "Baked", "Fried"]),
+                created_at=started + timedelta(days=rng.randint(0, 5)),
+                commit=False,
+            )
+        self.session.commit()
+
+    def search(self, params, columnar: bool):
+        backend = ColumnarCatalogCache() if columnar else None
+        with mock.patch.object(products, "columnar_catalog", backend):
+            body = self.get_json("/products/search", params={**params, "fields": "id"})
+        return body["total"], [product["id"] for product in body["products"]]
+
+    def test_backends_return_the_same_pages(self):
+        filters = [
+            {},
+            {"query": "chips"},
+            {"query": "%"},
+            {"query": "_mix"},
+            {"brand_name": "100%"},
+            {"veg_status": "VEG", "processing_level": "ULTRA_PROCESSED"},
+            {"min_health_rating": 40, "max_price": 50},
+            {"sub_category_l3": "bak"},
+        ]
+        sorts = itertools.product(["name", "price", "health_rating", "created_at"], ["asc", "desc"])
+        for params, (sort_by, sort_order), offset in itertools.product(filters, sorts, [0, 20]):
+            params = {**params, "sort_by": sort_by, "sort_order": sort_order, "limit": 20, "offset": offset}
+            with self.subTest(**params):
+                self.assertEqual(self.search(params, columnar=True), self.search(params, columnar=False))
+
+
+class ColumnarReloadTest(ApiTestCase):
+    """The columnar backend serves a snapshot until the catalog version changes."""
+
+    def test_reloads_on_a_new_catalog_version(self):
+        first = self.add_product(name="Chips")
+        with mock.patch.object(products, "columnar_catalog", ColumnarCatalogCache()), \
+                mock.patch.object(catalog, "CATALOG_VERSION_CHECK_SECONDS", 0):
+            self.assertEqual(self.get_json("/products/search")["total"], 1)
+
+            second = self.add_product(name="More Chips")
+            body = self.get_json("/products/search", params={"fields": "id"})
+            self.assertEqual((body["total"], body["products"]), (1, [{"id": first.id}]))
+
+            bump_catalog_version(self.session)
+            body = self.get_json("/products/search", params={"query": "more", "fields": "name"})
+            self.assertEqual((body["total"], body["products"]), (1, [{"id": second.id, "name": "More Chips"}]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""Tests for response content negotiation."""
+import unittest
+
+from fastapi import Request
+
+from app.encoding import IDENTITY_JSON, JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, negotiate
+
+
+def request(accept: str = "", accept_encoding: str = "") -> Request:
+    headers = [(b"accept", accept.encode()), (b"accept-encoding", accept_encoding.encode())]
+    return Request({"type": "http", "headers": headers})
+
+
+class NegotiateTest(unittest.TestCase):
+
+    def test_media_type(self):
+        cases = {
+            "": JSON_MEDIA_TYPE,
+            "*/*": JSON_MEDIA_TYPE,
+            "application/msgpack": MSGPACK_MEDIA_TYPE,
+            "application/x-msgpack, */*": MSGPACK_MEDIA_TYPE,
+            "Application/MsgPack": MSGPACK_MEDIA_TYPE,
+            "application/msgpack;q=0, application/json": JSON_MEDIA_TYPE,
+            "application/msgpack; q=0.0": JSON_MEDIA_TYPE,
+            "application/json, application/msgpack;q=0.5": JSON_MEDIA_TYPE,
+            "application/json;q=0.5, application/msgpack": MSGPACK_MEDIA_TYPE,
+            "application/msgpack;q=0.5, */*;q=0.1": MSGPACK_MEDIA_TYPE,
+            "application/msgpack;q=oops": JSON_MEDIA_TYPE,
+            "text/x-application/msgpack-ish": JSON_MEDIA_TYPE,
+        }
+        for accept, media_type in cases.items():
+            with self.subTest(accept=accept):
+                self.assertEqual(negotiate(request(accept, "gzip"))[0], media_type)
+
+    def test_content_encoding(self):
+        cases = {
+            "": "identity",
+            "gzip": "gzip",
+            "gzip, br": "br",
+            "br;q=0, gzip": "gzip",
+            "br;q=0.5, gzip": "gzip",
+            "gzip;q=0, br;q=0": "identity",
+            "deflate": "identity",
+        }
+        for accept_encoding, coding in cases.items():
+            with self.subTest(accept_encoding=accept_encoding):
+                self.assertEqual(negotiate(request("application/json", accept_encoding)), (JSON_MEDIA_TYPE, coding))
+
+    def test_msgpack_is_not_compressed(self):
+        self.assertEqual(negotiate(request("application/msgpack", "br")), (MSGPACK_MEDIA_TYPE, "identity"))
+        self.assertEqual(negotiate(request()), IDENTITY_JSON)
+
+
+if __name__ == "__main__":
+    unittest.main()
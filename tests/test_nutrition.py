@@ -0,0 +1,69 @@
+"""Tests for the cart nutrition aggregation."""
+import unittest
+
+from app.models import ProcessingLevel
+from app.nutrition import CartProduct, aggregate_cart, canonical_nutrient
+
+
+def cart_product(product_id: int, quantity: float = 1, **values) -> CartProduct:
+    return CartProduct(**{
+        "product_id": product_id, "quantity": quantity,
+        "net_quantity_value": 200, "net_quantity_unit": "g",
+        "nutrition_serving_value": 100, "nutrition_serving_unit": "g",
+        "health_rating": None, "processing_level": None, "allergens": None,
+        **values,
+    })
+
+
+class CanonicalNutrientTest(unittest.TestCase):
+
+    def test_aliases_map_to_standard_names(self):
+        self.assertEqual(canonical_nutrient("carbohydrate"), "total_carbohydrates")
+        self.assertEqual(canonical_nutrient("Dietary Fibre"), "dietary_fiber")
+        self.assertEqual(canonical_nutrient("total_sugar"), "total_sugars")
+        self.assertEqual(canonical_nutrient("added-sugar"), "added_sugars")
+        self.assertEqual(canonical_nutrient("protein"), "protein")
+        self.assertIsNone(canonical_nutrient("vitamin_c"))
+        self.assertIsNone(canonical_nutrient(None))
+
+
+class AggregateCartTest(unittest.TestCase):
+
+    def test_aliased_nutrient_names_are_counted(self):
+        products = [cart_product(1, quantity=2), cart_product(2)]
+        nutrition_rows = [
+            # Per 100 g serving; 200 g packs
+            (1, "total_carbohydrates", 50.0, "g"),
+            (1, "total_sugars", 10.0, "g"),
+            (1, "dietary_fiber", 2.0, "g"),
+            (2, "carbohydrate", 30.0, "g"),
+            (2, "total_sugar", 5000.0, "mg"),
+            (2, "added_sugar", 3.0, "g"),
+            (2, "dietary_fibre", 4.0, "g"),
+        ]
+        totals = aggregate_cart(products, nutrition_rows).totals
+
+        self.assertAlmostEqual(totals["total_carbohydrates"], 50 * 4 + 30 * 2)
+        self.assertAlmostEqual(totals["total_sugars"], 10 * 4 + 5 * 2)
+        self.assertAlmostEqual(totals["added_sugars"], 3 * 2)
+        self.assertAlmostEqual(totals["dietary_fiber"], 2 * 4 + 4 * 2)
+        self.assertIsNone(totals["protein"])
+
+    def test_nutrient_listed_under_two_names_keeps_the_first(self):
+        nutrition_rows = [(1, "carbohydrate", 20.0, "g"), (1, "total_carbohydrates", 99.0, "g")]
+        totals = aggregate_cart([cart_product(1)], nutrition_rows).totals
+        self.assertAlmostEqual(totals["total_carbohydrates"], 40.0)
+
+    def test_worst_processing_level(self):
+        products = [
+            cart_product(1, processing_level=ProcessingLevel.PROCESSED_FOOD),
+            cart_product(2, processing_level=ProcessingLevel.ULTRA_PROCESSED),
+            cart_product(3),
+        ]
+        aggregate = aggregate_cart(products, [])
+        self.assertEqual(aggregate.worst_processing_level, ProcessingLevel.ULTRA_PROCESSED)
+        self.assertEqual(aggregate.has_nutrition, {1: False, 2: False, 3: False})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+"""Tests for the batch, cart nutrition and sparse-field product endpoints."""
+import unittest
+
+from app.models import NutritionFact, ProcessingLevel
+from app.routers.products import BATCH_MAX_ITEMS, CART_MAX_ITEMS
+
+from .support import ApiTestCase
+
+
+class ProductBatchTest(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.first = self.add_product(name="First", barcode="111")
+        self.second = self.add_product(name="Second", barcode="222")
+
+    def test_found_and_not_found_in_request_order(self):
+        body = self.post_json("/products/batch", {
+            "ids": [self.second.id, 9999, self.first.id],
+            "barcodes": ["111", "missing"],
+        })
+        self.assertEqual(
+            [(item["id"], item["barcode"], item["found"]) for item in body["results"]],
+            [(self.second.id, None, True), (9999, None, False), (self.first.id, None, True),
+             (None, "111", True), (None, "missing", False)]
+        )
+        self.assertEqual(
+            [item["product"] and item["product"]["name"] for item in body["results"]],
+            ["Second", None, "First", "First", None]
+        )
+        self.assertEqual((body["found"], body["not_found"]), (3, 2))
+
+    def test_empty_batch(self):
+        self.assertEqual(self.post_json("/products/batch", {}), {"results": [], "found": 0, "not_found": 0})
+
+    def test_item_cap_counts_ids_and_barcodes(self):
+        ids = list(range(1, BATCH_MAX_ITEMS))
+        self.post_json("/products/batch", {"ids": ids, "barcodes": ["111"]})
+        self.post_json("/products/batch", {"ids": ids, "barcodes": ["111", "222"]}, status_code=400)
+
+
+class CartNutritionTest(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # 200 g packs with nutrition per 100 g
+        pack = dict(net_quantity_value=200, net_quantity_unit="g", nutrition_serving_value=100,
+                    nutrition_serving_unit="g")
+        self.chips = self.add_product(
+            name="Chips", barcode="111", allergens='["Milk"]', health_rating=40,
+            processing_level=ProcessingLevel.ULTRA_PROCESSED, **pack
+        )
+        self.oats = self.add_product(
+            name="Oats", barcode="222", health_rating=80,
+            processing_level=ProcessingLevel.UNPROCESSED_MINIMAL_PROCESSED, **pack
+        )
+        self.add_product(name="No nutrition", barcode="333")
+        for product_id, nutrient, value, unit in [
+            (self.chips.id, "energy", 500, "kcal"),
+            (self.chips.id, "carbohydrate", 50, "g"),
+            (self.chips.id, "total_sugar", 2000, "mg"),
+            (self.oats.id, "calories", 380, "kcal"),
+            (self.oats.id, "total_carbohydrates", 60, "g"),
+            (self.oats.id, "dietary_fibre", 10, "g"),
+        ]:
+            self.session.add(NutritionFact(product_id=product_id, nutrient=nutrient, value=value, unit=unit))
+        self.session.commit()
+
+    def test_totals_over_the_basket(self):
+        body = self.post_json("/products/cart/nutrition", {"items": [
+            {"barcode": "111", "quantity": 2},
+            {"barcode": "222"},
+            {"barcode": "111"},
+            {"barcode": "missing"},
+        ]})
+        totals = {nutrient["nutrient"]: nutrient["total"] for nutrient in body["nutrients"]}
+        self.assertEqual(body["total_weight_grams"], 800)
+        self.assertAlmostEqual(totals["energy"], 500 * 2 * 3 + 380 * 2)
+        self.assertAlmostEqual(totals["total_carbohydrates"], 50 * 2 * 3 + 60 * 2)
+        self.assertAlmostEqual(totals["total_sugars"], 2 * 2 * 3)
+        self.assertAlmostEqual(totals["dietary_fiber"], 10 * 2)
+        self.assertIsNone(totals["sodium"])
+        self.assertEqual(body["allergens"], ["Milk"])
+        self.assertEqual(body["worst_processing_level"], ProcessingLevel.ULTRA_PROCESSED.value)
+        self.assertEqual(
+            [(item["barcode"], item["quantity"], item["found"], item["has_nutrition"]) for item in body["items"]],
+            [("111", 3, True, True), ("222", 1, True, True), ("missing", 1, False, False)]
+        )
+
+    def test_distinct_barcode_cap(self):
+        items = [{"barcode": str(i)} for i in range(CART_MAX_ITEMS + 1)]
+        self.post_json("/products/cart/nutrition", {"items": items}, status_code=400)
+        self.post_json("/products/cart/nutrition", {"items": items[:-1] + [{"barcode": "0"}]})
+
+
+class SparseFieldsTest(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.product = self.add_product(name="Chips", offer_price=20.0)
+
+    def test_only_requested_fields_are_returned(self):
+        body = self.get_json("/products/search", params={"fields": "name,offer_price"})
+        self.assertEqual(body["products"], [{"id": self.product.id, "name": "Chips", "offer_price": 20.0}])
+
+        body = self.get_json(
+            f"/products/super-categories/{self.super_category.id}/products", params={"fields": "brand"}
+        )
+        brand = {"id": self.brand.id, "name": "Brand", "product_count": None}
+        self.assertEqual(body["products"], [{"id": self.product.id, "brand": brand}])
+
+    def test_all_fields_by_default(self):
+        product = self.get_json("/products/search")["products"][0]
+        self.assertEqual(product["display_name"], "Chips")
+        self.assertIn("primary_image", product)
+
+    def test_unknown_field_is_rejected(self):
+        body = self.get_json("/products/search", params={"fields": "name,secret"}, status_code=400)
+        self.assertEqual(body["detail"], "Unknown fields: secret")
+
+
+if __name__ == "__main__":
+    unittest.main()